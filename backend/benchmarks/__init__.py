@@ -0,0 +1,14 @@
+"""
+Suite de benchmark y carga de la API y los WebSockets.
+
+Levanta una base de datos temporal, la llena con un dataset determinista
+(`dataset.seed`) y lanza escenarios concurrentes contra la aplicación ASGI en
+proceso (`ifap_backend.asgi.application`) con el channel layer en memoria, sin
+servicios externos. Para cada operación reporta p50/p95/p99, throughput,
+consultas SQL por request y errores, y puede compararse con un baseline JSON
+para detectar regresiones (ver `__main__`).
+
+Con SQLite las escrituras concurrentes (inicio y envío de quizzes, descargas,
+contadores del dashboard) compiten por el único bloqueo de escritura: los
+"database is locked" aparecen como errores en el reporte.
+"""
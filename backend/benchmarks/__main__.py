@@ -0,0 +1,131 @@
+"""
+Uso (desde backend/):
+
+    python -m benchmarks                                  # todos los escenarios
+    python -m benchmarks --scenarios login quiz_wave --requests 500 --concurrency 50
+    python -m benchmarks --save-baseline benchmarks/baseline.json
+    python -m benchmarks --baseline benchmarks/baseline.json   # sale con 1 si hay regresiones
+"""
+import argparse
+import asyncio
+import logging
+import os
+import platform
+import random
+import sys
+import tempfile
+
+import django
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m benchmarks', description='Benchmark en proceso de la API y WebSockets')
+    parser.add_argument('--scenarios', nargs='+', default=None, help='Escenarios a ejecutar (por defecto todos)')
+    parser.add_argument('--requests', type=int, default=200, help='Iteraciones por escenario')
+    parser.add_argument('--concurrency', type=int, default=20, help='Iteraciones simultáneas')
+    parser.add_argument('--scale', type=float, default=1.0, help='Multiplicador del tamaño del dataset')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--baseline', help='Reporte JSON con el que comparar')
+    parser.add_argument('--save-baseline', help='Guarda el reporte como nuevo baseline')
+    parser.add_argument('--output', help='Guarda el reporte JSON de esta ejecución')
+    parser.add_argument('--tolerance', type=float, default=None, help='Tolerancia relativa del p95 (por defecto 0.25)')
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'ifap_backend.settings')
+    django.setup()
+
+    from django.conf import settings
+    from django.db import connection
+    from django.test.utils import override_settings
+
+    from . import dataset, report
+    from .scenarios import REQUESTS_PER_ITERATION, SCENARIOS, Context, run_scenario
+
+    names = args.scenarios or list(SCENARIOS)
+    unknown = set(names) - set(SCENARIOS)
+    if unknown:
+        sys.exit(f"Escenarios desconocidos: {', '.join(sorted(unknown))}. Disponibles: {', '.join(SCENARIOS)}")
+
+    # Los archivos de log del proyecto no deben recibir el tráfico sintético
+    logging.disable(logging.CRITICAL)
+    workdir = tempfile.mkdtemp(prefix='ifap-bench-')
+    overrides = override_settings(
+        MEDIA_ROOT=workdir,
+        ALLOWED_HOSTS=['*'],
+        SECURE_SSL_REDIRECT=False,
+        CHANNEL_LAYERS={'default': {'BACKEND': 'ifap_backend.channel_metrics.InstrumentedInMemoryChannelLayer'}},
+        QUERY_BUDGET={**settings.QUERY_BUDGET, 'ENABLED': True, 'STRICT': False, 'SERVER_TIMING': True},
+    )
+    overrides.enable()
+
+    if connection.vendor == 'sqlite':
+        # Archivo y no memoria: las vistas corren en otro hilo con su propia conexión
+        connection.settings_dict.setdefault('TEST', {})['NAME'] = os.path.join(workdir, 'bench.sqlite3')
+    old_name = connection.settings_dict['NAME']
+    connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+    try:
+        data = dataset.seed(
+            students=int(200 * args.scale),
+            courses=max(int(20 * args.scale), 1),
+            topics=int(100 * args.scale),
+            files=max(int(30 * args.scale), 1),
+            seed_value=args.seed,
+        )
+
+        from django.contrib.auth import get_user_model
+        from rest_framework_simplejwt.tokens import AccessToken
+        tokens = {user.id: str(AccessToken.for_user(user)) for user in get_user_model().objects.all()}
+
+        from ifap_backend.asgi import application
+        context = Context(application, data, tokens, random.Random(args.seed))
+
+        async def run_all():
+            results = {}
+            for name in names:
+                iterations = max(args.requests // REQUESTS_PER_ITERATION.get(name, 1), 1)
+                samples, elapsed = await run_scenario(SCENARIOS[name], context, iterations, args.concurrency)
+                for operation, operation_samples in samples.items():
+                    results[operation] = report.summarize(operation_samples, elapsed)
+            return results
+
+        current = {
+            'meta': {
+                'scenarios': names,
+                'requests': args.requests,
+                'concurrency': args.concurrency,
+                'scale': args.scale,
+                'seed': args.seed,
+                'database': connection.vendor,
+                'python': platform.python_version(),
+            },
+            'results': asyncio.run(run_all()),
+        }
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+        overrides.disable()
+        logging.disable(logging.NOTSET)
+
+    print(report.format_table(current))
+    if args.output:
+        report.save(current, args.output)
+    if args.save_baseline:
+        report.save(current, args.save_baseline)
+        print(f'\nBaseline guardado en {args.save_baseline}')
+
+    if args.baseline:
+        kwargs = {} if args.tolerance is None else {'latency_tolerance': args.tolerance}
+        regressions = report.compare(current, report.load(args.baseline), **kwargs)
+        if regressions:
+            print('\nRegresiones respecto al baseline:')
+            for regression in regressions:
+                print(f'  - {regression}')
+            return 1
+        print('\nSin regresiones respecto al baseline')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
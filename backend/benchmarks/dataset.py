@@ -0,0 +1,96 @@
+"""
+Dataset de benchmark: el generador de `seed_scale` (`ScaleSeeder`) con
+volúmenes pequeños, más un administrador y archivos públicos de biblioteca.
+La misma semilla produce siempre los mismos datos.
+"""
+from dataclasses import dataclass, field
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+
+from courses.models import Course
+from ifap_backend.seeding import ScaleSeeder, SeedVolumes
+from library.models import LibraryFile
+
+User = get_user_model()
+
+PASSWORD = 'bench-Pass-2024'
+PREFIX = 'bench'
+QUESTIONS_PER_QUIZ = 5
+OPTIONS_PER_QUESTION = 4
+
+
+@dataclass
+class Dataset:
+    admin_id: int = None
+    student_ids: list = field(default_factory=list)
+    usernames: dict = field(default_factory=dict)
+    course_ids: list = field(default_factory=list)
+    # quiz_id -> [(question_id, id de la opción correcta, [ids de opciones])]
+    quizzes: dict = field(default_factory=dict)
+    # student_id -> [quiz_id] de los cursos en los que está inscrito
+    student_quizzes: dict = field(default_factory=dict)
+    topic_ids: list = field(default_factory=list)
+    file_ids: list = field(default_factory=list)
+
+
+def seed(students=200, courses=20, courses_per_student=3, topics=100, replies_per_topic=5,
+         files=30, seed_value=42):
+    volumes = SeedVolumes(
+        users=students,
+        instructors=max(courses // 5, 1),
+        courses=courses,
+        enrollments_per_user=courses_per_student,
+        lessons_per_course=5,
+        lesson_completions=students * courses_per_student * 2,
+        questions_per_quiz=QUESTIONS_PER_QUIZ,
+        options_per_question=OPTIONS_PER_QUESTION,
+        # Los intentos los generan los escenarios
+        quiz_answers=0,
+        forum_categories=5,
+        forum_topics=topics,
+        forum_replies=topics * replies_per_topic,
+    )
+    seeder = ScaleSeeder(volumes, seed=seed_value, prefix=PREFIX, chunk_size=1000, password=PASSWORD,
+                         log=lambda message: None)
+    seeder.run()
+
+    admin = User.objects.create(
+        username=f'{PREFIX}_admin', email=f'{PREFIX}_admin@ifap.edu.pe', password=make_password(PASSWORD),
+        is_superuser=True, is_staff=True, is_student=False,
+    )
+
+    library_files = []
+    for i in range(files):
+        name = default_storage.save(f'library/bench/archivo_{i}.txt', ContentFile(b'x' * 2048))
+        library_files.append(LibraryFile(
+            title=f'Archivo {i}', file=name, uploaded_by_id=seeder.instructor_ids[i % len(seeder.instructor_ids)],
+            visibility='public', file_size=2048, file_type='.txt'
+        ))
+    LibraryFile.objects.bulk_create(library_files)
+
+    # Los quizzes de cursos inactivos no son visibles para los estudiantes
+    active = set(Course.objects.filter(id__in=seeder.course_ids, is_active=True).values_list('id', flat=True))
+
+    return Dataset(
+        admin_id=admin.id,
+        student_ids=seeder.student_ids,
+        usernames=dict(User.objects.filter(username__startswith=f'{PREFIX}_').values_list('id', 'username')),
+        course_ids=seeder.course_ids,
+        quizzes={
+            quiz_id: [(question_id, correct, [correct] + wrong) for question_id, correct, wrong in questions]
+            for quiz_id, questions in seeder.questions.items()
+        },
+        student_quizzes={
+            student_id: [
+                quiz_id for course_id in course_ids if course_id in active
+                for quiz_id in seeder.quizzes_by_course[course_id]
+            ]
+            for student_id, course_ids in zip(seeder.student_ids, seeder.enrolled)
+            if active.intersection(course_ids)
+        },
+        topic_ids=seeder.topic_ids,
+        file_ids=list(LibraryFile.objects.order_by('id').values_list('id', flat=True)),
+    )
@@ -0,0 +1,102 @@
+"""
+Resumen de las muestras de cada escenario y comparación con un baseline.
+
+Una muestra es (latencia en segundos, éxito, consultas SQL o None). El
+resumen de cada operación incluye p50/p95/p99 en milisegundos, throughput,
+consultas por request y errores (muestras sin éxito).
+"""
+import json
+import math
+
+DEFAULT_LATENCY_TOLERANCE = 0.25
+DEFAULT_MIN_LATENCY_DELTA_MS = 5.0
+DEFAULT_QUERY_TOLERANCE = 0.5
+
+
+def percentile(values, fraction):
+    """Percentil por rango más cercano sobre una lista ya ordenada"""
+    if not values:
+        return None
+    index = max(math.ceil(fraction * len(values)) - 1, 0)
+    return values[min(index, len(values) - 1)]
+
+
+def summarize(samples, elapsed):
+    latencies = sorted(latency * 1000 for latency, _, _ in samples)
+    queries = [count for _, _, count in samples if count is not None]
+    errors = sum(1 for _, ok, _ in samples if not ok)
+    return {
+        'count': len(samples),
+        'errors': errors,
+        'p50_ms': _round(percentile(latencies, 0.50)),
+        'p95_ms': _round(percentile(latencies, 0.95)),
+        'p99_ms': _round(percentile(latencies, 0.99)),
+        'max_ms': _round(latencies[-1] if latencies else None),
+        'throughput_rps': _round(len(samples) / elapsed if elapsed else None),
+        'queries_avg': _round(sum(queries) / len(queries)) if queries else None,
+        'queries_max': max(queries) if queries else None,
+    }
+
+
+def _round(value, digits=2):
+    return None if value is None else round(value, digits)
+
+
+def compare(current, baseline, latency_tolerance=DEFAULT_LATENCY_TOLERANCE,
+            min_latency_delta_ms=DEFAULT_MIN_LATENCY_DELTA_MS,
+            query_tolerance=DEFAULT_QUERY_TOLERANCE):
+    """
+    Lista de regresiones de `current` respecto a `baseline` (ambos con la
+    forma de `results`). Una operación regresa si su p95 crece más de
+    `latency_tolerance` (y al menos `min_latency_delta_ms`), si hace más
+    consultas por request o si aparecen errores nuevos.
+    """
+    regressions = []
+    for name, base in baseline.get('results', {}).items():
+        now = current.get('results', {}).get(name)
+        if now is None:
+            continue
+
+        if base.get('p95_ms') is not None and now.get('p95_ms') is not None:
+            limit = max(base['p95_ms'] * (1 + latency_tolerance), base['p95_ms'] + min_latency_delta_ms)
+            if now['p95_ms'] > limit:
+                regressions.append(
+                    f"{name}: p95 {now['p95_ms']} ms > {round(limit, 2)} ms (baseline {base['p95_ms']} ms)"
+                )
+
+        if base.get('queries_avg') is not None and now.get('queries_avg') is not None:
+            if now['queries_avg'] > base['queries_avg'] + query_tolerance:
+                regressions.append(
+                    f"{name}: {now['queries_avg']} consultas/request (baseline {base['queries_avg']})"
+                )
+
+        if now.get('errors', 0) > base.get('errors', 0):
+            regressions.append(f"{name}: {now['errors']} errores (baseline {base.get('errors', 0)})")
+    return regressions
+
+
+def format_table(report):
+    header = f"{'operación':<32}{'n':>6}{'err':>5}{'p50':>9}{'p95':>9}{'p99':>9}{'rps':>9}{'q/req':>8}"
+    lines = [header, '-' * len(header)]
+    for name, row in sorted(report['results'].items()):
+        lines.append(
+            f"{name:<32}{row['count']:>6}{row['errors']:>5}"
+            f"{_cell(row['p50_ms'])}{_cell(row['p95_ms'])}{_cell(row['p99_ms'])}"
+            f"{_cell(row['throughput_rps'])}{_cell(row['queries_avg'], 8)}"
+        )
+    return '\n'.join(lines)
+
+
+def _cell(value, width=9):
+    return f"{'-' if value is None else value:>{width}}"
+
+
+def load(path):
+    with open(path) as report_file:
+        return json.load(report_file)
+
+
+def save(report, path):
+    with open(path, 'w') as report_file:
+        json.dump(report, report_file, indent=2, sort_keys=True)
+        report_file.write('\n')
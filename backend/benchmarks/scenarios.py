@@ -0,0 +1,211 @@
+"""
+Escenarios concurrentes contra la aplicación ASGI en proceso.
+
+Cada escenario es una corrutina `(context, index) -> [(operación, muestra)]`
+que hace uno o varios requests encadenados (p. ej. iniciar y enviar un
+intento de quiz). `run_scenario` ejecuta `requests` iteraciones con como
+máximo `concurrency` en vuelo. Las consultas por request se leen de la
+cabecera `Server-Timing` que añade `QueryBudgetMiddleware`.
+"""
+import asyncio
+import json
+import re
+import time
+from dataclasses import dataclass
+
+from channels.layers import get_channel_layer
+from channels.testing import HttpCommunicator, WebsocketCommunicator
+
+from notifications.utils import NotificationBatch
+
+from .dataset import PASSWORD
+
+_QUERIES = re.compile(r'desc="(\d+) queries"')
+
+# Tamaño del grupo de sockets que recibe cada difusión en `ws_fanout`
+FANOUT_SIZE = 20
+
+
+@dataclass
+class Response:
+    status: int
+    body: bytes
+    latency: float
+    queries: int = None
+
+    def json(self):
+        return json.loads(self.body or b'null')
+
+    def sample(self, expected=(200,)):
+        return (self.latency, self.status in expected, self.queries)
+
+
+class Context:
+    """Aplicación, dataset y tokens compartidos por todas las iteraciones"""
+
+    def __init__(self, application, dataset, tokens, rng):
+        self.application = application
+        self.dataset = dataset
+        self.tokens = tokens
+        self.rng = rng
+
+    async def request(self, method, path, user_id=None, data=None):
+        headers = [(b'host', b'testserver')]
+        body = b''
+        if data is not None:
+            body = json.dumps(data).encode()
+            headers += [(b'content-type', b'application/json'), (b'content-length', str(len(body)).encode())]
+        if user_id is not None:
+            headers.append((b'authorization', f'Bearer {self.tokens[user_id]}'.encode()))
+
+        communicator = HttpCommunicator(self.application, method, path, body=body, headers=headers)
+        start = time.perf_counter()
+        response = await communicator.get_response(timeout=60)
+        latency = time.perf_counter() - start
+
+        queries = None
+        for name, value in response['headers']:
+            if name.lower() == b'server-timing':
+                match = _QUERIES.search(value.decode())
+                queries = int(match.group(1)) if match else None
+        return Response(response['status'], response['body'], latency, queries)
+
+    def student(self, index):
+        return self.dataset.student_ids[index % len(self.dataset.student_ids)]
+
+
+async def login_storm(context, index):
+    username = context.dataset.usernames[context.student(index)]
+    response = await context.request(
+        'POST', '/api/users/login/', data={'username': username, 'password': PASSWORD}
+    )
+    return [('login', response.sample())]
+
+
+async def my_courses(context, index):
+    response = await context.request('GET', '/api/courses/my_courses/', context.student(index))
+    return [('courses.my_courses', response.sample())]
+
+
+async def dashboard(context, index):
+    response = await context.request('GET', '/api/users/dashboard_stats/', context.dataset.admin_id)
+    return [('users.dashboard_stats', response.sample())]
+
+
+async def quiz_wave(context, index):
+    students = list(context.dataset.student_quizzes)
+    student_id = students[index % len(students)]
+    quiz_id = context.rng.choice(context.dataset.student_quizzes[student_id])
+    started = await context.request('POST', f'/api/quizzes/{quiz_id}/start_attempt/', student_id)
+    samples = [('quizzes.start_attempt', started.sample())]
+    if started.status != 200:
+        return samples
+
+    # Cada respuesta se autoguarda; el envío final solo califica lo guardado
+    for question_id, correct, option_ids in context.dataset.quizzes[quiz_id]:
+        answer = {
+            'question_id': question_id,
+            'selected_options': [correct if context.rng.random() < 0.7 else context.rng.choice(option_ids)],
+        }
+        saved = await context.request('POST', f'/api/quizzes/{quiz_id}/autosave/', student_id, {'answers': [answer]})
+        samples.append(('quizzes.autosave', saved.sample()))
+    submitted = await context.request('POST', f'/api/quizzes/{quiz_id}/submit/', student_id, {})
+    samples.append(('quizzes.submit', submitted.sample()))
+    return samples
+
+
+async def forum(context, index):
+    student_id = context.student(index)
+    topic_id = context.rng.choice(context.dataset.topic_ids)
+    listing = await context.request('GET', '/api/forum/topics/', student_id)
+    detail = await context.request('GET', f'/api/forum/topics/{topic_id}/', student_id)
+    replies = await context.request('GET', f'/api/forum/replies/?topic={topic_id}', student_id)
+    return [
+        ('forum.topics', listing.sample()),
+        ('forum.topic_detail', detail.sample()),
+        ('forum.replies', replies.sample()),
+    ]
+
+
+async def library(context, index):
+    student_id = context.student(index)
+    file_id = context.rng.choice(context.dataset.file_ids)
+    listing = await context.request('GET', '/api/library/files/', student_id)
+    download = await context.request('GET', f'/api/library/files/{file_id}/download/', student_id)
+    return [('library.files', listing.sample()), ('library.download', download.sample())]
+
+
+async def ws_fanout(context, index):
+    """
+    Abre `FANOUT_SIZE` sockets de notificaciones, difunde un evento a todos
+    como lo hace `dispatch_events` y mide hasta que cada socket lo recibe.
+    """
+    student_ids = [context.student(index * FANOUT_SIZE + offset) for offset in range(FANOUT_SIZE)]
+    samples = []
+    communicators = []
+    try:
+        for student_id in student_ids:
+            communicator = WebsocketCommunicator(
+                context.application, f'/ws/notifications/?token={context.tokens[student_id]}'
+            )
+            start = time.perf_counter()
+            connected, _ = await communicator.connect(timeout=30)
+            samples.append(('ws.connect', (time.perf_counter() - start, connected, None)))
+            if connected:
+                communicators.append(communicator)
+            else:
+                await communicator.wait()
+
+        batch = NotificationBatch()
+        for student_id in student_ids:
+            batch.add(student_id, {'title': 'Benchmark', 'message': f'Difusión {index}'})
+        channel_layer = get_channel_layer()
+        start = time.perf_counter()
+        await asyncio.gather(*(channel_layer.group_send(group, event) for group, event in batch.build_events()))
+
+        async def receive(communicator):
+            try:
+                await communicator.receive_from(timeout=30)
+            except asyncio.TimeoutError:
+                return (time.perf_counter() - start, False, None)
+            return (time.perf_counter() - start, True, None)
+
+        for sample in await asyncio.gather(*(receive(communicator) for communicator in communicators)):
+            samples.append(('ws.fanout', sample))
+    finally:
+        for communicator in communicators:
+            await communicator.disconnect()
+    return samples
+
+
+SCENARIOS = {
+    'login': login_storm,
+    'my_courses': my_courses,
+    'dashboard': dashboard,
+    'quiz_wave': quiz_wave,
+    'forum': forum,
+    'library': library,
+    'ws_fanout': ws_fanout,
+}
+
+# Escenarios cuya iteración equivale a varios requests (sockets en `ws_fanout`)
+REQUESTS_PER_ITERATION = {'ws_fanout': FANOUT_SIZE}
+
+
+async def run_scenario(scenario, context, requests, concurrency):
+    """Ejecuta `requests` iteraciones y devuelve ({operación: muestras}, segundos)"""
+    semaphore = asyncio.Semaphore(concurrency)
+    samples = {}
+
+    async def worker(index):
+        async with semaphore:
+            try:
+                results = await scenario(context, index)
+            except Exception:
+                results = [(scenario.__name__, (0.0, False, None))]
+        for operation, sample in results:
+            samples.setdefault(operation, []).append(sample)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker(index) for index in range(requests)))
+    return samples, time.perf_counter() - start
@@ -0,0 +1,70 @@
+import tempfile
+
+from django.test import TestCase, SimpleTestCase, override_settings
+
+from courses.models import Course
+from quizzes.models import Option, Quiz
+from benchmarks import dataset, report
+
+
+class BenchmarkReportTest(SimpleTestCase):
+    def test_percentile_nearest_rank(self):
+        values = list(range(1, 101))
+        self.assertEqual(report.percentile(values, 0.50), 50)
+        self.assertEqual(report.percentile(values, 0.99), 99)
+        self.assertEqual(report.percentile([7], 0.95), 7)
+        self.assertIsNone(report.percentile([], 0.5))
+
+    def test_summarize_counts_errors_and_queries(self):
+        samples = [(0.010, True, 4), (0.020, True, 6), (0.030, False, None)]
+        summary = report.summarize(samples, elapsed=1.5)
+
+        self.assertEqual(summary['count'], 3)
+        self.assertEqual(summary['errors'], 1)
+        self.assertEqual(summary['p50_ms'], 20.0)
+        self.assertEqual(summary['max_ms'], 30.0)
+        self.assertEqual(summary['throughput_rps'], 2.0)
+        self.assertEqual(summary['queries_avg'], 5.0)
+        self.assertEqual(summary['queries_max'], 6)
+
+    def test_compare_flags_latency_queries_and_errors(self):
+        baseline = {'results': {
+            'login': {'p95_ms': 100.0, 'queries_avg': 2.0, 'errors': 0},
+            'forum.topics': {'p95_ms': 2.0, 'queries_avg': 5.0, 'errors': 0},
+        }}
+        current = {'results': {
+            'login': {'p95_ms': 130.0, 'queries_avg': 3.0, 'errors': 1},
+            # +150% pero por debajo del delta mínimo absoluto
+            'forum.topics': {'p95_ms': 5.0, 'queries_avg': 5.0, 'errors': 0},
+        }}
+
+        regressions = report.compare(current, baseline)
+
+        self.assertEqual(len(regressions), 3)
+        self.assertTrue(all(regression.startswith('login:') for regression in regressions))
+        self.assertEqual(report.compare(baseline, baseline), [])
+
+
+class BenchmarkDatasetTest(TestCase):
+    def setUp(self):
+        media_root = tempfile.TemporaryDirectory()
+        self.addCleanup(media_root.cleanup)
+        media_settings = override_settings(MEDIA_ROOT=media_root.name)
+        media_settings.enable()
+        self.addCleanup(media_settings.disable)
+
+    def test_seed_builds_consistent_dataset(self):
+        data = dataset.seed(students=10, courses=3, courses_per_student=2, topics=4, files=2, seed_value=7)
+
+        self.assertEqual(len(data.student_ids), 10)
+        self.assertEqual(len(data.course_ids), 3)
+        self.assertEqual(len(data.file_ids), 2)
+        self.assertIn('bench_admin', data.usernames.values())
+        for quiz_id, questions in data.quizzes.items():
+            self.assertEqual(len(questions), dataset.QUESTIONS_PER_QUIZ)
+            for question_id, correct, option_ids in questions:
+                self.assertIn(correct, option_ids)
+                self.assertTrue(Option.objects.get(id=correct).is_correct)
+        for student_id, quiz_ids in data.student_quizzes.items():
+            enrolled = set(Course.objects.filter(students=student_id, is_active=True).values_list('id', flat=True))
+            self.assertEqual({Quiz.objects.get(id=quiz_id).course_id for quiz_id in quiz_ids}, enrolled)
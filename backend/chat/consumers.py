@@ -5,12 +5,13 @@ from channels.generic.websocket import AsyncWebsocketConsumer
 from channels.db import database_sync_to_async
 from django.contrib.auth import get_user_model
 from django.core.exceptions import ObjectDoesNotExist
+from ifap_backend.channel_metrics import ConnectionMetricsMixin
 from .models import ChatRoom, Message, UserChatStatus, MessageRead
 
 User = get_user_model()
 
 
-class ChatConsumer(AsyncWebsocketConsumer):
+class ChatConsumer(ConnectionMetricsMixin, AsyncWebsocketConsumer):
     async def connect(self):
         self.room_id = self.scope['url_route']['kwargs']['room_id']
         self.room_group_name = f'chat_{self.room_id}'
@@ -0,0 +1,17 @@
+# Generated by Django 4.2.7 on 2026-10-19 14:32
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('chat', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='message',
+            index=models.Index(fields=['chat_room', 'created_at'], name='chat_message_room_idx'),
+        ),
+    ]
@@ -74,6 +74,9 @@ class Message(models.Model):
     
     class Meta:
         ordering = ['created_at']
+        indexes = [
+            models.Index(fields=['chat_room', 'created_at'], name='chat_message_room_idx'),
+        ]
         verbose_name = 'Mensaje'
         verbose_name_plural = 'Mensajes'
     
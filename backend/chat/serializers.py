@@ -35,12 +35,49 @@ class MessageSerializer(serializers.ModelSerializer):
         model = Message
         fields = [
             'id', 'content', 'sender', 'created_at', 'message_type',
-            'edited_at', 'is_edited', 'read_by', 'is_read_by_user'
+            'updated_at', 'is_edited', 'read_by', 'is_read_by_user'
         ]
-        read_only_fields = ['id', 'sender', 'created_at', 'edited_at', 'is_edited']
+        read_only_fields = ['id', 'sender', 'created_at', 'updated_at', 'is_edited']
     
     def get_is_read_by_user(self, obj):
         request = self.context.get('request')
+        if request and request.user.is_authenticated:
+            # Reutilizar `read_by` si ya viene precargado para evitar N+1
+            if 'read_by' in getattr(obj, '_prefetched_objects_cache', {}):
+                return any(read.user_id == request.user.id for read in obj.read_by.all())
+            return obj.read_by.filter(user=request.user).exists()
+        return False
+
+
+class MessageSenderSerializer(serializers.ModelSerializer):
+    """Datos mínimos del remitente para los listados compactos"""
+    
+    class Meta:
+        model = User
+        fields = ['id', 'username', 'first_name', 'last_name']
+
+
+class MessageCompactSerializer(serializers.ModelSerializer):
+    """
+    Representación compacta de un mensaje, sin expandir `read_by`.
+    `is_read_by_user` se toma de la anotación `read_by_user` de la consulta.
+    """
+    sender = MessageSenderSerializer(read_only=True)
+    is_read_by_user = serializers.SerializerMethodField()
+    
+    class Meta:
+        model = Message
+        fields = [
+            'id', 'content', 'sender', 'created_at', 'updated_at', 'message_type',
+            'is_edited', 'is_deleted', 'reply_to', 'is_read_by_user'
+        ]
+        read_only_fields = fields
+    
+    def get_is_read_by_user(self, obj):
+        annotated = getattr(obj, 'read_by_user', None)
+        if annotated is not None:
+            return annotated
+        request = self.context.get('request')
         if request and request.user.is_authenticated:
             return obj.read_by.filter(user=request.user).exists()
         return False
@@ -1,3 +1,109 @@
-from django.test import TestCase
+from datetime import timedelta
+from unittest import mock, skipUnless
 
-# Create your tests here.
+from django.apps import apps
+from django.contrib.auth import get_user_model
+from django.test import override_settings
+from django.urls import include, path
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+CHAT_INSTALLED = apps.is_installed('chat')
+if CHAT_INSTALLED:
+    from .models import ChatRoom, Message, MessageRead
+    from .views import ChatRoomViewSet, MessagePagination
+
+User = get_user_model()
+
+# La app no está enlazada en ifap_backend/urls.py: los tests montan sus rutas aquí
+urlpatterns = [
+    path('api/chat/', include('chat.urls')),
+] if CHAT_INSTALLED else []
+
+
+@skipUnless(CHAT_INSTALLED, 'La app chat no está en INSTALLED_APPS')
+@override_settings(ROOT_URLCONF='chat.tests')
+class ChatMessageHistoryTest(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='chat_user', email='chat_user@test.com', password='testpass123')
+        self.user.set_role('student')
+        self.user.save()
+        self.other = User.objects.create_user(username='chat_other', email='chat_other@test.com', password='testpass123')
+        self.other.set_role('student')
+        self.other.save()
+
+        self.room = ChatRoom.objects.create(name='Sala', room_type='group', created_by=self.user)
+        self.room.participants.set([self.user, self.other])
+        # bulk_create: sin notificaciones por mensaje; fechas distintas y ordenadas
+        Message.objects.bulk_create([
+            Message(chat_room=self.room, sender=self.other, content=f'Mensaje {i}') for i in range(7)
+        ])
+        base = timezone.now() - timedelta(hours=1)
+        self.messages = list(Message.objects.filter(chat_room=self.room).order_by('id'))
+        for index, message in enumerate(self.messages):
+            Message.objects.filter(pk=message.pk).update(created_at=base + timedelta(minutes=index))
+        self.messages = list(Message.objects.filter(chat_room=self.room).order_by('id'))
+        MessageRead.objects.create(message=self.messages[-1], user=self.user)
+
+        self.client.force_authenticate(user=self.user)
+        self.url = f'/api/chat/rooms/{self.room.id}/messages/'
+
+    def _ids(self, response):
+        return [message['id'] for message in response.data['results']]
+
+    def test_cursor_pages_in_both_directions(self):
+        ids = [message.id for message in self.messages]
+
+        first = self.client.get(self.url, {'page_size': 3})
+        self.assertEqual(first.status_code, status.HTTP_200_OK)
+        # Los más recientes, en orden cronológico
+        self.assertEqual(self._ids(first), ids[4:])
+        self.assertIsNone(first.data['previous'])
+
+        second = self.client.get(first.data['next'])
+        self.assertEqual(self._ids(second), ids[1:4])
+        third = self.client.get(second.data['next'])
+        self.assertEqual(self._ids(third), ids[:1])
+        self.assertIsNone(third.data['next'])
+
+        # Un cursor inverso trae los mensajes siguientes al indicado, también en orden cronológico
+        cursor = MessagePagination().encode_cursor(
+            [self.messages[1].created_at, self.messages[1].id], reverse=True
+        )
+        newer = self.client.get(self.url, {'page_size': 3, 'before': cursor})
+        self.assertEqual(self._ids(newer), ids[2:5])
+
+    def test_invalid_cursor_returns_400(self):
+        response = self.client.get(self.url, {'before': 'no-es-un-cursor'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('before', response.data['details'])
+
+    def test_sync_returns_messages_after_since_id(self):
+        url = f'/api/chat/rooms/{self.room.id}/sync/'
+        since = self.messages[2].id
+
+        response = self.client.get(url, {'since_id': since})
+        self.assertEqual(self._ids(response), [message.id for message in self.messages[3:]])
+        self.assertEqual(response.data['last_id'], self.messages[-1].id)
+        self.assertFalse(response.data['has_more'])
+
+        with mock.patch.object(ChatRoomViewSet, 'SYNC_MAX_MESSAGES', 2):
+            limited = self.client.get(url, {'since_id': since})
+        self.assertEqual(self._ids(limited), [message.id for message in self.messages[3:5]])
+        self.assertEqual(limited.data['last_id'], self.messages[4].id)
+        self.assertTrue(limited.data['has_more'])
+
+        self.assertEqual(self.client.get(url).status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_read_by_is_expanded_only_on_request(self):
+        compact = self.client.get(self.url)
+        latest = compact.data['results'][-1]
+        self.assertNotIn('read_by', latest)
+        self.assertTrue(latest['is_read_by_user'])
+        self.assertFalse(compact.data['results'][0]['is_read_by_user'])
+
+        expanded = self.client.get(self.url, {'expand': 'read_by'})
+        latest = expanded.data['results'][-1]
+        self.assertEqual([read['user']['id'] for read in latest['read_by']], [self.user.id])
+        self.assertTrue(latest['is_read_by_user'])
@@ -1,9 +1,8 @@
 from rest_framework import viewsets, status, permissions
 from rest_framework.decorators import action
 from rest_framework.response import Response
-from rest_framework.pagination import PageNumberPagination
 from django.shortcuts import get_object_or_404
-from django.db.models import Q, Count, Max
+from django.db.models import Q, Count, Max, Exists, OuterRef
 from django.contrib.auth import get_user_model
 from django.utils import timezone
 from datetime import datetime
@@ -11,18 +10,37 @@ from datetime import datetime
 from .models import ChatRoom, Message, MessageRead, UserChatStatus, ChatNotification
 from .serializers import (
     ChatRoomSerializer, ChatRoomCreateSerializer, MessageSerializer,
-    MessageCreateSerializer, UserChatStatusSerializer, ChatNotificationSerializer
+    MessageCompactSerializer, MessageCreateSerializer, UserChatStatusSerializer, ChatNotificationSerializer
 )
 from courses.models import Course
 from users.permissions import IsStudentOrHigher
+from ifap_backend.pagination import KeysetPagination
 
 User = get_user_model()
 
 
-class MessagePagination(PageNumberPagination):
+class MessagePagination(KeysetPagination):
+    """
+    Paginación por cursor sobre (created_at, id) para el historial del chat.
+
+    La primera página trae los mensajes más recientes y el cursor `next`
+    apunta a los anteriores; cada página se entrega en orden cronológico.
+    """
     page_size = 50
-    page_size_query_param = 'page_size'
     max_page_size = 100
+    cursor_query_param = 'before'
+    ordering = ('-created_at', '-id')
+
+    def get_ordering(self, queryset):
+        return list(self.ordering)
+
+    def paginate_queryset(self, queryset, request, view=None):
+        rows = super().paginate_queryset(queryset, request, view)
+        # Orden cronológico para que el cliente pueda pintar la página tal cual
+        return list(reversed(rows))
+
+    def get_previous_link(self):
+        return None
 
 
 class ChatRoomViewSet(viewsets.ModelViewSet):
@@ -45,9 +63,31 @@ class ChatRoomViewSet(viewsets.ModelViewSet):
     def perform_create(self, serializer):
         serializer.save(created_by=self.request.user)
     
+    SYNC_MAX_MESSAGES = 200
+
+    def _wants_read_by(self, request):
+        """El detalle de `read_by` solo se expande si se pide con ?expand=read_by"""
+        expand = request.query_params.get('expand', '')
+        return 'read_by' in [item.strip() for item in expand.split(',')]
+
+    def _messages_queryset(self, chat_room, request):
+        messages = chat_room.messages.select_related('sender')
+        if self._wants_read_by(request):
+            return messages.prefetch_related('read_by__user')
+        return messages.annotate(
+            read_by_user=Exists(
+                MessageRead.objects.filter(message=OuterRef('pk'), user=request.user)
+            )
+        )
+
+    def _message_serializer_class(self, request):
+        if self._wants_read_by(request):
+            return MessageSerializer
+        return MessageCompactSerializer
+
     @action(detail=True, methods=['get'])
     def messages(self, request, pk=None):
-        """Obtener mensajes de una sala de chat"""
+        """Obtener mensajes de una sala de chat (paginación por cursor)"""
         chat_room = self.get_object()
         
         # Verificar que el usuario sea participante
@@ -57,18 +97,48 @@ class ChatRoomViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_403_FORBIDDEN
             )
         
-        messages = chat_room.messages.select_related('sender').prefetch_related('read_by__user')
+        messages = self._messages_queryset(chat_room, request)
+        serializer_class = self._message_serializer_class(request)
         
-        # Paginación
         paginator = MessagePagination()
-        page = paginator.paginate_queryset(messages, request)
+        page = paginator.paginate_queryset(messages, request, view=self)
+        serializer = serializer_class(page, many=True, context={'request': request})
+        return paginator.get_paginated_response(serializer.data)
+    
+    @action(detail=True, methods=['get'])
+    def sync(self, request, pk=None):
+        """Obtener los mensajes posteriores a `since_id` (uso tras reconexión)"""
+        chat_room = self.get_object()
         
-        if page is not None:
-            serializer = MessageSerializer(page, many=True, context={'request': request})
-            return paginator.get_paginated_response(serializer.data)
+        # Verificar que el usuario sea participante
+        if not chat_room.participants.filter(id=request.user.id).exists():
+            return Response(
+                {'error': 'No tienes acceso a esta sala de chat'},
+                status=status.HTTP_403_FORBIDDEN
+            )
         
-        serializer = MessageSerializer(messages, many=True, context={'request': request})
-        return Response(serializer.data)
+        try:
+            since_id = int(request.query_params.get('since_id', ''))
+        except ValueError:
+            return Response(
+                {'error': 'since_id es requerido y debe ser un entero'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        messages = self._messages_queryset(chat_room, request).filter(
+            id__gt=since_id
+        ).order_by('id')
+        messages = list(messages[:self.SYNC_MAX_MESSAGES + 1])
+        has_more = len(messages) > self.SYNC_MAX_MESSAGES
+        messages = messages[:self.SYNC_MAX_MESSAGES]
+        
+        serializer_class = self._message_serializer_class(request)
+        serializer = serializer_class(messages, many=True, context={'request': request})
+        return Response({
+            'results': serializer.data,
+            'last_id': messages[-1].id if messages else since_id,
+            'has_more': has_more,
+        })
     
     @action(detail=True, methods=['post'])
     def send_message(self, request, pk=None):
@@ -0,0 +1,143 @@
+"""
+Analítica de cursos para los endpoints administrativos.
+
+Cada respuesta se calcula con, como máximo, dos consultas agrupadas y se
+cachea por conjunto de filtros (rango de fechas de creación y modalidad).
+"""
+from django.db.models import Count, Q
+from django.utils.dateparse import parse_date
+
+from ifap_backend.cache_service import cache_service, CacheKeys
+from .models import Course
+
+ANALYTICS_CACHE_TIMEOUT = 60 * 5
+
+
+class AnalyticsFilterError(ValueError):
+    """Filtro inválido en los parámetros de analítica"""
+
+
+def parse_filters(params):
+    """Normaliza los filtros `date_from`, `date_to` (YYYY-MM-DD) y `modality`"""
+    filters = {}
+
+    for name in ('date_from', 'date_to'):
+        value = params.get(name)
+        if value:
+            parsed = parse_date(value)
+            if parsed is None:
+                raise AnalyticsFilterError(f'{name} debe tener el formato YYYY-MM-DD')
+            filters[name] = parsed.isoformat()
+
+    if filters.get('date_from') and filters.get('date_to') and filters['date_from'] > filters['date_to']:
+        raise AnalyticsFilterError('date_from no puede ser posterior a date_to')
+
+    modality = params.get('modality')
+    if modality:
+        valid = [choice for choice, _ in Course._meta.get_field('modality').choices]
+        if modality not in valid:
+            raise AnalyticsFilterError(f"modality debe ser una de: {', '.join(valid)}")
+        filters['modality'] = modality
+
+    return filters
+
+
+def filtered_courses(filters):
+    courses = Course.objects.all()
+    if filters.get('date_from'):
+        courses = courses.filter(created_at__date__gte=filters['date_from'])
+    if filters.get('date_to'):
+        courses = courses.filter(created_at__date__lte=filters['date_to'])
+    if filters.get('modality'):
+        courses = courses.filter(modality=filters['modality'])
+    return courses
+
+
+def _cached(kind, filters, builder):
+    cache_key = cache_service.make_key(CacheKeys.COURSE_ANALYTICS, kind, **filters)
+    data = cache_service.get(cache_key, cache_alias='api')
+    if data is None:
+        data = builder(filters)
+        cache_service.set(cache_key, data, ANALYTICS_CACHE_TIMEOUT, cache_alias='api')
+    return data
+
+
+def _build_course_metrics(filters):
+    courses = filtered_courses(filters)
+
+    # Consulta 1: totales por modalidad con conteo condicional de activos
+    rows = courses.order_by().values('modality').annotate(
+        total=Count('id'),
+        active=Count('id', filter=Q(is_active=True)),
+    )
+    courses_by_modality = {
+        modality: 0 for modality, _ in Course._meta.get_field('modality').choices
+    }
+    total_courses = active_courses = 0
+    for row in rows:
+        courses_by_modality[row['modality']] = row['total']
+        total_courses += row['total']
+        active_courses += row['active']
+
+    # Consulta 2: estudiantes únicos inscritos en los cursos filtrados
+    Enrollment = Course.students.through
+    total_students = Enrollment.objects.filter(
+        course__in=courses.values('id')
+    ).values('user_id').distinct().count()
+
+    average = total_students / total_courses if total_courses else 0
+
+    return {
+        'total_courses': total_courses,
+        'active_courses': active_courses,
+        'inactive_courses': total_courses - active_courses,
+        'total_students': total_students,
+        'average_students_per_course': round(average, 2),
+        'courses_by_modality': courses_by_modality,
+    }
+
+
+def _build_instructor_stats(filters):
+    courses = filtered_courses(filters).filter(instructor__is_instructor=True)
+
+    # Consulta 1: cursos y cursos activos por instructor, ya ordenados
+    rows = courses.order_by().values(
+        'instructor_id',
+        'instructor__first_name',
+        'instructor__last_name',
+    ).annotate(
+        courses_count=Count('id'),
+        active_courses=Count('id', filter=Q(is_active=True)),
+    ).order_by('-courses_count', 'instructor_id')
+
+    # Consulta 2: estudiantes únicos por instructor sobre la tabla de inscripciones
+    Enrollment = Course.students.through
+    students = dict(
+        Enrollment.objects.filter(course__in=courses.values('id'))
+        .values('course__instructor_id')
+        .annotate(total=Count('user_id', distinct=True))
+        .values_list('course__instructor_id', 'total')
+    )
+
+    stats = []
+    for row in rows:
+        total_students = students.get(row['instructor_id'], 0)
+        stats.append({
+            'instructor_id': row['instructor_id'],
+            'instructor_name': f"{row['instructor__first_name']} {row['instructor__last_name']}".strip(),
+            'courses_count': row['courses_count'],
+            'total_students': total_students,
+            'active_courses': row['active_courses'],
+            'average_students_per_course': round(total_students / row['courses_count'], 2),
+        })
+    return stats
+
+
+def get_course_metrics(filters):
+    """Métricas globales de cursos (sin la actividad reciente)"""
+    return _cached('metrics', filters, _build_course_metrics)
+
+
+def get_instructor_stats(filters):
+    """Estadísticas por instructor ordenadas por número de cursos"""
+    return _cached('instructors', filters, _build_instructor_stats)
@@ -0,0 +1,199 @@
+"""
+Operaciones masivas sobre cursos (activar, desactivar, eliminar).
+
+Cada lote se procesa en una transacción con una lectura de los cursos, un
+único UPDATE/DELETE sobre los IDs elegibles y un `bulk_create` de los
+registros de auditoría. La invalidación de cache se hace una vez por
+ejecución y se devuelve un informe con el resultado de cada ID.
+"""
+import logging
+
+from django.db import transaction
+from django.db.models import Count
+from django.utils import timezone
+
+from ifap_backend.cache_service import invalidate_courses_cache, invalidate_now_and_on_commit
+from users.dashboard_service import adjust_counter
+from .models import Course, CourseAuditLog
+from .signals import suppress_course_invalidation
+
+logger = logging.getLogger('courses')
+
+BULK_BATCH_SIZE = 500
+
+# operación -> (estado requerido, estado final, resultado si ya estaba en el estado final)
+STATE_OPERATIONS = {
+    'activate': (False, True, 'already_active'),
+    'deactivate': (True, False, 'already_inactive'),
+}
+
+DONE_STATUS = {
+    'activate': 'activated',
+    'deactivate': 'deactivated',
+    'delete': 'deleted',
+}
+
+
+class BulkCourseOperation:
+    """
+    Ejecuta `operation` sobre `course_ids` y acumula el informe por ID.
+
+    `check_ownership` restringe la operación a los cursos que el usuario
+    puede gestionar (superusuario o instructor del curso); el resto se
+    informa como `forbidden` y queda registrado como evento de seguridad.
+    """
+
+    def __init__(self, operation, user, course_ids, reason='', ip_address=None,
+                 user_agent=None, check_ownership=False, batch_size=BULK_BATCH_SIZE):
+        if operation not in DONE_STATUS:
+            raise ValueError(f'Operación masiva desconocida: {operation}')
+        self.operation = operation
+        self.action = f'bulk_{operation}'
+        self.user = user
+        self.course_ids = list(dict.fromkeys(course_ids))
+        self.reason = reason
+        self.ip_address = ip_address
+        self.user_agent = user_agent
+        self.check_ownership = check_ownership
+        self.batch_size = batch_size
+        self.results = {}
+
+    @property
+    def processed_count(self):
+        done = DONE_STATUS[self.operation]
+        return sum(1 for status in self.results.values() if status == done)
+
+    def report(self):
+        return [
+            {'course_id': course_id, 'status': self.results[course_id]}
+            for course_id in self.course_ids
+        ]
+
+    def run(self):
+        changed = []
+        # El DELETE dispara post_delete por curso: sin invalidar uno a uno
+        with suppress_course_invalidation():
+            for start in range(0, len(self.course_ids), self.batch_size):
+                changed.extend(self._run_batch(self.course_ids[start:start + self.batch_size]))
+
+        if changed:
+            invalidate_now_and_on_commit(invalidate_courses_cache, changed)
+        logger.info(
+            f"{self.action} por {self.user.username}: {self.processed_count} de "
+            f"{len(self.course_ids)} cursos procesados"
+        )
+        return self
+
+    def _can_manage(self, row):
+        return self.user.is_superuser or (self.user.is_instructor and row['instructor_id'] == self.user.id)
+
+    def _audit_entry(self, course_id, action, **kwargs):
+        return CourseAuditLog.build_entry(
+            course=course_id,
+            user=self.user,
+            action=action,
+            ip_address=self.ip_address,
+            user_agent=self.user_agent,
+            **kwargs
+        )
+
+    def _additional_data(self):
+        return {
+            'reason': self.reason,
+            'bulk_operation': True,
+            'total_courses': len(self.course_ids)
+        }
+
+    def _run_batch(self, batch):
+        with transaction.atomic():
+            rows = {
+                row['id']: row
+                for row in Course.objects.select_for_update().filter(id__in=batch).values(
+                    'id', 'title', 'is_active', 'instructor_id'
+                )
+            }
+
+            eligible = []
+            forbidden = []
+            for course_id in batch:
+                row = rows.get(course_id)
+                if row is None:
+                    self.results[course_id] = 'not_found'
+                elif self.operation in STATE_OPERATIONS and row['is_active'] != STATE_OPERATIONS[self.operation][0]:
+                    self.results[course_id] = STATE_OPERATIONS[self.operation][2]
+                elif self.check_ownership and not self._can_manage(row):
+                    self.results[course_id] = 'forbidden'
+                    forbidden.append(course_id)
+                else:
+                    eligible.append(course_id)
+
+            entries = [
+                self._audit_entry(
+                    course_id,
+                    'security_event',
+                    operation_details={
+                        'event_type': 'UNAUTHORIZED_BULK_COURSE_ACCESS',
+                        'severity': 'warning',
+                        'details': f"Sin permisos para curso {rows[course_id]['title']}",
+                    },
+                    additional_data=self._additional_data(),
+                )
+                for course_id in forbidden
+            ]
+            if forbidden:
+                logger.warning(
+                    f"Security Event: UNAUTHORIZED_BULK_COURSE_ACCESS - User: {self.user.username} - "
+                    f"Courses: {forbidden}"
+                )
+
+            if eligible and self.operation == 'delete':
+                entries.extend(self._delete_entries(eligible, rows))
+                CourseAuditLog.objects.bulk_create(entries, batch_size=self.batch_size)
+                # Como en el borrado individual, los registros del curso caen en cascada con él
+                Course.objects.filter(id__in=eligible).delete()
+            else:
+                if eligible:
+                    entries.extend(self._set_state(eligible))
+                CourseAuditLog.objects.bulk_create(entries, batch_size=self.batch_size)
+
+        for course_id in eligible:
+            self.results[course_id] = DONE_STATUS[self.operation]
+        return eligible
+
+    def _set_state(self, eligible):
+        required, target, _ = STATE_OPERATIONS[self.operation]
+        updated = Course.objects.filter(id__in=eligible, is_active=required).update(
+            is_active=target, updated_at=timezone.now()
+        )
+        # El UPDATE no dispara señales: se ajusta el contador del dashboard aquí
+        adjust_counter('courses.active', updated if target else -updated)
+        return [
+            self._audit_entry(
+                course_id,
+                self.action,
+                old_values={'is_active': required},
+                new_values={'is_active': target},
+                additional_data=self._additional_data(),
+            )
+            for course_id in eligible
+        ]
+
+    def _delete_entries(self, eligible, rows):
+        students = dict(
+            Course.students.through.objects.filter(course_id__in=eligible)
+            .values('course_id').annotate(total=Count('id')).values_list('course_id', 'total')
+        )
+        return [
+            self._audit_entry(
+                course_id,
+                self.action,
+                old_values={
+                    'title': rows[course_id]['title'],
+                    'instructor': rows[course_id]['instructor_id'],
+                    'is_active': rows[course_id]['is_active'],
+                    'students_count': students.get(course_id, 0)
+                },
+                additional_data=self._additional_data(),
+            )
+            for course_id in eligible
+        ]
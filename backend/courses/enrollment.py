@@ -0,0 +1,255 @@
+"""
+Servicio de inscripciones.
+
+- `enroll` / `unenroll` trabajan directamente sobre la tabla intermedia de
+  `Course.students`: un único INSERT (o DELETE) sin consulta previa; la
+  restricción única de la tabla resuelve las inscripciones repetidas.
+- `import_roster` inscribe una lista de estudiantes (CSV o JSON) en una sola
+  transacción con `bulk_create(ignore_conflicts=True)`.
+- El cupo (`Course.max_students`) se comprueba con la fila del curso
+  bloqueada, de modo que dos inscripciones simultáneas no lo superan.
+- `is_enrolled` responde desde cache; la clave incluye la versión del curso,
+  que cambia con cada inscripción, baja o edición del curso.
+
+Como se escribe en la tabla intermedia sin pasar por `students.add()`, no se
+disparan las señales `m2m_changed`: la invalidación de cache se hace aquí, en
+lote, al terminar cada operación.
+"""
+import csv
+import io
+import logging
+
+from django.contrib.auth import get_user_model
+from django.db import IntegrityError, transaction
+from django.db.models.functions import Lower
+
+from ifap_backend.cache_service import (
+    CacheKeys, cache_service, get_course_version, invalidate_enrollment_cache, invalidate_now_and_on_commit,
+)
+from .models import Course, CourseAuditLog
+
+logger = logging.getLogger('courses')
+User = get_user_model()
+
+Enrollment = Course.students.through
+
+ENROLLMENT_CHECK_TIMEOUT = 10 * 60
+ROSTER_BATCH_SIZE = 1000
+ROSTER_COLUMNS = ('id', 'username', 'email')
+
+
+class EnrollmentError(ValueError):
+    """Datos de inscripción inválidos"""
+
+
+class CourseFullError(EnrollmentError):
+    """La inscripción superaría el cupo del curso"""
+
+
+def _schedule_invalidation(course_ids, user_ids):
+    invalidate_now_and_on_commit(invalidate_enrollment_cache, course_ids, user_ids)
+
+
+def _insert(course_id, user_id):
+    """INSERT en la tabla intermedia; False si ya existía la inscripción"""
+    try:
+        with transaction.atomic():
+            Enrollment.objects.create(course_id=course_id, user_id=user_id)
+    except IntegrityError:
+        return False
+    return True
+
+
+def _locked_capacity(course_id):
+    """Bloquea la fila del curso y devuelve su cupo actual"""
+    return Course.objects.select_for_update().filter(pk=course_id).values_list(
+        'max_students', flat=True
+    ).first()
+
+
+def _full_message(limit):
+    return f'El curso alcanzó su cupo máximo de {limit} estudiantes'
+
+
+def enroll(course, user):
+    """
+    Inscribe a `user` en `course`. Devuelve True si se creó la inscripción y
+    False si ya existía. Lanza `CourseFullError` si no quedan plazas.
+    """
+    if course.max_students is None:
+        created = _insert(course.pk, user.pk)
+    else:
+        with transaction.atomic():
+            limit = _locked_capacity(course.pk)
+            created = _insert(course.pk, user.pk)
+            if created and limit is not None and Enrollment.objects.filter(course_id=course.pk).count() > limit:
+                # Se deshace el INSERT junto con el bloque atómico
+                raise CourseFullError(_full_message(limit))
+
+    if created:
+        _schedule_invalidation([course.pk], [user.pk])
+    return created
+
+
+def is_enrolled(course_id, user_id):
+    """Si `user_id` está inscrito en `course_id` y el curso está activo"""
+    key = cache_service.make_key(CacheKeys.COURSE_ENROLLMENT, course_id, user_id, get_course_version(course_id))
+    enrolled = cache_service.get(key, cache_alias='api')
+    if enrolled is None:
+        enrolled = Enrollment.objects.filter(course_id=course_id, user_id=user_id, course__is_active=True).exists()
+        cache_service.set(key, enrolled, ENROLLMENT_CHECK_TIMEOUT, cache_alias='api')
+    return enrolled
+
+
+def unenroll(course, user):
+    """Da de baja a `user` de `course`. Devuelve False si no estaba inscrito."""
+    deleted, _ = Enrollment.objects.filter(course_id=course.pk, user_id=user.pk).delete()
+    if deleted:
+        _schedule_invalidation([course.pk], [user.pk])
+    return bool(deleted)
+
+
+# --- Importación de matrícula ---
+
+def _identifier(value):
+    """Normaliza un identificador de estudiante a (columna, valor)"""
+    if isinstance(value, dict):
+        if value.get('id') not in (None, ''):
+            return ('id', _as_id(value['id']))
+        if value.get('username'):
+            return ('username', str(value['username']).strip())
+        if value.get('email'):
+            return ('email', str(value['email']).strip().lower())
+        return None
+    if isinstance(value, bool):
+        return None
+    if isinstance(value, int):
+        return ('id', value)
+    if isinstance(value, str):
+        value = value.strip()
+        if not value:
+            return None
+        if value.isdigit():
+            return ('id', int(value))
+        return ('email', value.lower()) if '@' in value else ('username', value)
+    return None
+
+
+def _as_id(value):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        raise EnrollmentError(f'ID de estudiante inválido: {value}')
+
+
+def parse_roster_csv(content):
+    """
+    Lee una matrícula en CSV. La cabecera debe incluir al menos una de las
+    columnas `id`, `username` o `email`; de cada fila se usa la primera
+    que tenga valor.
+    """
+    if isinstance(content, bytes):
+        try:
+            content = content.decode('utf-8-sig')
+        except UnicodeDecodeError:
+            raise EnrollmentError('El archivo CSV debe estar codificado en UTF-8')
+
+    reader = csv.DictReader(io.StringIO(content))
+    header = [column.strip().lower() for column in (reader.fieldnames or [])]
+    if not set(ROSTER_COLUMNS) & set(header):
+        raise EnrollmentError(f"El CSV debe incluir una columna: {', '.join(ROSTER_COLUMNS)}")
+    reader.fieldnames = header
+
+    entries = []
+    for row in reader:
+        entry = {column: (row.get(column) or '').strip() for column in ROSTER_COLUMNS}
+        if any(entry.values()):
+            entries.append(entry)
+    return entries
+
+
+def parse_roster(entries):
+    """Convierte la lista recibida (IDs, usernames, emails o dicts) en identificadores"""
+    if not isinstance(entries, list):
+        raise EnrollmentError('students debe ser una lista')
+    identifiers = []
+    for position, entry in enumerate(entries, start=1):
+        identifier = _identifier(entry)
+        if identifier is None:
+            raise EnrollmentError(f'Estudiante inválido en la posición {position}: {entry!r}')
+        identifiers.append(identifier)
+    return list(dict.fromkeys(identifiers))
+
+
+def _resolve_users(identifiers):
+    """Una consulta por tipo de identificador (y lote) para obtener los IDs"""
+    users = User.objects.filter(is_active=True).annotate(email_lower=Lower('email'))
+    lookups = {'id': 'id', 'username': 'username', 'email': 'email_lower'}
+    resolved = {}
+    for column, lookup in lookups.items():
+        values = [value for kind, value in identifiers if kind == column]
+        for start in range(0, len(values), ROSTER_BATCH_SIZE):
+            batch = values[start:start + ROSTER_BATCH_SIZE]
+            matches = dict(users.filter(**{f'{lookup}__in': batch}).values_list(lookup, 'id'))
+            for value in batch:
+                if value in matches:
+                    resolved[(column, value)] = matches[value]
+    return resolved
+
+
+def import_roster(course, entries, user, ip_address=None, user_agent=None):
+    """
+    Inscribe en `course` a los estudiantes de `entries` (ver `parse_roster`)
+    en una sola transacción. Si la matrícula supera el cupo no se inscribe a
+    nadie. Devuelve un informe con inscritos, ya inscritos y no encontrados.
+    """
+    identifiers = parse_roster(entries)
+    resolved = _resolve_users(identifiers)
+    not_found = [value for kind, value in identifiers if (kind, value) not in resolved]
+    user_ids = list(dict.fromkeys(resolved.values()))
+
+    with transaction.atomic():
+        limit = _locked_capacity(course.pk)
+        enrolled = set()
+        for start in range(0, len(user_ids), ROSTER_BATCH_SIZE):
+            enrolled.update(Enrollment.objects.filter(
+                course_id=course.pk, user_id__in=user_ids[start:start + ROSTER_BATCH_SIZE]
+            ).values_list('user_id', flat=True))
+        new_ids = [user_id for user_id in user_ids if user_id not in enrolled]
+
+        if limit is not None and new_ids:
+            available = limit - Enrollment.objects.filter(course_id=course.pk).count()
+            if len(new_ids) > available:
+                raise CourseFullError(
+                    f'{_full_message(limit)}: quedan {max(available, 0)} plazas y '
+                    f'la matrícula añade {len(new_ids)} estudiantes'
+                )
+
+        Enrollment.objects.bulk_create(
+            [Enrollment(course_id=course.pk, user_id=user_id) for user_id in new_ids],
+            batch_size=ROSTER_BATCH_SIZE,
+            ignore_conflicts=True
+        )
+        report = {
+            'total': len(identifiers),
+            'enrolled': len(new_ids),
+            'already_enrolled': len(enrolled),
+            'not_found': not_found,
+        }
+        CourseAuditLog.build_entry(
+            course=course,
+            user=user,
+            action='roster_import',
+            ip_address=ip_address,
+            user_agent=user_agent,
+            new_values={'enrolled_user_ids': new_ids},
+            additional_data={key: value for key, value in report.items() if key != 'not_found'},
+        ).save()
+
+    if new_ids:
+        _schedule_invalidation([course.pk], new_ids)
+    logger.info(
+        f"Matrícula importada en curso {course.pk} por {user.username}: "
+        f"{len(new_ids)} inscritos, {len(enrolled)} ya inscritos, {len(not_found)} no encontrados"
+    )
+    return report
@@ -0,0 +1,236 @@
+"""
+Libro de calificaciones por curso.
+
+Construye la matriz estudiantes × ítems (quizzes y tareas) con unas pocas
+consultas masivas: estudiantes, quizzes, tareas, mejores/últimos intentos y
+entregas finales. Cada columna se guarda en un `array('d')` indexado por la
+posición del estudiante (NaN = sin nota), de modo que los promedios se
+calculan recorriendo columnas en lugar de objetos.
+
+Todas las celdas son porcentajes (0-100). Las tareas entregadas tarde aplican
+`late_penalty_percent` sobre la nota de la entrega final.
+"""
+import csv
+import io
+import math
+from array import array
+
+from django.db.models import Max
+
+from quizzes.models import Quiz, QuizAttempt
+from tasks.models import Task, TaskSubmission
+
+try:
+    import openpyxl
+except ImportError:  # dependencia opcional, solo para exportar en XLSX
+    openpyxl = None
+
+QUIZ_POLICIES = ('best', 'latest')
+EXPORT_FORMATS = ('csv', 'xlsx')
+STUDENT_COLUMNS = ['student_id', 'username', 'full_name', 'email']
+# Filas por lote al recorrer intentos y entregas (cursor del lado del servidor en PostgreSQL)
+STREAM_CHUNK_SIZE = 2000
+
+
+class GradebookError(ValueError):
+    """Parámetro inválido al construir o exportar el libro de calificaciones"""
+
+
+class _Echo:
+    """Pseudo-buffer para que csv.writer devuelva cada línea en lugar de escribirla"""
+
+    def write(self, value):
+        return value
+
+
+class Gradebook:
+    def __init__(self, course, students, items, columns, quiz_policy):
+        self.course = course
+        self.students = students
+        self.items = items
+        self.columns = columns
+        self.quiz_policy = quiz_policy
+
+    def student_averages(self):
+        """Promedio de cada estudiante sobre los ítems con nota"""
+        size = len(self.students)
+        totals = array('d', [0.0]) * size
+        counts = array('l', [0]) * size
+        for column in self.columns:
+            for index, value in enumerate(column):
+                if not math.isnan(value):
+                    totals[index] += value
+                    counts[index] += 1
+        return [
+            totals[index] / counts[index] if counts[index] else None
+            for index in range(size)
+        ]
+
+    def item_averages(self):
+        averages = []
+        for column in self.columns:
+            graded = [value for value in column if not math.isnan(value)]
+            averages.append(sum(graded) / len(graded) if graded else None)
+        return averages
+
+    def header(self):
+        return STUDENT_COLUMNS + [item['title'] for item in self.items] + ['average']
+
+    def iter_rows(self):
+        """Filas planas (estudiante + notas + promedio) para CSV/XLSX"""
+        averages = self.student_averages()
+        for index, student in enumerate(self.students):
+            grades = [_rounded(column[index]) for column in self.columns]
+            yield [
+                student['id'],
+                student['username'],
+                student['full_name'],
+                student['email'],
+                *grades,
+                _rounded(averages[index]),
+            ]
+
+    def to_dict(self):
+        averages = self.student_averages()
+        keys = [item['key'] for item in self.items]
+        return {
+            'course_id': self.course.id,
+            'course_title': self.course.title,
+            'quiz_policy': self.quiz_policy,
+            'items': [
+                {**item, 'average': _rounded(average)}
+                for item, average in zip(self.items, self.item_averages())
+            ],
+            'students': [
+                {
+                    **student,
+                    'grades': {
+                        key: _rounded(column[index]) for key, column in zip(keys, self.columns)
+                    },
+                    'average': _rounded(averages[index]),
+                }
+                for index, student in enumerate(self.students)
+            ],
+        }
+
+    def stream_csv(self):
+        """Generador de líneas CSV para StreamingHttpResponse"""
+        writer = csv.writer(_Echo())
+        yield writer.writerow(self.header())
+        for row in self.iter_rows():
+            yield writer.writerow(['' if value is None else value for value in row])
+
+    def to_xlsx(self):
+        if openpyxl is None:
+            raise GradebookError('La exportación a XLSX requiere instalar openpyxl')
+        workbook = openpyxl.Workbook(write_only=True)
+        sheet = workbook.create_sheet(title='Calificaciones')
+        sheet.append(self.header())
+        for row in self.iter_rows():
+            sheet.append(row)
+        output = io.BytesIO()
+        workbook.save(output)
+        return output.getvalue()
+
+
+def _rounded(value):
+    if value is None or math.isnan(value):
+        return None
+    return round(value, 2)
+
+
+def _first_per_pair(rows):
+    """De filas ordenadas por (usuario, ítem, ...) conserva la primera de cada par"""
+    seen = set()
+    for user_id, item_id, *values in rows:
+        if (user_id, item_id) in seen:
+            continue
+        seen.add((user_id, item_id))
+        yield user_id, item_id, values
+
+
+def _quiz_scores(course, quiz_policy):
+    attempts = QuizAttempt.objects.filter(quiz__course=course, completed_at__isnull=False)
+    if quiz_policy == 'best':
+        rows = attempts.order_by().values('user_id', 'quiz_id').annotate(best=Max('percentage'))
+        return ((row['user_id'], row['quiz_id'], row['best']) for row in rows)
+
+    rows = attempts.order_by('user_id', 'quiz_id', '-completed_at', '-id').values_list(
+        'user_id', 'quiz_id', 'percentage'
+    ).iterator(chunk_size=STREAM_CHUNK_SIZE)
+    return ((user_id, quiz_id, values[0]) for user_id, quiz_id, values in _first_per_pair(rows))
+
+
+def _task_scores(course, tasks):
+    submissions = TaskSubmission.objects.filter(
+        assignment__task__course=course,
+        is_final=True,
+        score__isnull=False,
+    ).order_by(
+        'assignment__student_id', 'assignment__task_id', '-attempt_number'
+    ).values_list(
+        'assignment__student_id', 'assignment__task_id', 'score', 'is_late'
+    ).iterator(chunk_size=STREAM_CHUNK_SIZE)
+
+    for student_id, task_id, (score, is_late) in _first_per_pair(submissions):
+        task = tasks.get(task_id)
+        if task is None or not task['max_score']:
+            continue
+        score = float(score)
+        if is_late:
+            score *= 1 - float(task['late_penalty_percent']) / 100
+        yield student_id, task_id, max(score, 0) / float(task['max_score']) * 100
+
+
+def build_gradebook(course, quiz_policy='best'):
+    """
+    Matriz de calificaciones del curso. `quiz_policy` elige el mejor intento
+    (`best`) o el último finalizado (`latest`) de cada quiz.
+    """
+    if quiz_policy not in QUIZ_POLICIES:
+        raise GradebookError(f"quiz_policy debe ser una de: {', '.join(QUIZ_POLICIES)}")
+
+    students = [
+        {
+            'id': row['id'],
+            'username': row['username'],
+            'full_name': f"{row['first_name']} {row['last_name']}".strip(),
+            'email': row['email'],
+        }
+        for row in course.students.order_by('last_name', 'first_name', 'id').values(
+            'id', 'username', 'first_name', 'last_name', 'email'
+        )
+    ]
+    quizzes = list(Quiz.objects.filter(course=course).order_by('created_at', 'id').values('id', 'title'))
+    tasks = {
+        task['id']: task
+        for task in Task.objects.filter(course=course).exclude(status='draft').order_by(
+            'due_date', 'id'
+        ).values('id', 'title', 'max_score', 'late_penalty_percent')
+    }
+
+    items = [
+        {'key': f"quiz:{quiz['id']}", 'type': 'quiz', 'id': quiz['id'], 'title': quiz['title']}
+        for quiz in quizzes
+    ] + [
+        {'key': f"task:{task['id']}", 'type': 'task', 'id': task['id'], 'title': task['title']}
+        for task in tasks.values()
+    ]
+
+    row_index = {student['id']: index for index, student in enumerate(students)}
+    column_index = {item['key']: index for index, item in enumerate(items)}
+    empty = array('d', [math.nan]) * len(students)
+    columns = [array('d', empty) for _ in items]
+
+    def fill(kind, scores):
+        for user_id, item_id, value in scores:
+            row = row_index.get(user_id)
+            column = column_index.get(f'{kind}:{item_id}')
+            # Se ignoran alumnos ya no inscritos e ítems fuera de la matriz
+            if row is not None and column is not None and value is not None:
+                columns[column][row] = value
+
+    fill('quiz', _quiz_scores(course, quiz_policy))
+    fill('task', _task_scores(course, tasks))
+
+    return Gradebook(course, students, items, columns, quiz_policy)
@@ -0,0 +1,73 @@
+"""
+Comando de gestión para generar datos sintéticos con volúmenes de producción.
+Uso: python manage.py seed_scale [--scale 0.1] [--users N] [--courses N] [--quiz-answers N] ... [--seed 42]
+
+Sin argumentos genera ~50k usuarios, 2k cursos, 1M lecciones completadas,
+5M respuestas de quizzes y 500k réplicas del foro; `--scale` reduce o
+amplía todos los volúmenes a la vez.
+"""
+
+from dataclasses import fields
+
+from django.core.management.base import BaseCommand, CommandError
+
+from ifap_backend.seeding import DEFAULT_PASSWORD, ScaleSeeder, SeedVolumes
+
+
+class Command(BaseCommand):
+    help = 'Genera datos sintéticos a escala con bulk_create, semilla fija y popularidad sesgada (Zipf)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--scale',
+            type=float,
+            default=1.0,
+            help='Multiplicador de todos los volúmenes (las proporciones por curso/quiz no cambian)'
+        )
+        for field in fields(SeedVolumes):
+            parser.add_argument(
+                f"--{field.name.replace('_', '-')}",
+                type=int,
+                dest=field.name,
+                help=f'Sobrescribe {field.name} (por defecto {field.default:,} × scale)'
+            )
+        parser.add_argument('--seed', type=int, default=42, help='Semilla del generador')
+        parser.add_argument(
+            '--prefix',
+            default='seed',
+            help='Prefijo de los usernames generados; debe ser nuevo en la base de datos'
+        )
+        parser.add_argument('--chunk-size', type=int, default=5000, help='Filas por bulk_create')
+        parser.add_argument('--password', default=DEFAULT_PASSWORD, help='Contraseña de todos los usuarios')
+
+    def handle(self, *args, **options):
+        if options['scale'] <= 0 or options['chunk_size'] <= 0:
+            raise CommandError('--scale y --chunk-size deben ser positivos')
+
+        volumes = SeedVolumes().scaled(options['scale'])
+        overrides = {
+            field.name: options[field.name] for field in fields(SeedVolumes)
+            if options[field.name] is not None
+        }
+        if any(value < 1 for value in overrides.values()):
+            raise CommandError('Los volúmenes deben ser mayores que cero')
+        volumes = SeedVolumes(**{**vars(volumes), **overrides})
+
+        self.stdout.write(
+            'Volúmenes: ' + ', '.join(f'{name}={value:,}' for name, value in vars(volumes).items())
+        )
+        seeder = ScaleSeeder(
+            volumes,
+            seed=options['seed'],
+            prefix=options['prefix'],
+            chunk_size=options['chunk_size'],
+            password=options['password'],
+            log=self.stdout.write,
+        )
+        try:
+            counts = seeder.run()
+        except (ValueError, RuntimeError) as e:
+            raise CommandError(str(e))
+
+        summary = ', '.join(f'{name}: {count:,}' for name, count in counts.items())
+        self.stdout.write(self.style.SUCCESS(f'Datos generados ({summary})'))
@@ -0,0 +1,23 @@
+# Generated by Django 4.2.7 on 2026-10-19 14:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0007_alter_courserating_unique_together_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='course',
+            name='max_students',
+            field=models.PositiveIntegerField(blank=True, help_text='Cupo máximo de estudiantes (vacío = sin límite)', null=True),
+        ),
+        migrations.AlterField(
+            model_name='courseauditlog',
+            name='action',
+            field=models.CharField(choices=[('create', 'Creación'), ('update', 'Actualización'), ('activate', 'Activación'), ('deactivate', 'Desactivación'), ('transfer', 'Transferencia'), ('delete', 'Eliminación'), ('bulk_activate', 'Activación Masiva'), ('bulk_deactivate', 'Desactivación Masiva'), ('bulk_delete', 'Eliminación Masiva'), ('roster_import', 'Importación de Matrícula')], max_length=20),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 4.2.7 on 2026-10-19 14:32
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0008_course_capacity_roster_import'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='course',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['-created_at', '-id'], name='course_active_recent_idx'),
+        ),
+    ]
@@ -16,6 +16,7 @@ class CourseAuditLog(models.Model):
         ('bulk_activate', 'Activación Masiva'),
         ('bulk_deactivate', 'Desactivación Masiva'),
         ('bulk_delete', 'Eliminación Masiva'),
+        ('roster_import', 'Importación de Matrícula'),
     ]
 
     course = models.ForeignKey('Course', on_delete=models.CASCADE, related_name='audit_logs')
@@ -72,6 +73,31 @@ class CourseAuditLog(models.Model):
         Returns:
             CourseAuditLog: Instancia del registro de auditoría creado
         """
+        entry = cls.build_entry(
+            course=course,
+            user=user,
+            action=action,
+            old_values=old_values,
+            new_values=new_values,
+            ip_address=ip_address,
+            user_agent=user_agent,
+            session_key=session_key,
+            operation_details=operation_details,
+            affected_objects=affected_objects,
+            previous_state=previous_state,
+            new_state=new_state,
+            additional_data=additional_data
+        )
+        entry.save()
+        return entry
+
+    @classmethod
+    def build_entry(cls, course, user, action, old_values=None, new_values=None, ip_address=None, user_agent=None, session_key=None, operation_details=None, affected_objects=None, previous_state=None, new_state=None, additional_data=None):
+        """
+        Construye el registro sin guardarlo, para insertar muchos a la vez con
+        `bulk_create` (operaciones masivas). Acepta los mismos argumentos que
+        `log_action`; `course` puede ser una instancia o un ID.
+        """
         # Parsear user agent si está disponible
         user_agent_parsed = None
         if user_agent:
@@ -86,8 +112,9 @@ class CourseAuditLog(models.Model):
             except Exception:
                 user_agent_parsed = {'error': 'Could not parse user agent'}
 
-        return cls.objects.create(
-            course=course,
+        course_field = 'course' if isinstance(course, models.Model) or course is None else 'course_id'
+        return cls(
+            **{course_field: course},
             user=user,
             action=action,
             old_values=old_values,
@@ -121,6 +148,7 @@ class Course(models.Model):
         is_active (bool): Estado activo/inactivo del curso
         duration_hours (int): Duración estimada en horas
         modality (str): Modalidad del curso (presencial, virtual, híbrido)
+        max_students (int): Cupo máximo de estudiantes (vacío = sin límite)
     """
     title = models.CharField(max_length=200)
     description = models.TextField()
@@ -135,13 +163,22 @@ class Course(models.Model):
         ('virtual', 'Virtual'),
         ('hibrido', 'Híbrido')
     ], default='virtual')
+    max_students = models.PositiveIntegerField(null=True, blank=True, help_text='Cupo máximo de estudiantes (vacío = sin límite)')
 
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            # Listado público: solo cursos activos, más recientes primero
+            models.Index(
+                fields=['-created_at', '-id'], condition=models.Q(is_active=True), name='course_active_recent_idx'
+            ),
+        ]
 
     def __str__(self):
         return self.title
 
     @property
     def enrolled_students_count(self):
-        return self.students.count()
+        # Los querysets optimizados traen el conteo anotado como `student_count`
+        count = self.__dict__.get('student_count')
+        return self.students.count() if count is None else count
@@ -14,20 +14,45 @@ class CourseSerializer(serializers.ModelSerializer):
         fields = [
             'id', 'title', 'description', 'instructor', 'instructor_name',
             'students', 'created_at', 'updated_at', 'is_active',
-            'duration_hours', 'modality', 'enrolled_students_count', 'is_enrolled'
+            'duration_hours', 'modality', 'max_students', 'enrolled_students_count', 'is_enrolled'
         ]
         read_only_fields = ['id', 'created_at', 'updated_at', 'enrolled_students_count', 'instructor']
 
     def get_is_enrolled(self, obj):
         request = self.context.get('request')
         if request and request.user.is_authenticated:
+            # Anotado con Exists en los querysets optimizados
+            if hasattr(obj, 'user_is_enrolled'):
+                return obj.user_is_enrolled
             return obj.students.filter(id=request.user.id).exists()
         return False
 
+class CourseDetailSerializer(CourseSerializer):
+    """
+    Parte pública y compartida del detalle de un curso. No depende del
+    usuario (sin `is_enrolled`) y la lista de estudiantes solo se incluye
+    con `expand=students`.
+    """
+    EXPANDABLE_FIELDS = ('students',)
+
+    is_enrolled = None
+
+    class Meta(CourseSerializer.Meta):
+        fields = [field for field in CourseSerializer.Meta.fields if field != 'is_enrolled']
+
+    def __init__(self, *args, expand=(), **kwargs):
+        super().__init__(*args, **kwargs)
+        for field in self.EXPANDABLE_FIELDS:
+            if field not in expand:
+                self.fields.pop(field, None)
+
 class CourseAdminSerializer(serializers.ModelSerializer):
     """
     Serializador para operaciones administrativas de cursos.
     Incluye todos los campos y permite modificaciones administrativas.
+
+    En listados se usa con `include_students=False`: se omiten `students` y
+    `students_details`, que solo se cargan en las vistas de un curso.
     """
     instructor_name = serializers.CharField(source='instructor.get_full_name', read_only=True)
     enrolled_students_count = serializers.ReadOnlyField()
@@ -38,10 +63,16 @@ class CourseAdminSerializer(serializers.ModelSerializer):
         fields = [
             'id', 'title', 'description', 'instructor', 'instructor_name',
             'students', 'students_details', 'created_at', 'updated_at', 'is_active',
-            'duration_hours', 'modality', 'enrolled_students_count'
+            'duration_hours', 'modality', 'max_students', 'enrolled_students_count'
         ]
         read_only_fields = ['id', 'created_at', 'updated_at', 'enrolled_students_count']
 
+    def __init__(self, *args, include_students=True, **kwargs):
+        super().__init__(*args, **kwargs)
+        if not include_students:
+            self.fields.pop('students')
+            self.fields.pop('students_details')
+
     def get_students_details(self, obj):
         """Retorna detalles básicos de los estudiantes inscritos"""
         students = obj.students.all()
@@ -71,10 +102,11 @@ class BulkOperationSerializer(serializers.Serializer):
     )
 
     def validate_course_ids(self, value):
-        """Validar que todos los IDs correspondan a cursos existentes"""
-        if not Course.objects.filter(id__in=value).count() == len(value):
-            raise serializers.ValidationError("Uno o más IDs de cursos no son válidos")
-        return value
+        """
+        Elimina IDs repetidos conservando el orden. Los IDs inexistentes no
+        invalidan la petición: se informan como `not_found` en el resultado.
+        """
+        return list(dict.fromkeys(value))
 
 class TransferCourseSerializer(serializers.Serializer):
     """
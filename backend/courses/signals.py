@@ -0,0 +1,55 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.db.models.signals import post_save, post_delete, m2m_changed
+from django.dispatch import receiver
+
+from ifap_backend.cache_service import invalidate_course_cache, invalidate_now_and_on_commit
+from .models import Course
+
+
+# Activo durante las operaciones masivas, que invalidan una sola vez al final
+_invalidation_suppressed = ContextVar('course_invalidation_suppressed', default=False)
+
+
+@contextmanager
+def suppress_course_invalidation():
+    """Desactiva la invalidación por curso de las señales dentro del bloque"""
+    token = _invalidation_suppressed.set(True)
+    try:
+        yield
+    finally:
+        _invalidation_suppressed.reset(token)
+
+
+def _invalidate_courses(course_ids):
+    for course_id in course_ids:
+        invalidate_course_cache(course_id)
+
+
+def schedule_course_invalidation(*course_ids):
+    invalidate_now_and_on_commit(_invalidate_courses, course_ids)
+
+
+@receiver(post_save, sender=Course)
+@receiver(post_delete, sender=Course)
+def invalidate_on_course_write(sender, instance, **kwargs):
+    if _invalidation_suppressed.get():
+        return
+    schedule_course_invalidation(instance.pk)
+
+
+@receiver(m2m_changed, sender=Course.students.through)
+def invalidate_on_enrollment_change(sender, instance, action, reverse, pk_set, **kwargs):
+    if reverse and action == 'pre_clear':
+        # user.courses_enrolled.clear() no informa qué cursos cambian
+        instance._cleared_course_ids = list(instance.courses_enrolled.values_list('id', flat=True))
+        return
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    if not reverse:
+        schedule_course_invalidation(instance.pk)
+    elif action == 'post_clear':
+        schedule_course_invalidation(*instance.__dict__.pop('_cleared_course_ids', []))
+    elif pk_set:
+        schedule_course_invalidation(*pk_set)
@@ -9,6 +9,18 @@ from rest_framework_simplejwt.tokens import RefreshToken
 from courses.models import Course
 from courses.serializers import CourseSerializer
 from datetime import date, timedelta
+from django.core.cache import caches
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from unittest.mock import patch
+from io import StringIO
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db.models import F
+from forum.models import ForumReply
+from lessons.models import LessonCompletion
+from quizzes.models import QuizAttempt, QuizStats, UserAnswer
 
 User = get_user_model()
 
@@ -283,4 +295,574 @@ class CourseAPITest(APITestCase):
         
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertIn('student_count', response.data)
-        self.assertIn('completion_rate', response.data)
\ No newline at end of file
+        self.assertIn('completion_rate', response.data)
+
+
+class CourseAnalyticsTest(APITestCase):
+    """Tests para las métricas administrativas de cursos"""
+
+    def setUp(self):
+        """Dos instructores, tres cursos y estudiantes compartidos"""
+        caches['api'].clear()
+        self.admin = User.objects.create_user(
+            username='analytics_admin',
+            email='analytics_admin@ifap.edu.pe',
+            password='testpass123'
+        )
+        self.admin.set_role('admin')
+        self.admin.save()
+
+        self.instructor_a = User.objects.create_user(
+            username='instructor_a', email='a@ifap.edu.pe', first_name='Ana', last_name='Ruiz'
+        )
+        self.instructor_a.set_role('instructor')
+        self.instructor_a.save()
+        self.instructor_b = User.objects.create_user(
+            username='instructor_b', email='b@ifap.edu.pe', first_name='Beto', last_name='Paz'
+        )
+        self.instructor_b.set_role('instructor')
+        self.instructor_b.save()
+
+        self.students = [
+            User.objects.create_user(username=f'analytics_student{i}', email=f's{i}@ifap.edu.pe')
+            for i in range(3)
+        ]
+
+        course_1 = Course.objects.create(
+            title='Curso 1', description='d', instructor=self.instructor_a, modality='virtual'
+        )
+        course_2 = Course.objects.create(
+            title='Curso 2', description='d', instructor=self.instructor_a,
+            modality='presencial', is_active=False
+        )
+        course_3 = Course.objects.create(
+            title='Curso 3', description='d', instructor=self.instructor_b, modality='virtual'
+        )
+        course_1.students.add(*self.students)
+        course_2.students.add(self.students[0])
+        course_3.students.add(self.students[0])
+
+        self.client.force_authenticate(user=self.admin)
+
+    def test_admin_metrics(self):
+        """Totales, modalidades y estudiantes únicos"""
+        response = self.client.get('/api/courses/admin/metrics/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['total_courses'], 3)
+        self.assertEqual(response.data['active_courses'], 2)
+        self.assertEqual(response.data['inactive_courses'], 1)
+        self.assertEqual(response.data['total_students'], 3)
+        self.assertEqual(response.data['courses_by_modality']['virtual'], 2)
+        self.assertEqual(response.data['courses_by_modality']['hibrido'], 0)
+
+    def test_admin_metrics_modality_filter(self):
+        """El filtro de modalidad restringe los cursos contados"""
+        response = self.client.get('/api/courses/admin/metrics/', {'modality': 'presencial'})
+        self.assertEqual(response.data['total_courses'], 1)
+        self.assertEqual(response.data['total_students'], 1)
+
+    def test_invalid_filters(self):
+        """Filtros inválidos devuelven 400"""
+        response = self.client.get('/api/courses/admin/metrics/', {'date_from': 'ayer'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        response = self.client.get('/api/courses/admin/instructor-stats/', {'modality': 'otra'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_instructor_stats(self):
+        """Estadísticas por instructor con dos consultas agrupadas y luego cache"""
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get('/api/courses/admin/instructor-stats/')
+        grouped = [q for q in context.captured_queries if 'GROUP BY' in q['sql'].upper()]
+        self.assertLessEqual(len(grouped), 2)
+
+        first, second = response.data
+        self.assertEqual(first['instructor_id'], self.instructor_a.id)
+        self.assertEqual(first['instructor_name'], 'Ana Ruiz')
+        self.assertEqual(first['courses_count'], 2)
+        self.assertEqual(first['active_courses'], 1)
+        self.assertEqual(first['total_students'], 3)
+        self.assertEqual(second['total_students'], 1)
+
+        with CaptureQueriesContext(connection) as context:
+            self.client.get('/api/courses/admin/instructor-stats/')
+        grouped = [q for q in context.captured_queries if 'GROUP BY' in q['sql'].upper()]
+        self.assertEqual(len(grouped), 0)
+
+
+class GradebookTest(APITestCase):
+    """Tests para el libro de calificaciones por curso"""
+
+    def setUp(self):
+        from quizzes.models import Quiz, QuizAttempt
+        from tasks.models import Task, TaskAssignment, TaskSubmission
+
+        self.instructor = User.objects.create_user(
+            username='gradebook_instructor', email='gi@ifap.edu.pe'
+        )
+        self.instructor.set_role('instructor')
+        self.instructor.save()
+
+        self.course = Course.objects.create(title='Curso notas', description='d', instructor=self.instructor)
+        self.alba = User.objects.create_user(
+            username='alba', email='alba@ifap.edu.pe', first_name='Ana', last_name='Alba'
+        )
+        self.bravo = User.objects.create_user(
+            username='bravo', email='bravo@ifap.edu.pe', first_name='Beto', last_name='Bravo'
+        )
+        self.course.students.add(self.alba, self.bravo)
+
+        self.quiz = Quiz.objects.create(title='Quiz 1', course=self.course, created_by=self.instructor)
+        now = timezone.now()
+        for number, percentage, minutes_ago in ((1, 90, 30), (2, 40, 10)):
+            QuizAttempt.objects.create(
+                user=self.alba, quiz=self.quiz, attempt_number=number, percentage=percentage,
+                completed_at=now - timedelta(minutes=minutes_ago)
+            )
+
+        self.task = Task.objects.create(
+            title='Tarea 1', description='d', course=self.course, instructor=self.instructor,
+            status='published', max_score=20, late_penalty_percent=10,
+            due_date=now - timedelta(days=1)
+        )
+        late = TaskAssignment.objects.create(task=self.task, student=self.alba)
+        on_time = TaskAssignment.objects.create(
+            task=self.task, student=self.bravo, due_date_override=now + timedelta(days=1)
+        )
+        TaskSubmission.objects.create(assignment=late, score=10)
+        TaskSubmission.objects.create(assignment=on_time, score=20)
+
+        self.client.force_authenticate(user=self.instructor)
+
+    def test_build_gradebook_in_bulk_queries(self):
+        """La matriz completa sale de cinco consultas"""
+        from courses.gradebook import build_gradebook
+
+        with self.assertNumQueries(5):
+            gradebook = build_gradebook(self.course)
+            data = gradebook.to_dict()
+
+        alba, bravo = data['students']
+        self.assertEqual(alba['grades'], {f'quiz:{self.quiz.id}': 90, f'task:{self.task.id}': 45})
+        self.assertEqual(alba['average'], 67.5)
+        self.assertEqual(bravo['grades'], {f'quiz:{self.quiz.id}': None, f'task:{self.task.id}': 100})
+        self.assertEqual(bravo['average'], 100)
+
+    def test_latest_attempt_policy(self):
+        response = self.client.get(f'/api/courses/{self.course.id}/gradebook/', {'quiz_policy': 'latest'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['students'][0]['grades'][f'quiz:{self.quiz.id}'], 40)
+
+        response = self.client.get(f'/api/courses/{self.course.id}/gradebook/', {'quiz_policy': 'peor'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_csv_export_is_streamed(self):
+        response = self.client.get(f'/api/courses/{self.course.id}/gradebook/', {'export': 'csv'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.streaming)
+        lines = b''.join(response.streaming_content).decode().splitlines()
+        self.assertEqual(lines[0], 'student_id,username,full_name,email,Quiz 1,Tarea 1,average')
+        self.assertEqual(lines[1], f'{self.alba.id},alba,Ana Alba,alba@ifap.edu.pe,90.0,45.0,67.5')
+        self.assertEqual(lines[2], f'{self.bravo.id},bravo,Beto Bravo,bravo@ifap.edu.pe,,100.0,100.0')
+
+    def test_xlsx_requires_openpyxl(self):
+        with patch('courses.gradebook.openpyxl', None):
+            response = self.client.get(f'/api/courses/{self.course.id}/gradebook/', {'export': 'xlsx'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_other_instructor_forbidden(self):
+        other = User.objects.create_user(username='other_instructor', email='oi@ifap.edu.pe')
+        other.set_role('instructor')
+        other.save()
+        self.client.force_authenticate(user=other)
+        response = self.client.get(f'/api/courses/{self.course.id}/gradebook/')
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+
+class CourseDetailCacheTest(APITestCase):
+    """Tests para el detalle de curso con parte pública cacheada y ETag"""
+
+    def setUp(self):
+        caches['api'].clear()
+        self.instructor = User.objects.create_user(username='detail_instructor', email='di@ifap.edu.pe')
+        self.instructor.set_role('instructor')
+        self.instructor.save()
+        self.student = User.objects.create_user(username='detail_student', email='ds@ifap.edu.pe')
+        self.course = Course.objects.create(title='Curso detalle', description='d', instructor=self.instructor)
+        self.url = f'/api/courses/{self.course.id}/'
+
+    def test_students_are_opt_in(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotIn('students', response.data)
+        self.assertFalse(response.data['is_enrolled'])
+
+        self.course.students.add(self.student)
+        response = self.client.get(self.url, {'expand': 'students'})
+        self.assertEqual(response.data['students'], [self.student.id])
+
+    def test_revalidation_returns_304_without_queries(self):
+        self.client.force_authenticate(user=self.student)
+        response = self.client.get(self.url)
+        etag = response['ETag']
+
+        with self.assertNumQueries(0):
+            response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(response['ETag'], etag)
+
+    def test_public_part_shared_and_overlay_per_user(self):
+        self.course.students.add(self.student)
+        other = User.objects.create_user(username='detail_other', email='do@ifap.edu.pe')
+
+        self.client.force_authenticate(user=self.student)
+        first = self.client.get(self.url)
+        self.assertTrue(first.data['is_enrolled'])
+
+        self.client.force_authenticate(user=other)
+        # La parte pública sale de cache: solo se consulta la inscripción
+        with self.assertNumQueries(1):
+            second = self.client.get(self.url)
+        self.assertFalse(second.data['is_enrolled'])
+        self.assertNotEqual(first['ETag'], second['ETag'])
+
+    def test_writes_change_etag_and_content(self):
+        first = self.client.get(self.url)
+
+        self.course.title = 'Curso renombrado'
+        self.course.save()
+
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['title'], 'Curso renombrado')
+
+        self.student.courses_enrolled.add(self.course)
+        response = self.client.get(self.url)
+        self.assertEqual(response.data['enrolled_students_count'], 1)
+
+
+class CourseListCacheTest(APITestCase):
+    """Tests para el cache del listado de cursos"""
+
+    def setUp(self):
+        caches['api'].clear()
+        self.instructor = User.objects.create_user(username='list_instructor', email='li@ifap.edu.pe')
+        self.instructor.set_role('instructor')
+        self.instructor.save()
+        self.student = User.objects.create_user(username='list_student', email='ls@ifap.edu.pe')
+        self.course = Course.objects.create(title='Curso A', description='d', instructor=self.instructor)
+        self.course.students.add(self.student)
+
+    def test_cached_page_with_enrollment_overlay(self):
+        self.client.force_authenticate(user=self.student)
+        response = self.client.get('/api/courses/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.data['results'][0]['is_enrolled'])
+
+        other = User.objects.create_user(username='list_other', email='lo@ifap.edu.pe')
+        self.client.force_authenticate(user=other)
+        # Misma audiencia: la página sale de cache y solo se consulta la inscripción
+        with self.assertNumQueries(1):
+            response = self.client.get('/api/courses/')
+        self.assertFalse(response.data['results'][0]['is_enrolled'])
+
+        self.client.force_authenticate(user=None)
+        self.client.get('/api/courses/')
+        with self.assertNumQueries(0):
+            response = self.client.get('/api/courses/')
+        self.assertFalse(response.data['results'][0]['is_enrolled'])
+
+    def test_writes_are_visible_immediately(self):
+        self.client.get('/api/courses/')
+        Course.objects.create(title='Curso B', description='d', instructor=self.instructor)
+        response = self.client.get('/api/courses/')
+        self.assertEqual(response.data['count'], 2)
+
+        self.course.is_active = False
+        self.course.save()
+        response = self.client.get('/api/courses/')
+        self.assertEqual([course['title'] for course in response.data['results']], ['Curso B'])
+
+    def test_params_are_normalized(self):
+        self.client.get('/api/courses/', {'page_size': 5, 'search': ''})
+        with self.assertNumQueries(0):
+            response = self.client.get('/api/courses/?page_size=5')
+        self.assertEqual(response.data['page_size'], 20)
+
+    def test_list_does_not_load_students(self):
+        for i in range(3):
+            self.course.students.add(
+                User.objects.create_user(username=f'list_extra{i}', email=f'le{i}@ifap.edu.pe')
+            )
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get('/api/courses/')
+        course = response.data['results'][0]
+        self.assertEqual(course['enrolled_students_count'], 4)
+        self.assertNotIn('students', course)
+        self.assertFalse(any('INNER JOIN "courses_course_students"' in q['sql'] for q in context.captured_queries))
+
+        response = self.client.get('/api/courses/', {'expand': 'students'})
+        self.assertEqual(len(response.data['results'][0]['students']), 4)
+
+    def test_admin_list_omits_student_details(self):
+        admin = User.objects.create_user(username='list_admin', email='la@ifap.edu.pe')
+        admin.set_role('admin')
+        admin.save()
+        self.client.force_authenticate(user=admin)
+
+        with self.assertNumQueries(2):
+            response = self.client.get('/api/courses/admin_all/')
+        course = response.data['results'][0]
+        self.assertNotIn('students_details', course)
+        self.assertEqual(course['enrolled_students_count'], 1)
+
+
+class BulkCourseOperationsTest(APITestCase):
+    """Tests para las operaciones masivas de cursos"""
+
+    def setUp(self):
+        caches['api'].clear()
+        self.admin = User.objects.create_user(username='bulk_admin', email='ba@ifap.edu.pe')
+        self.admin.set_role('admin')
+        self.admin.save()
+        self.instructor = User.objects.create_user(username='bulk_instructor', email='bi@ifap.edu.pe')
+        self.instructor.set_role('instructor')
+        self.instructor.save()
+        self.courses = [
+            Course.objects.create(title=f'Curso {i}', description='d', instructor=self.instructor)
+            for i in range(3)
+        ]
+        self.client.force_authenticate(user=self.admin)
+
+    def test_bulk_deactivate_reports_per_id(self):
+        from courses.models import CourseAuditLog
+        from users.dashboard_service import get_counters
+
+        self.courses[2].is_active = False
+        self.courses[2].save()
+        active_before = get_counters()['courses.active']
+        ids = [course.id for course in self.courses] + [99999]
+
+        response = self.client.post('/api/courses/bulk_deactivate/', {'course_ids': ids}, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['deactivated_count'], 2)
+        self.assertEqual(
+            [row['status'] for row in response.data['results']],
+            ['deactivated', 'deactivated', 'already_inactive', 'not_found']
+        )
+        self.assertFalse(Course.objects.filter(is_active=True).exists())
+        self.assertEqual(CourseAuditLog.objects.filter(action='bulk_deactivate').count(), 2)
+        self.assertEqual(get_counters()['courses.active'], active_before - 2)
+
+    def test_bulk_operation_uses_single_update(self):
+        Course.objects.update(is_active=False)
+        ids = [course.id for course in self.courses]
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.post('/api/courses/bulk_activate/', {'course_ids': ids}, format='json')
+        self.assertEqual(response.data['activated_count'], 3)
+        updates = [q for q in context.captured_queries if q['sql'].startswith('UPDATE "courses_course"')]
+        inserts = [q for q in context.captured_queries if q['sql'].startswith('INSERT INTO "courses_courseauditlog"')]
+        self.assertEqual(len(updates), 1)
+        self.assertEqual(len(inserts), 1)
+
+    def test_bulk_operation_refreshes_course_list(self):
+        self.client.get('/api/courses/')
+        self.client.post(
+            '/api/courses/bulk_deactivate/', {'course_ids': [self.courses[0].id]}, format='json'
+        )
+        response = self.client.get('/api/courses/')
+        self.assertEqual(response.data['count'], 2)
+
+    def test_bulk_delete_without_matches_returns_400(self):
+        response = self.client.post('/api/courses/bulk_delete/', {'course_ids': [99999]}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data['results'], [{'course_id': 99999, 'status': 'not_found'}])
+
+        response = self.client.post(
+            '/api/courses/bulk_delete/', {'course_ids': [self.courses[0].id]}, format='json'
+        )
+        self.assertEqual(response.data['deleted_count'], 1)
+        self.assertFalse(Course.objects.filter(id=self.courses[0].id).exists())
+
+    def test_bulk_delete_invalidates_once(self):
+        ids = [course.id for course in self.courses]
+        with patch('courses.signals.invalidate_course_cache') as per_course, \
+                patch('courses.bulk_operations.invalidate_courses_cache') as batched, \
+                self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post('/api/courses/bulk_delete/', {'course_ids': ids}, format='json')
+
+        self.assertEqual(response.data['deleted_count'], 3)
+        per_course.assert_not_called()
+        # Una vez ya y otra tras el commit, con todos los cursos
+        self.assertEqual(batched.call_count, 2)
+        self.assertEqual(sorted(batched.call_args.args[0]), sorted(ids))
+
+
+class EnrollmentServiceTest(APITestCase):
+    """Tests para inscripciones individuales, cupo e importación de matrícula"""
+
+    def setUp(self):
+        caches['api'].clear()
+        self.instructor = User.objects.create_user(username='enr_instructor', email='ei@ifap.edu.pe')
+        self.instructor.set_role('instructor')
+        self.instructor.save()
+        self.course = Course.objects.create(title='Curso', description='d', instructor=self.instructor)
+        self.students = [
+            User.objects.create_user(username=f'enr_student{i}', email=f'Enr{i}@ifap.edu.pe')
+            for i in range(4)
+        ]
+
+    def test_enroll_is_single_insert_and_idempotent(self):
+        from courses.enrollment import enroll
+
+        with CaptureQueriesContext(connection) as context:
+            self.assertTrue(enroll(self.course, self.students[0]))
+        statements = [q['sql'] for q in context.captured_queries if not q['sql'].startswith(('SAVEPOINT', 'RELEASE'))]
+        self.assertEqual(len(statements), 1)
+        self.assertTrue(statements[0].startswith('INSERT INTO "courses_course_students"'))
+
+        self.assertFalse(enroll(self.course, self.students[0]))
+        self.assertEqual(self.course.students.count(), 1)
+
+    def test_enroll_endpoint_does_not_load_roster(self):
+        Enrollment = Course.students.through
+        Enrollment.objects.bulk_create([Enrollment(course=self.course, user=student) for student in self.students[1:]])
+        self.client.force_authenticate(user=self.students[0])
+
+        for url in (f'/api/courses/{self.course.id}/enroll/', f'/api/courses/{self.course.id}/unenroll/'):
+            with CaptureQueriesContext(connection) as context:
+                self.assertEqual(self.client.post(url).status_code, status.HTTP_200_OK)
+            user_reads = [q['sql'] for q in context.captured_queries if 'FROM "users_user"' in q['sql']]
+            self.assertEqual(user_reads, [], url)
+
+    def test_enroll_endpoint_respects_capacity(self):
+        self.course.max_students = 1
+        self.course.save()
+        url = f'/api/courses/{self.course.id}/enroll/'
+
+        self.client.force_authenticate(user=self.students[0])
+        self.assertEqual(self.client.post(url).status_code, status.HTTP_200_OK)
+        self.assertEqual(self.client.post(url).status_code, status.HTTP_400_BAD_REQUEST)
+
+        self.client.force_authenticate(user=self.students[1])
+        self.assertEqual(self.client.post(url).status_code, status.HTTP_409_CONFLICT)
+        self.assertEqual(self.course.students.count(), 1)
+
+    def test_enroll_refreshes_cached_students(self):
+        self.client.force_authenticate(user=self.instructor)
+        url = f'/api/courses/{self.course.id}/students/'
+        self.assertEqual(self.client.get(url).data, [])
+
+        self.client.force_authenticate(user=self.students[0])
+        self.client.post(f'/api/courses/{self.course.id}/enroll/')
+
+        self.client.force_authenticate(user=self.instructor)
+        self.assertEqual([row['id'] for row in self.client.get(url).data], [self.students[0].id])
+
+    def test_roster_import_json(self):
+        from courses.models import CourseAuditLog
+
+        self.course.students.add(self.students[0])
+        self.client.force_authenticate(user=self.instructor)
+        response = self.client.post(
+            f'/api/courses/{self.course.id}/roster/import/',
+            {'students': [self.students[0].id, 'enr_student1', 'enr2@IFAP.edu.pe', {'id': self.students[3].id}, 'ghost']},
+            format='json'
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['enrolled'], 3)
+        self.assertEqual(response.data['already_enrolled'], 1)
+        self.assertEqual(response.data['not_found'], ['ghost'])
+        self.assertEqual(self.course.students.count(), 4)
+        self.assertTrue(CourseAuditLog.objects.filter(course=self.course, action='roster_import').exists())
+
+    def test_roster_import_csv_uses_one_insert(self):
+        from django.core.files.uploadedfile import SimpleUploadedFile
+
+        content = 'username,email\n' + '\n'.join(f'{s.username},' for s in self.students)
+        upload = SimpleUploadedFile('roster.csv', content.encode(), content_type='text/csv')
+        self.client.force_authenticate(user=self.instructor)
+
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.post(
+                f'/api/courses/{self.course.id}/roster/import/', {'file': upload}, format='multipart'
+            )
+
+        self.assertEqual(response.data['enrolled'], 4)
+        inserts = [
+            q for q in context.captured_queries
+            if q['sql'].startswith('INSERT') and 'INTO "courses_course_students"' in q['sql']
+        ]
+        self.assertEqual(len(inserts), 1)
+
+    def test_roster_import_over_capacity_enrolls_nobody(self):
+        self.course.max_students = 2
+        self.course.save()
+        self.client.force_authenticate(user=self.instructor)
+        response = self.client.post(
+            f'/api/courses/{self.course.id}/roster/import/',
+            {'students': [student.id for student in self.students]},
+            format='json'
+        )
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+        self.assertEqual(self.course.students.count(), 0)
+
+    def test_roster_import_requires_ownership(self):
+        other = User.objects.create_user(username='enr_other', email='eo@ifap.edu.pe')
+        other.set_role('instructor')
+        other.save()
+        self.client.force_authenticate(user=other)
+        response = self.client.post(
+            f'/api/courses/{self.course.id}/roster/import/', {'students': [1]}, format='json'
+        )
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+
+class SeedScaleCommandTest(TestCase):
+    VOLUMES = [
+        '--users', '30', '--instructors', '3', '--courses', '5', '--lesson-completions', '60',
+        '--questions-per-quiz', '3', '--quiz-answers', '45', '--forum-topics', '6', '--forum-replies', '40',
+        '--chunk-size', '7',
+    ]
+
+    def seed(self, *args):
+        call_command('seed_scale', *self.VOLUMES, *args, stdout=StringIO())
+
+    def test_generates_requested_volumes(self):
+        self.seed()
+
+        self.assertEqual(User.objects.filter(username__startswith='seed_student').count(), 30)
+        self.assertEqual(Course.objects.count(), 5)
+        self.assertLessEqual(LessonCompletion.objects.count(), 60)
+        self.assertEqual(UserAnswer.objects.count(), 45)
+        self.assertEqual(UserAnswer.selected_options.through.objects.count(), 45)
+        self.assertEqual(QuizAttempt.objects.count(), 15)
+        self.assertEqual(ForumReply.objects.count(), 40)
+        # Los intentos solo son de cursos en los que el estudiante está inscrito
+        self.assertFalse(QuizAttempt.objects.exclude(quiz__course__students=F('user')).exists())
+        # bulk_create no dispara señales: los rollups se reconstruyen al final
+        self.assertEqual(sum(QuizStats.objects.values_list('completed_count', flat=True)), 15)
+
+    def test_spreads_timestamps(self):
+        self.seed()
+
+        self.assertGreater(QuizAttempt.objects.values('completed_at').distinct().count(), 1)
+        self.assertFalse(QuizAttempt.objects.filter(started_at__gte=F('completed_at')).exists())
+        self.assertFalse(UserAnswer.objects.exclude(answered_at=F('attempt__completed_at')).exists())
+        self.assertGreater(LessonCompletion.objects.values('completed_at').distinct().count(), 1)
+        self.assertGreater(ForumReply.objects.values('created_at').distinct().count(), 1)
+        self.assertFalse(ForumReply.objects.filter(created_at__lt=F('topic__created_at')).exists())
+
+    def test_same_seed_generates_same_data(self):
+        self.seed('--prefix', 'one')
+        first = list(Course.students.through.objects.order_by('id').values_list('course__title', 'user__last_name'))
+        Course.objects.all().delete()
+        self.seed('--prefix', 'two')
+        second = list(Course.students.through.objects.order_by('id').values_list('course__title', 'user__last_name'))
+        self.assertEqual(first, second)
+
+    def test_rejects_existing_prefix(self):
+        self.seed('--forum-replies', '1')
+        with self.assertRaises(CommandError):
+            self.seed()
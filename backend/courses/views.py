@@ -3,24 +3,31 @@ from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated, IsAuthenticatedOrReadOnly
 from django.shortcuts import get_object_or_404
-from django.utils.decorators import method_decorator
-from django.views.decorators.cache import cache_page
-from django.db.models import Avg, Count, Q
+from django.http import HttpResponse, StreamingHttpResponse
+from django.utils.cache import patch_cache_control, patch_vary_headers
+from django.utils.http import parse_etags
+from django.db.models import Sum
 from django.contrib.auth import get_user_model
 from django.db import transaction
 from django.utils import timezone
 from lessons.models import LessonCompletion
-from quizzes.models import Quiz, QuizAttempt
+from quizzes.models import Quiz, QuizAttempt, QuizStats
 from .models import Course, CourseAuditLog
 from .serializers import (
-    CourseSerializer, CourseAdminSerializer, BulkOperationSerializer,
+    CourseSerializer, CourseDetailSerializer, CourseAdminSerializer, BulkOperationSerializer,
     TransferCourseSerializer, CourseMetricsSerializer, InstructorStatsSerializer,
     CourseAuditLogSerializer
 )
 from ifap_backend.pagination import StandardResultsPagination
 from ifap_backend.query_optimizations import OptimizedQueryMixin, CourseQueryOptimizer
-from ifap_backend.cache_service import cache_service, CacheKeys
+from ifap_backend.cache_service import cache_service, CacheKeys, get_course_version, get_course_list_version
+from ifap_backend.db_routers import read_from_replica
+from .analytics import parse_filters, get_course_metrics, get_instructor_stats, AnalyticsFilterError
+from .gradebook import build_gradebook, GradebookError, EXPORT_FORMATS
+from .bulk_operations import BulkCourseOperation
+from .enrollment import enroll, unenroll, import_roster, parse_roster_csv, EnrollmentError, CourseFullError
 from users.permissions import IsAdminUser, IsInstructorOrAdmin, CanManageCourses
+import hashlib
 import logging
 
 logger = logging.getLogger('courses')
@@ -86,7 +93,7 @@ class CourseViewSet(OptimizedQueryMixin, viewsets.ModelViewSet):
         elif self.action in ['my_courses', 'taught_courses']:
             # Solo usuarios autenticados pueden ver sus cursos
             return [IsAuthenticated()]
-        elif self.action in ['students']:
+        elif self.action in ['students', 'roster_import']:
             # Solo docentes/admin pueden ver estudiantes del curso
             return [IsAuthenticated(), IsInstructorOrAdmin()]
         elif self.action in ['activate', 'deactivate', 'transfer', 'admin_delete']:
@@ -109,15 +116,19 @@ class CourseViewSet(OptimizedQueryMixin, viewsets.ModelViewSet):
         Este método implementa diferentes estrategias de optimización de base de datos
         basadas en el tipo de operación que se está realizando:
 
-        Para 'list': Utiliza CourseQueryOptimizer para obtener cursos con detalles
-        pre-cargados incluyendo instructor, estudiantes, lecciones y categorías.
+        Para 'list': Utiliza CourseQueryOptimizer para obtener cursos con el
+        instructor y el número de inscritos anotado por subconsulta; la lista
+        de estudiantes solo se precarga con `expand=students`.
 
-        Para 'retrieve': Aplica select_related y prefetch_related para evitar
-        consultas N+1 al obtener detalles completos de un curso específico.
+        Para 'retrieve': Aplica select_related del instructor y solo precarga
+        los estudiantes cuando se piden con `expand=students`.
 
         Para 'my_courses': Utiliza CourseQueryOptimizer para obtener cursos
         del usuario actual con optimizaciones específicas.
 
+        Para 'enroll' / 'unenroll': Sin relaciones; el servicio de inscripciones
+        escribe directamente en la tabla intermedia.
+
         Para otras acciones: Aplica optimizaciones básicas con select_related
         del instructor y prefetch_related de estudiantes.
 
@@ -128,13 +139,21 @@ class CourseViewSet(OptimizedQueryMixin, viewsets.ModelViewSet):
             QuerySet: QuerySet optimizado con las relaciones apropiadas pre-cargadas
         """
         if self.action == 'list':
-            return CourseQueryOptimizer.get_courses_with_details().filter(is_active=True)
+            queryset = CourseQueryOptimizer.get_courses_with_details().filter(
+                is_active=True
+            ).order_by('-created_at', '-id')
+            if 'students' in self._parse_expand(self.request):
+                queryset = queryset.prefetch_related('students')
+            return queryset
         elif self.action == 'retrieve':
-            return queryset.select_related('instructor').prefetch_related(
-                'students', 'lessons'
-            )
+            queryset = queryset.select_related('instructor')
+            if 'students' in self._parse_expand(self.request):
+                queryset = queryset.prefetch_related('students')
+            return queryset
         elif self.action == 'my_courses':
             return CourseQueryOptimizer.get_user_courses(self.request.user)
+        elif self.action in ('enroll', 'unenroll'):
+            return queryset
 
         return queryset.select_related('instructor').prefetch_related('students')
 
@@ -193,24 +212,6 @@ class CourseViewSet(OptimizedQueryMixin, viewsets.ModelViewSet):
 
         return True, None
 
-    def _validate_bulk_operation_courses(self, course_ids, required_state=None):
-        """
-        Valida cursos para operaciones masivas.
-        """
-        courses = Course.objects.filter(id__in=course_ids)
-
-        if courses.count() != len(course_ids):
-            return False, "Uno o más IDs de cursos no son válidos"
-
-        if required_state is not None:
-            courses_in_wrong_state = courses.exclude(is_active=required_state)
-            if courses_in_wrong_state.exists():
-                wrong_courses = list(courses_in_wrong_state.values_list('title', flat=True))
-                expected_state = "activos" if required_state else "inactivos"
-                return False, f"Los siguientes cursos no están {expected_state}: {', '.join(wrong_courses[:5])}"
-
-        return True, None
-
     def _log_security_event(self, event_type, details, user=None, course=None):
         """
         Registra eventos de seguridad para auditoría con información detallada.
@@ -266,92 +267,156 @@ class CourseViewSet(OptimizedQueryMixin, viewsets.ModelViewSet):
             }
         )
 
-    @method_decorator(cache_page(60 * 15))  # Cache for 15 minutes
+    LIST_CACHE_TIMEOUT = 60 * 15
+
+    def _list_audience(self, user):
+        if not user.is_authenticated:
+            return 'anonymous'
+        if user.is_superuser:
+            return 'admin'
+        if user.is_instructor:
+            return 'instructor'
+        return 'student'
+
     def list(self, request, *args, **kwargs):
+        """
+        Lista de cursos activos con cache compartido por audiencia.
+
+        La página serializada (sin datos del usuario) se cachea por
+        parámetros normalizados, audiencia y versión de los listados; cualquier
+        escritura de cursos o inscripciones cambia la versión a través de
+        `invalidate_course_cache`. `is_enrolled` se superpone después con una
+        sola consulta por página. Los IDs de estudiantes solo se incluyen con
+        `expand=students`.
+        """
         logger.info(f"User {request.user.id if request.user.is_authenticated else 'anonymous'} requested course list")
-        return super().list(request, *args, **kwargs)
+
+        params = {
+            key: ','.join(sorted(value for value in values if value))
+            for key, values in request.query_params.lists()
+            if any(values)
+        }
+        cache_key = cache_service.make_key(
+            CacheKeys.COURSE_LIST,
+            get_course_list_version(),
+            self._list_audience(request.user),
+            request.get_host(),
+            **params
+        )
+
+        data = cache_service.get(cache_key, cache_alias='api')
+        if data is None:
+            expand = self._parse_expand(request)
+            queryset = self.filter_queryset(self.get_queryset())
+            page = self.paginate_queryset(queryset)
+            if page is not None:
+                serializer = CourseDetailSerializer(page, many=True, expand=expand)
+                data = self.get_paginated_response(serializer.data).data
+            else:
+                data = CourseDetailSerializer(queryset, many=True, expand=expand).data
+            cache_service.set(cache_key, data, self.LIST_CACHE_TIMEOUT, 'api')
+
+        results = data['results'] if isinstance(data, dict) else data
+        enrolled = set()
+        if request.user.is_authenticated and results:
+            enrolled = set(Course.students.through.objects.filter(
+                user_id=request.user.id,
+                course_id__in=[course['id'] for course in results]
+            ).values_list('course_id', flat=True))
+        results = [{**course, 'is_enrolled': course['id'] in enrolled} for course in results]
+
+        if isinstance(data, dict):
+            return Response({**data, 'results': results})
+        return Response(results)
+
+    def _parse_expand(self, request):
+        requested = {value.strip() for value in request.query_params.get('expand', '').split(',') if value.strip()}
+        return tuple(sorted(requested & set(CourseDetailSerializer.EXPANDABLE_FIELDS)))
 
     def retrieve(self, request, *args, **kwargs):
         """
-        Obtiene los detalles completos de un curso específico.
-
-        Este método implementa una estrategia de cache inteligente para mejorar
-        el rendimiento al servir detalles de cursos frecuentemente consultados:
+        Obtiene los detalles de un curso específico.
 
-        1. Verifica si la respuesta está en cache usando una clave específica
-        2. Si está en cache, retorna la respuesta cacheada inmediatamente
-        3. Si no está en cache, obtiene el curso usando queryset optimizado
-        4. Serializa el curso con todas sus relaciones pre-cargadas
-        5. Almacena la respuesta en cache para futuras consultas
+        La respuesta se arma con dos partes:
 
-        Optimizaciones aplicadas:
-        - Cache de 15 minutos para reducir carga en la base de datos
-        - QuerySet optimizado con select_related y prefetch_related
-        - Logging detallado para monitoreo de rendimiento
+        1. Parte pública, compartida por todos los usuarios y cacheada por
+           (curso, versión, expand). La versión cambia con cada escritura del
+           curso o de sus inscripciones (ver courses/signals.py).
+        2. Superposición por usuario (`is_enrolled`), pequeña y cacheada con
+           la misma versión.
 
-        Args:
-            request: HttpRequest object
-            *args: Argumentos posicionales adicionales
-            **kwargs: Argumentos nombrados (incluye 'pk' del curso)
+        El ETag depende de la versión, del usuario y de `expand`, de modo que
+        una revalidación con If-None-Match se resuelve con una sola lectura
+        de cache y devuelve 304 sin tocar la base de datos.
 
-        Returns:
-            Response: JSON con detalles completos del curso incluyendo:
-            - Información básica del curso
-            - Datos del instructor
-            - Lista de estudiantes inscritos
-            - Lecciones asociadas
-            - Categorías del curso
-
-        Note:
-            La clave de cache incluye el ID del usuario para manejar
-            diferentes niveles de acceso según permisos.
+        Parámetros:
+            expand: `students` incluye los IDs de los estudiantes inscritos.
         """
         course_id = kwargs.get('pk')
-        cache_key = cache_service.make_key(CacheKeys.COURSE_DETAIL, course_id, request.user.id if request.user.is_authenticated else 'anonymous')
-
-        cached_response = cache_service.get(cache_key, cache_alias='api')
-        if cached_response:
-            logger.info(f"Course {course_id} detail served from cache")
-            return Response(cached_response)
-
-        # Usar queryset optimizado en lugar de super().retrieve()
-        queryset = self.optimize_queryset(self.get_queryset())
-        instance = get_object_or_404(queryset, pk=course_id)
-        serializer = self.get_serializer(instance, context={'request': request})
-        response = Response(serializer.data)
-
-        if response.status_code == 200:
-            cache_service.set(cache_key, response.data, 900, 'api')  # 15 minutos
+        user_id = request.user.id if request.user.is_authenticated else None
+        expand = self._parse_expand(request)
+        version = get_course_version(course_id)
+
+        etag = '"{}"'.format(hashlib.md5(
+            f"{course_id}:{version}:{user_id or 'anonymous'}:{','.join(expand)}".encode()
+        ).hexdigest())
+        if etag in parse_etags(request.META.get('HTTP_IF_NONE_MATCH', '')):
+            return self._with_validators(Response(status=status.HTTP_304_NOT_MODIFIED), etag)
+
+        public_key = cache_service.make_key(CacheKeys.COURSE_DETAIL, course_id, version, expand=','.join(expand))
+        data = cache_service.get(public_key, cache_alias='api')
+        if data is None:
+            queryset = self.optimize_queryset(self.get_queryset())
+            instance = get_object_or_404(queryset, pk=course_id)
+            data = CourseDetailSerializer(instance, context={'request': request}, expand=expand).data
+            cache_service.set(public_key, data, 900, 'api')  # 15 minutos
             logger.info(f"Course {course_id} detail cached")
 
+        response = Response({**data, 'is_enrolled': self._is_enrolled(course_id, version, user_id)})
+        return self._with_validators(response, etag)
+
+    def _is_enrolled(self, course_id, version, user_id):
+        if user_id is None:
+            return False
+        key = cache_service.make_key(CacheKeys.COURSE_DETAIL, course_id, version, 'enrolled', user_id)
+        enrolled = cache_service.get(key, cache_alias='api')
+        if enrolled is None:
+            enrolled = Course.students.through.objects.filter(course_id=course_id, user_id=user_id).exists()
+            cache_service.set(key, enrolled, 900, 'api')
+        return enrolled
+
+    def _with_validators(self, response, etag):
+        response['ETag'] = etag
+        # Depende del usuario: solo caches privadas y siempre revalidando
+        patch_cache_control(response, private=True, no_cache=True)
+        patch_vary_headers(response, ['Authorization'])
         return response
 
     @action(detail=True, methods=['post'])
     def enroll(self, request, pk=None):
         course = self.get_object()
-        user = request.user
 
-        if course.students.filter(id=user.id).exists():
+        try:
+            created = enroll(course, request.user)
+        except CourseFullError as e:
+            return Response({'message': str(e)}, status=status.HTTP_409_CONFLICT)
+
+        if not created:
             return Response(
                 {'message': 'Ya estás inscrito en este curso'},
                 status=status.HTTP_400_BAD_REQUEST
             )
-
-        course.students.add(user)
         return Response({'message': 'Inscripción exitosa'})
 
     @action(detail=True, methods=['post'])
     def unenroll(self, request, pk=None):
         course = self.get_object()
-        user = request.user
 
-        if not course.students.filter(id=user.id).exists():
+        if not unenroll(course, request.user):
             return Response(
                 {'message': 'No estás inscrito en este curso'},
                 status=status.HTTP_400_BAD_REQUEST
             )
-
-        course.students.remove(user)
         return Response({'message': 'Te has dado de baja del curso'})
 
     @action(detail=True, methods=['get'], permission_classes=[IsAuthenticated, IsInstructorOrAdmin])
@@ -364,19 +429,54 @@ class CourseViewSet(OptimizedQueryMixin, viewsets.ModelViewSet):
                 status=status.HTTP_403_FORBIDDEN
             )
 
-        students = course.students.all()
-        data = [
-            {
-                'id': student.id,
-                'username': student.username,
-                'first_name': student.first_name,
-                'last_name': student.last_name,
-                'email': student.email
-            }
-            for student in students
-        ]
+        # La versión del curso cambia con cada inscripción o baja
+        cache_key = cache_service.make_key(CacheKeys.COURSE_STUDENTS, course.id, get_course_version(course.id))
+        data = cache_service.get(cache_key, cache_alias='api')
+        if data is None:
+            data = list(course.students.order_by('id').values(
+                'id', 'username', 'first_name', 'last_name', 'email'
+            ))
+            cache_service.set(cache_key, data, 900, 'api')
         return Response(data)
 
+    @action(detail=True, methods=['post'], url_path='roster/import',
+            permission_classes=[IsAuthenticated, IsInstructorOrAdmin])
+    def roster_import(self, request, pk=None):
+        """
+        Inscribe una matrícula completa en una sola transacción. Acepta un
+        archivo CSV en `file` (columnas `id`, `username` o `email`) o una
+        lista JSON en `students` con IDs, usernames, emails u objetos.
+        """
+        course = get_object_or_404(Course, pk=pk)
+
+        if not self._validate_course_ownership(course, request.user):
+            return Response(
+                {'detail': 'No tienes permiso para inscribir estudiantes en este curso'},
+                status=status.HTTP_403_FORBIDDEN
+            )
+
+        try:
+            upload = request.FILES.get('file')
+            if upload is not None:
+                entries = parse_roster_csv(upload.read())
+            elif 'students' in request.data:
+                entries = request.data['students']
+            else:
+                raise EnrollmentError('Envía un archivo CSV en file o una lista en students')
+            report = import_roster(
+                course,
+                entries,
+                request.user,
+                ip_address=request.META.get('REMOTE_ADDR'),
+                user_agent=request.META.get('HTTP_USER_AGENT', '')
+            )
+        except CourseFullError as e:
+            return Response({'error': str(e)}, status=status.HTTP_409_CONFLICT)
+        except EnrollmentError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        return Response(report)
+
     @action(detail=False, methods=['get'], permission_classes=[IsAuthenticated])
     def my_courses(self, request):
         """
@@ -456,6 +556,7 @@ class CourseViewSet(OptimizedQueryMixin, viewsets.ModelViewSet):
         return Response(serializer.data)
 
     @action(detail=True, methods=['get'], url_path='metrics', permission_classes=[IsAuthenticated, IsInstructorOrAdmin])
+    @read_from_replica
     def course_metrics(self, request, pk=None):
         """
         Retorna métricas detalladas para un curso específico.
@@ -470,10 +571,15 @@ class CourseViewSet(OptimizedQueryMixin, viewsets.ModelViewSet):
         total_quizzes = Quiz.objects.filter(lesson__course=course).count()
         total_lessons = course.lessons.count()
         completed_lessons = LessonCompletion.objects.filter(lesson__course=course, is_completed=True).count()
-        completed_quizzes = QuizAttempt.objects.filter(quiz__lesson__course=course, is_passed=True).count()
-        average_score = QuizAttempt.objects.filter(
-            quiz__lesson__course=course
-        ).aggregate(avg=Avg('percentage'))['avg'] or 0
+        quiz_totals = QuizStats.objects.filter(quiz__lesson__course=course).aggregate(
+            passed=Sum('passed_count'),
+            completed=Sum('completed_count'),
+            percentage=Sum('percentage_sum'),
+        )
+        completed_quizzes = quiz_totals['passed'] or 0
+        average_score = (
+            (quiz_totals['percentage'] or 0) / quiz_totals['completed'] if quiz_totals['completed'] else 0
+        )
         if total_students > 0 and total_lessons > 0:
             average_progress = (completed_lessons / (total_students * total_lessons)) * 100
         else:
@@ -491,6 +597,44 @@ class CourseViewSet(OptimizedQueryMixin, viewsets.ModelViewSet):
         }
         return Response(data)
 
+    @action(detail=True, methods=['get'], permission_classes=[IsAuthenticated, IsInstructorOrAdmin])
+    def gradebook(self, request, pk=None):
+        """
+        Libro de calificaciones del curso (estudiantes × quizzes y tareas).
+        Parámetros: `quiz_policy` (best|latest) y `export` (csv|xlsx); sin
+        `export` se devuelve JSON.
+        """
+        course = get_object_or_404(Course, pk=pk)
+
+        if not (request.user.is_superuser or (request.user.is_instructor and course.instructor == request.user)):
+            return Response({"detail": "No tiene permiso para ver las calificaciones de este curso."}, status=status.HTTP_403_FORBIDDEN)
+
+        export_format = request.query_params.get('export')
+        if export_format and export_format not in EXPORT_FORMATS:
+            return Response(
+                {'error': f"export debe ser uno de: {', '.join(EXPORT_FORMATS)}"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        try:
+            gradebook = build_gradebook(course, quiz_policy=request.query_params.get('quiz_policy', 'best'))
+            if export_format == 'xlsx':
+                response = HttpResponse(
+                    gradebook.to_xlsx(),
+                    content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+                )
+                response['Content-Disposition'] = f'attachment; filename="gradebook_course_{course.id}.xlsx"'
+                return response
+        except GradebookError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        if export_format == 'csv':
+            response = StreamingHttpResponse(gradebook.stream_csv(), content_type='text/csv')
+            response['Content-Disposition'] = f'attachment; filename="gradebook_course_{course.id}.csv"'
+            return response
+
+        return Response(gradebook.to_dict())
+
     # ========== OPERACIONES ADMINISTRATIVAS ==========
 
     @action(detail=True, methods=['post'], permission_classes=[IsAuthenticated, IsAdminUser])
@@ -611,105 +755,12 @@ class CourseViewSet(OptimizedQueryMixin, viewsets.ModelViewSet):
     @action(detail=False, methods=['post'], permission_classes=[IsAuthenticated, IsAdminUser])
     def bulk_activate(self, request):
         """Activar múltiples cursos"""
-        serializer = BulkOperationSerializer(data=request.data)
-        serializer.is_valid(raise_exception=True)
-
-        course_ids = serializer.validated_data['course_ids']
-
-        # Validar cursos para operación masiva
-        is_valid, error_message = self._validate_bulk_operation_courses(course_ids, required_state=False)
-        if not is_valid:
-            self._log_security_event('INVALID_BULK_OPERATION', error_message, request.user)
-            return Response(
-                {'message': error_message},
-                status=status.HTTP_400_BAD_REQUEST
-            )
-
-        courses = Course.objects.filter(id__in=course_ids, is_active=False)
-
-        if not courses.exists():
-            return Response(
-                {'message': 'No se encontraron cursos inactivos para activar'},
-                status=status.HTTP_400_BAD_REQUEST
-            )
-
-        activated_count = 0
-        for course in courses:
-            # Validar permisos para cada curso individualmente
-            if not self._validate_course_ownership(course, request.user):
-                self._log_security_event('UNAUTHORIZED_BULK_COURSE_ACCESS', f'Sin permisos para curso {course.title}', request.user, course)
-                continue
-
-            old_values = {'is_active': course.is_active}
-            course.is_active = True
-            course.save()
-            activated_count += 1
-
-            # Registrar en el log de auditoría
-            CourseAuditLog.log_action(
-                course=course,
-                user=request.user,
-                action='bulk_activate',
-                old_values=old_values,
-                new_values={'is_active': course.is_active},
-                ip_address=getattr(request, 'META', {}).get('REMOTE_ADDR'),
-                user_agent=request.META.get('HTTP_USER_AGENT'),
-                additional_data={
-                    'reason': serializer.validated_data.get('reason', ''),
-                    'bulk_operation': True,
-                    'total_courses': len(course_ids)
-                }
-            )
-
-        return Response({
-            'message': f'{activated_count} cursos activados exitosamente',
-            'activated_count': activated_count,
-            'reason': serializer.validated_data.get('reason', '')
-        })
+        return self._run_bulk_operation(request, 'activate', check_ownership=True)
 
     @action(detail=False, methods=['post'], permission_classes=[IsAuthenticated, IsAdminUser])
     def bulk_deactivate(self, request):
         """Desactivar múltiples cursos"""
-        serializer = BulkOperationSerializer(data=request.data)
-        serializer.is_valid(raise_exception=True)
-
-        course_ids = serializer.validated_data['course_ids']
-        courses = Course.objects.filter(id__in=course_ids, is_active=True)
-
-        if not courses.exists():
-            return Response(
-                {'message': 'No se encontraron cursos activos para desactivar'},
-                status=status.HTTP_400_BAD_REQUEST
-            )
-
-        deactivated_count = 0
-        for course in courses:
-            old_values = {'is_active': course.is_active}
-            course.is_active = False
-            course.save()
-            deactivated_count += 1
-
-            # Registrar en el log de auditoría
-            CourseAuditLog.log_action(
-                course=course,
-                user=request.user,
-                action='bulk_deactivate',
-                old_values=old_values,
-                new_values={'is_active': course.is_active},
-                ip_address=getattr(request, 'META', {}).get('REMOTE_ADDR'),
-                user_agent=request.META.get('HTTP_USER_AGENT'),
-                additional_data={
-                    'reason': serializer.validated_data.get('reason', ''),
-                    'bulk_operation': True,
-                    'total_courses': len(course_ids)
-                }
-            )
-
-        return Response({
-            'message': f'{deactivated_count} cursos desactivados exitosamente',
-            'deactivated_count': deactivated_count,
-            'reason': serializer.validated_data.get('reason', '')
-        })
+        return self._run_bulk_operation(request, 'deactivate')
 
     @action(detail=True, methods=['put'], permission_classes=[IsAuthenticated, IsAdminUser])
     def transfer(self, request, pk=None):
@@ -780,25 +831,25 @@ class CourseViewSet(OptimizedQueryMixin, viewsets.ModelViewSet):
     @action(detail=False, methods=['get'], permission_classes=[IsAuthenticated, IsAdminUser])
     def admin_all(self, request):
         """Listar todos los cursos (solo admin)"""
-        courses = Course.objects.all().order_by('-created_at')
+        courses = CourseQueryOptimizer.get_courses_with_details().order_by('-created_at', '-id')
         page = self.paginate_queryset(courses)
         if page is not None:
-            serializer = CourseAdminSerializer(page, many=True, context={'request': request})
+            serializer = CourseAdminSerializer(page, many=True, context={'request': request}, include_students=False)
             return self.get_paginated_response(serializer.data)
 
-        serializer = CourseAdminSerializer(courses, many=True, context={'request': request})
+        serializer = CourseAdminSerializer(courses, many=True, context={'request': request}, include_students=False)
         return Response(serializer.data)
 
     @action(detail=False, methods=['get'], permission_classes=[IsAuthenticated, IsAdminUser])
     def admin_inactive(self, request):
         """Listar cursos inactivos"""
-        courses = Course.objects.filter(is_active=False).order_by('-created_at')
+        courses = CourseQueryOptimizer.get_courses_with_details().filter(is_active=False).order_by('-created_at', '-id')
         page = self.paginate_queryset(courses)
         if page is not None:
-            serializer = CourseAdminSerializer(page, many=True, context={'request': request})
+            serializer = CourseAdminSerializer(page, many=True, context={'request': request}, include_students=False)
             return self.get_paginated_response(serializer.data)
 
-        serializer = CourseAdminSerializer(courses, many=True, context={'request': request})
+        serializer = CourseAdminSerializer(courses, many=True, context={'request': request}, include_students=False)
         return Response(serializer.data)
 
     @action(detail=True, methods=['delete'], permission_classes=[IsAuthenticated, IsAdminUser])
@@ -830,72 +881,52 @@ class CourseViewSet(OptimizedQueryMixin, viewsets.ModelViewSet):
     @action(detail=False, methods=['post'], permission_classes=[IsAuthenticated, IsAdminUser])
     def bulk_delete(self, request):
         """Eliminar múltiples cursos"""
-        serializer = BulkOperationSerializer(data=request.data)
-        serializer.is_valid(raise_exception=True)
-
-        course_ids = serializer.validated_data['course_ids']
-        courses = Course.objects.filter(id__in=course_ids)
+        return self._run_bulk_operation(request, 'delete')
 
-        if not courses.exists():
-            return Response(
-                {'message': 'No se encontraron cursos para eliminar'},
-                status=status.HTTP_400_BAD_REQUEST
-            )
+    BULK_MESSAGES = {
+        'activate': ('activated_count', '{} cursos activados exitosamente', 'No se encontraron cursos inactivos para activar'),
+        'deactivate': ('deactivated_count', '{} cursos desactivados exitosamente', 'No se encontraron cursos activos para desactivar'),
+        'delete': ('deleted_count', '{} cursos eliminados exitosamente', 'No se encontraron cursos para eliminar'),
+    }
 
-        deleted_count = 0
-        for course in courses:
-            # Registrar en el log de auditoría antes de eliminar
-            CourseAuditLog.log_action(
-                course=course,
-                user=request.user,
-                action='bulk_delete',
-                old_values={
-                    'title': course.title,
-                    'instructor': course.instructor.id,
-                    'is_active': course.is_active,
-                    'students_count': course.students.count()
-                },
-                ip_address=getattr(request, 'META', {}).get('REMOTE_ADDR'),
-                user_agent=request.META.get('HTTP_USER_AGENT'),
-                additional_data={
-                    'reason': serializer.validated_data.get('reason', ''),
-                    'bulk_operation': True,
-                    'total_courses': len(course_ids)
-                }
-            )
+    def _run_bulk_operation(self, request, operation, check_ownership=False):
+        """
+        Ejecuta una operación masiva por lotes (un UPDATE/DELETE por lote y
+        auditoría con bulk_create) y responde con el resultado de cada ID.
+        """
+        serializer = BulkOperationSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        reason = serializer.validated_data.get('reason', '')
 
-            course.delete()
-            deleted_count += 1
+        bulk = BulkCourseOperation(
+            operation,
+            request.user,
+            serializer.validated_data['course_ids'],
+            reason=reason,
+            ip_address=getattr(request, 'META', {}).get('REMOTE_ADDR'),
+            user_agent=request.META.get('HTTP_USER_AGENT'),
+            check_ownership=check_ownership,
+        ).run()
 
+        count_key, success_message, empty_message = self.BULK_MESSAGES[operation]
+        processed = bulk.processed_count
         return Response({
-            'message': f'{deleted_count} cursos eliminados exitosamente',
-            'deleted_count': deleted_count,
-            'reason': serializer.validated_data.get('reason', '')
-        })
+            'message': success_message.format(processed) if processed else empty_message,
+            count_key: processed,
+            'reason': reason,
+            'results': bulk.report(),
+        }, status=status.HTTP_200_OK if processed else status.HTTP_400_BAD_REQUEST)
 
     @action(detail=False, methods=['get'], permission_classes=[IsAuthenticated, IsAdminUser])
+    @read_from_replica
     def admin_metrics(self, request):
-        """Métricas globales de cursos"""
-        total_courses = Course.objects.count()
-        active_courses = Course.objects.filter(is_active=True).count()
-        inactive_courses = Course.objects.filter(is_active=False).count()
-
-        # Calcular total de estudiantes únicos
-        total_students = Course.objects.aggregate(
-            total=Count('students', distinct=True)
-        )['total']
-
-        # Promedio de estudiantes por curso
-        if total_courses > 0:
-            average_students_per_course = total_students / total_courses
-        else:
-            average_students_per_course = 0
+        """Métricas globales de cursos (filtros: date_from, date_to, modality)"""
+        try:
+            filters = parse_filters(request.query_params)
+        except AnalyticsFilterError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
 
-        # Cursos por modalidad
-        courses_by_modality = {}
-        for modality, _ in Course._meta.get_field('modality').choices:
-            count = Course.objects.filter(modality=modality).count()
-            courses_by_modality[modality] = count
+        data = dict(get_course_metrics(filters))
 
         # Actividad reciente (últimos 10 logs de auditoría)
         recent_activity = CourseAuditLog.objects.select_related(
@@ -913,49 +944,21 @@ class CourseViewSet(OptimizedQueryMixin, viewsets.ModelViewSet):
                 'ip_address': log.ip_address
             })
 
-        data = {
-            'total_courses': total_courses,
-            'active_courses': active_courses,
-            'inactive_courses': inactive_courses,
-            'total_students': total_students,
-            'average_students_per_course': round(average_students_per_course, 2),
-            'courses_by_modality': courses_by_modality,
-            'recent_activity': recent_activity_data
-        }
+        data['recent_activity'] = recent_activity_data
 
         serializer = CourseMetricsSerializer(data)
         return Response(serializer.data)
 
     @action(detail=False, methods=['get'], permission_classes=[IsAuthenticated, IsAdminUser])
+    @read_from_replica
     def admin_instructor_stats(self, request):
-        """Estadísticas por instructor"""
-        from django.db.models import Count, Avg
-
-        # Obtener todos los instructores con sus estadísticas
-        instructors = User.objects.filter(is_instructor=True).annotate(
-            courses_count=Count('courses_taught'),
-            total_students=Count('courses_taught__students', distinct=True),
-            active_courses=Count('courses_taught', filter=Q(courses_taught__is_active=True))
-        ).filter(courses_count__gt=0)
-
-        stats_data = []
-        for instructor in instructors:
-            if instructor.courses_count > 0:
-                avg_students = instructor.total_students / instructor.courses_count
-            else:
-                avg_students = 0
-
-            stats_data.append({
-                'instructor_id': instructor.id,
-                'instructor_name': instructor.get_full_name(),
-                'courses_count': instructor.courses_count,
-                'total_students': instructor.total_students,
-                'active_courses': instructor.active_courses,
-                'average_students_per_course': round(avg_students, 2)
-            })
+        """Estadísticas por instructor (filtros: date_from, date_to, modality)"""
+        try:
+            filters = parse_filters(request.query_params)
+        except AnalyticsFilterError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
 
-        # Ordenar por número de cursos (descendente)
-        stats_data.sort(key=lambda x: x['courses_count'], reverse=True)
+        stats_data = get_instructor_stats(filters)
 
         serializer = InstructorStatsSerializer(stats_data, many=True)
         return Response(serializer.data)
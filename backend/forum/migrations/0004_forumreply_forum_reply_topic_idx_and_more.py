@@ -0,0 +1,29 @@
+# Generated by Django 4.2.7 on 2026-10-19 14:32
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('forum', '0003_alter_conversation_created_by_and_more'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='forumreply',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['topic', 'created_at'], name='forum_reply_topic_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='forumtopic',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['category', '-is_pinned', '-updated_at', '-id'], name='forum_topic_category_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='forumtopic',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['-is_pinned', '-updated_at', '-id'], name='forum_topic_active_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='message',
+            index=models.Index(fields=['conversation', 'created_at'], name='forum_message_conv_idx'),
+        ),
+    ]
@@ -68,6 +68,17 @@ class ForumTopic(models.Model):
         verbose_name = "Tema del Foro"
         verbose_name_plural = "Temas del Foro"
         ordering = ['-is_pinned', '-updated_at']
+        indexes = [
+            # Listado de temas activos (fijados primero), con y sin filtro de categoría
+            models.Index(
+                fields=['category', '-is_pinned', '-updated_at', '-id'],
+                condition=models.Q(is_active=True), name='forum_topic_category_idx'
+            ),
+            models.Index(
+                fields=['-is_pinned', '-updated_at', '-id'],
+                condition=models.Q(is_active=True), name='forum_topic_active_idx'
+            ),
+        ]
 
     def __str__(self):
         return self.title
@@ -116,6 +127,12 @@ class ForumReply(models.Model):
         verbose_name = "Respuesta del Foro"
         verbose_name_plural = "Respuestas del Foro"
         ordering = ['created_at']
+        indexes = [
+            # Respuestas activas de un tema en orden cronológico (y su conteo)
+            models.Index(
+                fields=['topic', 'created_at'], condition=models.Q(is_active=True), name='forum_reply_topic_idx'
+            ),
+        ]
 
     def __str__(self):
         return f"Respuesta de {self.author.username} en {self.topic.title}"
@@ -326,6 +343,9 @@ class Message(models.Model):
         verbose_name = "Mensaje"
         verbose_name_plural = "Mensajes"
         ordering = ['created_at']
+        indexes = [
+            models.Index(fields=['conversation', 'created_at'], name='forum_message_conv_idx'),
+        ]
 
     def __str__(self):
         return f"Mensaje de {self.sender.username} en {self.conversation}"
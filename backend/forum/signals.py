@@ -6,6 +6,10 @@ from .models import (
     LessonCommentLike, ForumTopic, ForumReply
 )
 from notifications.models import Notification
+from ifap_backend.pagination import register_count_invalidation
+
+
+register_count_invalidation(ForumTopic, ignore_fields=('views_count',))
 
 
 @receiver(post_save, sender=Message)
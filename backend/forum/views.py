@@ -3,6 +3,7 @@ from rest_framework.decorators import action
 from rest_framework.response import Response
 from django.shortcuts import get_object_or_404
 from django.db.models import Q
+from ifap_backend.pagination import ForumTopicPagination
 from .models import (
     ForumCategory, ForumTopic, ForumReply, ForumLike,
     LessonComment, LessonCommentLike, Conversation, Message,
@@ -37,6 +38,7 @@ class ForumTopicViewSet(viewsets.ModelViewSet):
     """ViewSet para temas del foro"""
     queryset = ForumTopic.objects.filter(is_active=True)
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class = ForumTopicPagination
     
     def get_serializer_class(self):
         if self.action == 'create':
@@ -60,7 +62,7 @@ class ForumTopicViewSet(viewsets.ModelViewSet):
                 Q(author__username__icontains=search)
             )
         
-        return queryset.order_by('-is_pinned', '-updated_at')
+        return queryset.order_by('-is_pinned', '-updated_at', '-id')
     
     def retrieve(self, request, *args, **kwargs):
         """Incrementar vistas al obtener un tema"""
@@ -5,12 +5,28 @@ import logging
 from django.core.cache import caches
 from django.core.cache.utils import make_template_fragment_key
 from django.conf import settings
+from django.db import transaction
 from functools import wraps
 import hashlib
 import json
+import uuid
+
+from .metrics import CACHE_REQUESTS, cache_prefix
 
 logger = logging.getLogger('middleware')
 
+_MISSING = object()
+
+
+def _record_lookup(cache_alias, keys, found):
+    counts = {}
+    for key in keys:
+        result = 'hit' if key in found else 'miss'
+        label = (cache_prefix(key), result)
+        counts[label] = counts.get(label, 0) + 1
+    for (prefix, result), total in counts.items():
+        CACHE_REQUESTS.inc(total, alias=cache_alias, prefix=prefix, result=result)
+
 class CacheService:
     """Servicio centralizado para manejo de cache"""
     
@@ -19,14 +35,16 @@ class CacheService:
         self.api_cache = caches['api']
         self.default_timeout = getattr(settings, 'CACHE_TIMEOUT', 300)
     
-    def get(self, key, default=None, cache_alias='default'):
-        """Obtener valor del cache"""
+    def get(self, key, default=None, cache_alias='default', on_error=_MISSING):
+        """Obtener valor del cache; si el cache falla devuelve `on_error` (por defecto `default`)"""
         cache = caches[cache_alias] if cache_alias != 'default' else self.default_cache
         try:
-            return cache.get(key, default)
+            value = cache.get(key, _MISSING)
         except Exception as e:
             logger.error(f"Cache get error for key {key}: {e}")
-            return default
+            return default if on_error is _MISSING else on_error
+        CACHE_REQUESTS.inc(alias=cache_alias, prefix=cache_prefix(key), result='miss' if value is _MISSING else 'hit')
+        return default if value is _MISSING else value
     
     def set(self, key, value, timeout=None, cache_alias='default'):
         """Establecer valor en cache"""
@@ -38,6 +56,16 @@ class CacheService:
             logger.error(f"Cache set error for key {key}: {e}")
             return False
     
+    def add(self, key, value, timeout=None, cache_alias='default'):
+        """Establecer valor solo si la clave no existe; True si se guardó"""
+        cache = caches[cache_alias] if cache_alias != 'default' else self.default_cache
+        timeout = timeout or self.default_timeout
+        try:
+            return cache.add(key, value, timeout)
+        except Exception as e:
+            logger.error(f"Cache add error for key {key}: {e}")
+            return False
+    
     def delete(self, key, cache_alias='default'):
         """Eliminar valor del cache"""
         cache = caches[cache_alias] if cache_alias != 'default' else self.default_cache
@@ -47,6 +75,15 @@ class CacheService:
             logger.error(f"Cache delete error for key {key}: {e}")
             return False
     
+    def delete_many(self, keys, cache_alias='default'):
+        """Eliminar múltiples valores del cache"""
+        cache = caches[cache_alias] if cache_alias != 'default' else self.default_cache
+        try:
+            return cache.delete_many(keys)
+        except Exception as e:
+            logger.error(f"Cache delete_many error: {e}")
+            return False
+    
     def clear(self, cache_alias='default'):
         """Limpiar todo el cache"""
         cache = caches[cache_alias] if cache_alias != 'default' else self.default_cache
@@ -60,10 +97,12 @@ class CacheService:
         """Obtener múltiples valores del cache"""
         cache = caches[cache_alias] if cache_alias != 'default' else self.default_cache
         try:
-            return cache.get_many(keys)
+            found = cache.get_many(keys)
         except Exception as e:
             logger.error(f"Cache get_many error: {e}")
             return {}
+        _record_lookup(cache_alias, keys, found)
+        return found
     
     def set_many(self, data, timeout=None, cache_alias='default'):
         """Establecer múltiples valores en cache"""
@@ -192,6 +231,9 @@ class CacheKeys:
     COURSE_DETAIL = 'course_detail'
     COURSE_STUDENTS = 'course_students'
     COURSE_LESSONS = 'course_lessons'
+    COURSE_ANALYTICS = 'course_analytics'
+    COURSE_VERSION = 'course_version'
+    COURSE_ENROLLMENT = 'course_enrollment'
     
     # Lecciones
     LESSON_DETAIL = 'lesson_detail'
@@ -216,6 +258,22 @@ class CacheKeys:
     LIBRARY_DOCUMENTS = 'library_documents'
     LIBRARY_CATEGORIES = 'library_categories'
 
+    # Quizzes
+    QUIZ_VERSION = 'quiz_version'
+    QUIZ_PAYLOAD = 'quiz_payload'
+    QUIZ_QUESTIONS = 'quiz_questions'
+    EXAM_SESSION = 'exam_session'
+
+def invalidate_now_and_on_commit(invalidate, *args):
+    """
+    Ejecuta `invalidate(*args)` ya y otra vez tras el commit, por si otra
+    petición volvió a cachear el estado anterior mientras la transacción
+    seguía abierta
+    """
+    invalidate(*args)
+    transaction.on_commit(lambda: invalidate(*args))
+
+
 def invalidate_user_cache(user_id):
     """Invalidar cache relacionado con un usuario específico"""
     patterns = [
@@ -229,18 +287,93 @@ def invalidate_user_cache(user_id):
     for pattern in patterns:
         cache_service.invalidate_pattern(pattern, 'api')
 
+VERSION_TIMEOUT = 60 * 60 * 24
+COURSE_LIST_SCOPE = 'list'
+
+
+def get_version(key):
+    """
+    Versión guardada en `key` (cache `api`); se crea si no existe. Las claves
+    que incluyen la versión quedan obsoletas en cuanto cambia (`bump_version`).
+    """
+    version = cache_service.get(key, cache_alias='api')
+    if version is None:
+        version = uuid.uuid4().hex[:12]
+        cache_service.set(key, version, VERSION_TIMEOUT, cache_alias='api')
+    return version
+
+
+def bump_version(key):
+    cache_service.set(key, uuid.uuid4().hex[:12], VERSION_TIMEOUT, cache_alias='api')
+
+
+def get_course_version(course_id):
+    """
+    Versión actual de los datos cacheados de un curso. Las claves que la
+    incluyen quedan obsoletas en cuanto cambia, en cualquier backend.
+    """
+    return get_version(cache_service.make_key(CacheKeys.COURSE_VERSION, course_id))
+
+
+def bump_course_version(course_id):
+    bump_version(cache_service.make_key(CacheKeys.COURSE_VERSION, course_id))
+
+
+def get_quiz_version(quiz_id):
+    """Versión del contenido de un quiz (datos, preguntas y opciones)"""
+    return get_version(cache_service.make_key(CacheKeys.QUIZ_VERSION, quiz_id))
+
+
+def bump_quiz_version(quiz_id):
+    bump_version(cache_service.make_key(CacheKeys.QUIZ_VERSION, quiz_id))
+
+
+def get_course_list_version():
+    """Versión común de todos los listados de cursos cacheados"""
+    return get_version(cache_service.make_key(CacheKeys.COURSE_VERSION, COURSE_LIST_SCOPE))
+
+
 def invalidate_course_cache(course_id):
     """Invalidar cache relacionado con un curso específico"""
+    # Detalle y listados se cachean con la versión en la clave: basta con cambiarla
+    bump_course_version(course_id)
+    bump_version(cache_service.make_key(CacheKeys.COURSE_VERSION, COURSE_LIST_SCOPE))
     patterns = [
-        f"*{CacheKeys.COURSE_DETAIL}*{course_id}*",
         f"*{CacheKeys.COURSE_STUDENTS}*{course_id}*",
         f"*{CacheKeys.COURSE_LESSONS}*{course_id}*",
-        f"*{CacheKeys.COURSE_LIST}*",
+        f"*{CacheKeys.COURSE_ANALYTICS}*",
     ]
     
     for pattern in patterns:
         cache_service.invalidate_pattern(pattern, 'api')
 
+def invalidate_courses_cache(course_ids):
+    """
+    Invalidación en lote para operaciones masivas: una sola escritura de
+    versiones para todos los cursos y una pasada de patrones compartidos.
+    """
+    course_ids = list(course_ids)
+    if not course_ids:
+        return
+    versions = {
+        cache_service.make_key(CacheKeys.COURSE_VERSION, course_id): uuid.uuid4().hex[:12]
+        for course_id in course_ids
+    }
+    versions[cache_service.make_key(CacheKeys.COURSE_VERSION, COURSE_LIST_SCOPE)] = uuid.uuid4().hex[:12]
+    cache_service.set_many(versions, VERSION_TIMEOUT, cache_alias='api')
+    cache_service.invalidate_pattern(f"*{CacheKeys.COURSE_ANALYTICS}*", 'api')
+
+def invalidate_enrollment_cache(course_ids, user_ids):
+    """
+    Invalidación tras inscripciones masivas: las versiones de los cursos
+    (detalle, listados y estudiantes) más un único `delete_many` de las
+    claves de cursos de cada usuario, sin recorrer patrones por usuario.
+    """
+    invalidate_courses_cache(course_ids)
+    keys = [cache_service.make_key(CacheKeys.USER_COURSES, user_id) for user_id in user_ids]
+    if keys:
+        cache_service.delete_many(keys, cache_alias='api')
+
 def invalidate_forum_cache(topic_id=None):
     """Invalidar cache relacionado con el foro"""
     patterns = [
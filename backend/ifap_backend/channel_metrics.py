@@ -0,0 +1,47 @@
+"""
+Métricas de Channels: latencia de los envíos al channel layer y número de
+conexiones WebSocket abiertas por consumer.
+"""
+from channels.layers import InMemoryChannelLayer
+from channels_redis.core import RedisChannelLayer
+
+from .metrics import CHANNEL_SEND_LATENCY, WEBSOCKET_CONNECTIONS
+
+
+class InstrumentedLayerMixin:
+    """Mide `send` y `group_send` del channel layer"""
+
+    async def send(self, channel, message):
+        with CHANNEL_SEND_LATENCY.time(operation='send'):
+            return await super().send(channel, message)
+
+    async def group_send(self, group, message):
+        with CHANNEL_SEND_LATENCY.time(operation='group_send'):
+            return await super().group_send(group, message)
+
+
+class InstrumentedRedisChannelLayer(InstrumentedLayerMixin, RedisChannelLayer):
+    pass
+
+
+class InstrumentedInMemoryChannelLayer(InstrumentedLayerMixin, InMemoryChannelLayer):
+    pass
+
+
+class ConnectionMetricsMixin:
+    """
+    Para consumers asíncronos: cuenta la conexión al aceptarla y la descuenta
+    al cerrarse, se haya rechazado o no en `connect`.
+    """
+
+    async def accept(self, *args, **kwargs):
+        await super().accept(*args, **kwargs)
+        if not getattr(self, '_metrics_connected', False):
+            self._metrics_connected = True
+            WEBSOCKET_CONNECTIONS.inc(consumer=type(self).__name__)
+
+    async def websocket_disconnect(self, message):
+        if getattr(self, '_metrics_connected', False):
+            self._metrics_connected = False
+            WEBSOCKET_CONNECTIONS.dec(consumer=type(self).__name__)
+        await super().websocket_disconnect(message)
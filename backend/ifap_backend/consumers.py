@@ -2,9 +2,12 @@ import json
 import logging
 from channels.generic.websocket import AsyncWebsocketConsumer
 from channels.db import database_sync_to_async
-from django.contrib.auth.models import AnonymousUser, User
+from .channel_metrics import ConnectionMetricsMixin
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import AnonymousUser
 
 logger = logging.getLogger('middleware')
+User = get_user_model()
 
 @database_sync_to_async
 def get_user_from_token(token_key):
@@ -19,7 +22,7 @@ def get_user_from_token(token_key):
         logger.error(f"Error decoding JWT: {e}")
         return AnonymousUser()
 
-class NotificationConsumer(AsyncWebsocketConsumer):
+class NotificationConsumer(ConnectionMetricsMixin, AsyncWebsocketConsumer):
     async def connect(self):
         query_string = self.scope['query_string'].decode()
         token_key = [q.split('=')[1] for q in query_string.split('&') if q.split('=')[0] == 'token']
@@ -52,13 +55,15 @@ class NotificationConsumer(AsyncWebsocketConsumer):
         pass
 
     async def send_notification(self, event):
-        message = event['message']
-        await self.send(text_data=json.dumps({
-            'message': message
-        }))
+        # Los envíos agrupados traen además la lista completa y el total
+        payload = {'message': event['message']}
+        if 'count' in event:
+            payload['count'] = event['count']
+            payload['messages'] = event.get('messages', [event['message']])
+        await self.send(text_data=json.dumps(payload))
 
 
-class MessagingConsumer(AsyncWebsocketConsumer):
+class MessagingConsumer(ConnectionMetricsMixin, AsyncWebsocketConsumer):
     """Consumer para mensajería directa entre usuarios"""
 
     async def connect(self):
@@ -151,7 +156,7 @@ class MessagingConsumer(AsyncWebsocketConsumer):
         })()
 
 
-class LessonCommentsConsumer(AsyncWebsocketConsumer):
+class LessonCommentsConsumer(ConnectionMetricsMixin, AsyncWebsocketConsumer):
     """Consumer para comentarios en lecciones en tiempo real"""
 
     async def connect(self):
@@ -0,0 +1,16 @@
+"""
+Backend SQLite con transacciones `BEGIN IMMEDIATE`.
+
+Con el `BEGIN` diferido por defecto, una transacción que lee y luego escribe
+tiene que ascender su bloqueo a escritura; si otra conexión escribió entre
+medias SQLite responde "database is locked" al instante, sin esperar el
+`busy_timeout`. Tomando el bloqueo de escritura al empezar, las transacciones
+concurrentes esperan su turno. (Django 5.1 lo permite con
+`OPTIONS['transaction_mode']`.)
+"""
+from django.db.backends.sqlite3 import base
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    def _start_transaction_under_autocommit(self):
+        self.cursor().execute('BEGIN IMMEDIATE')
@@ -0,0 +1,162 @@
+"""
+Router de réplica de lectura.
+
+Las vistas de analítica y reportes (lecturas pesadas) se marcan con
+`@read_from_replica` o `ReplicaReadMixin`; dentro de ellas las lecturas van
+al alias `DATABASE_REPLICA['ALIAS']`. Todo lo demás, y todas las escrituras,
+van a `default`. La réplica se usa solo si:
+
+- el alias existe en `DATABASES` (`DATABASE_REPLICA_URL`);
+- no hay una transacción abierta en el primario (lo leído debe ser coherente
+  con lo que la transacción ya escribió);
+- el usuario no escribió en los últimos `PIN_SECONDS` segundos
+  (read-your-writes: `ReplicaPinningMiddleware` lo fija al primario; si el
+  cache no responde se asume fijado y se lee del primario);
+- la réplica responde y su retraso no supera `MAX_LAG_SECONDS` (se mide como
+  mucho cada `LAG_CHECK_INTERVAL` segundos por proceso).
+"""
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, DatabaseError, connections
+
+from .cache_service import cache_service
+
+logger = logging.getLogger('middleware')
+
+_read_alias = ContextVar('replica_read_alias', default=None)
+_lag_checks = {}
+_lag_lock = threading.Lock()
+
+POSTGRES_LAG_SQL = (
+    'SELECT CASE WHEN NOT pg_is_in_recovery() OR pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() '
+    'THEN 0 ELSE EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()) END'
+)
+
+
+def get_config():
+    return {
+        'ALIAS': 'replica',
+        'PIN_SECONDS': 10,
+        'MAX_LAG_SECONDS': 5,
+        'LAG_CHECK_INTERVAL': 5,
+        **getattr(settings, 'DATABASE_REPLICA', {}),
+    }
+
+
+def _pin_key(user_id):
+    return f'db_pin:{user_id}'
+
+
+def replica_configured():
+    return get_config()['ALIAS'] in connections.settings
+
+
+def pin_to_primary(user):
+    """Envía las lecturas de `user` al primario durante `PIN_SECONDS`"""
+    if replica_configured() and user.pk is not None:
+        cache_service.set(_pin_key(user.pk), True, get_config()['PIN_SECONDS'])
+
+
+def is_pinned(user):
+    """Sin cache no se sabe si el usuario escribió: se lee del primario"""
+    if user is None or not user.is_authenticated:
+        return False
+    return bool(cache_service.get(_pin_key(user.pk), on_error=True))
+
+
+def replica_lag(alias):
+    """
+    Segundos de retraso de la réplica (0 si el backend no replica) o None si
+    no responde. El resultado se reutiliza durante `LAG_CHECK_INTERVAL`.
+    """
+    now = time.monotonic()
+    with _lag_lock:
+        checked = _lag_checks.get(alias)
+        if checked and now - checked[0] < get_config()['LAG_CHECK_INTERVAL']:
+            return checked[1]
+
+    connection = connections[alias]
+    try:
+        if connection.vendor == 'postgresql':
+            with connection.cursor() as cursor:
+                cursor.execute(POSTGRES_LAG_SQL)
+                lag = float(cursor.fetchone()[0] or 0)
+        else:
+            connection.ensure_connection()
+            lag = 0.0
+    except DatabaseError as e:
+        logger.warning(f"Replica {alias} unavailable, reading from primary: {e}")
+        lag = None
+
+    with _lag_lock:
+        _lag_checks[alias] = (now, lag)
+    return lag
+
+
+def replica_for(user=None):
+    """Alias desde el que leer para `user`: la réplica o `default`"""
+    config = get_config()
+    alias = config['ALIAS']
+    if alias not in connections.settings:
+        return DEFAULT_DB_ALIAS
+    if connections[DEFAULT_DB_ALIAS].in_atomic_block or is_pinned(user):
+        return DEFAULT_DB_ALIAS
+    lag = replica_lag(alias)
+    if lag is None or lag > config['MAX_LAG_SECONDS']:
+        return DEFAULT_DB_ALIAS
+    return alias
+
+
+@contextmanager
+def replica_reads(user=None):
+    token = _read_alias.set(replica_for(user))
+    try:
+        yield
+    finally:
+        _read_alias.reset(token)
+
+
+def read_from_replica(view):
+    """Decorador para acciones de ViewSet `(self, request, ...)` de solo lectura"""
+    @wraps(view)
+    def wrapper(self, request, *args, **kwargs):
+        with replica_reads(request.user):
+            return view(self, request, *args, **kwargs)
+    return wrapper
+
+
+class ReplicaReadMixin:
+    """
+    Para ViewSets de solo lectura: los métodos seguros leen de la réplica.
+    La autenticación y los permisos se resuelven antes, contra el primario.
+    """
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        if request.method in ('GET', 'HEAD', 'OPTIONS'):
+            self._replica_token = _read_alias.set(replica_for(request.user))
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        token = getattr(self, '_replica_token', None)
+        if token is not None:
+            _read_alias.reset(token)
+            self._replica_token = None
+        return super().finalize_response(request, response, *args, **kwargs)
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        return _read_alias.get()
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Réplica y primario contienen los mismos datos
+        return True
@@ -2,7 +2,7 @@
 Vistas para health checks del sistema
 """
 import logging
-from django.http import JsonResponse
+from django.http import HttpResponse, JsonResponse
 from django.db import connection
 from django.core.cache import cache
 from django.conf import settings
@@ -10,6 +10,8 @@ from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import AllowAny
 from drf_yasg.utils import swagger_auto_schema
 from drf_yasg import openapi
+from .metrics import registry as metrics_registry, render as render_metrics
+import hmac
 import redis
 import time
 from datetime import datetime
@@ -189,4 +191,22 @@ def detailed_health_check(request):
     
     status_code = 200 if overall_status == 'ok' else 206
     
-    return JsonResponse(health_data, status=status_code)
\ No newline at end of file
+    return JsonResponse(health_data, status=status_code)
+
+def metrics(request):
+    """
+    Métricas en formato de texto de Prometheus, combinadas de todos los
+    procesos si `METRICS_MULTIPROC_DIR` está configurado.
+
+    Fuera de DEBUG exige `METRICS_AUTH_TOKEN`: sin token configurado el
+    endpoint no existe (404).
+    """
+    token = getattr(settings, 'METRICS_AUTH_TOKEN', None)
+    if not token and not settings.DEBUG:
+        return HttpResponse(status=404)
+    if token and not hmac.compare_digest(request.META.get('HTTP_AUTHORIZATION', ''), f'Bearer {token}'):
+        return HttpResponse(status=401)
+    return HttpResponse(
+        render_metrics(metrics_registry.collect()),
+        content_type='text/plain; version=0.0.4; charset=utf-8'
+    )
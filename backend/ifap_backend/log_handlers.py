@@ -0,0 +1,194 @@
+"""
+Pipeline de logging sin bloqueo.
+
+- `QueuedFileHandler`: el hilo del request solo congela el mensaje y lo deja
+  en una cola; un `QueueListener` propio escribe en el archivo por lotes
+  (un flush por lote) desde un hilo aparte.
+- `SizedTimedRotatingFileHandler`: rotación por tamaño y por tiempo sobre el
+  mismo archivo.
+- `JSONLinesFormatter`: una línea JSON por registro, con los campos extra
+  del request (método, ruta, estado, duración, consultas...).
+- `SuccessfulReadSampleFilter`: conserva solo una fracción de las lecturas
+  exitosas, que son la mayor parte del volumen y las menos útiles.
+"""
+import atexit
+import json
+import logging
+import os
+import queue
+import random
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener, TimedRotatingFileHandler
+
+# Atributos propios de LogRecord: todo lo demás son campos `extra`
+_RECORD_ATTRIBUTES = set(vars(logging.makeLogRecord({}))) | {'message', 'asctime'}
+
+
+class JSONLinesFormatter(logging.Formatter):
+    """Formatea cada registro como un objeto JSON en una sola línea"""
+
+    def format(self, record):
+        entry = {
+            'timestamp': datetime.fromtimestamp(record.created, tz=timezone.utc).isoformat(),
+            'level': record.levelname,
+            'logger': record.name,
+            'module': record.module,
+            'message': record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRIBUTES and not key.startswith('_'):
+                entry[key] = value
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry['exception'] = record.exc_text
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class SuccessfulReadSampleFilter(logging.Filter):
+    """
+    Deja pasar solo `rate` (0-1) de los registros INFO de requests de lectura
+    con estado < 400. Avisos, errores y escrituras se conservan siempre.
+    """
+
+    READ_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+    def __init__(self, rate=1.0, name=''):
+        super().__init__(name)
+        self.rate = float(rate)
+
+    def filter(self, record):
+        status = getattr(record, 'response_status', None)
+        if (
+            record.levelno > logging.INFO
+            or status is None
+            or status >= 400
+            or getattr(record, 'request_method', None) not in self.READ_METHODS
+        ):
+            return True
+        record.sample_rate = self.rate
+        return random.random() < self.rate
+
+
+class SizedTimedRotatingFileHandler(TimedRotatingFileHandler):
+    """
+    Rota cuando vence el intervalo (`when`) o cuando el archivo alcanzaría
+    `maxBytes`. Las escrituras no hacen flush: lo hace el listener por lote.
+    """
+
+    def __init__(self, filename, when='midnight', maxBytes=0, backupCount=0, encoding='utf-8', delay=True):
+        super().__init__(filename, when=when, backupCount=backupCount, encoding=encoding, delay=delay)
+        self.maxBytes = maxBytes
+
+    def rotation_filename(self, default_name):
+        # Varias rotaciones por tamaño en el mismo intervalo no se pisan
+        name = super().rotation_filename(default_name)
+        candidate, index = name, 1
+        while os.path.exists(candidate):
+            candidate = f'{name}.{index}'
+            index += 1
+        return candidate
+
+    def emit(self, record):
+        try:
+            message = self.format(record) + self.terminator
+            if self.stream is None:
+                self.stream = self._open()
+            if self.shouldRollover(record) or (
+                self.maxBytes and self.stream.tell() + len(message) >= self.maxBytes
+            ):
+                self.doRollover()
+                if self.stream is None:
+                    self.stream = self._open()
+            self.stream.write(message)
+        except Exception:
+            self.handleError(record)
+
+
+class BatchingQueueListener(QueueListener):
+    """Vacía la cola en lotes de hasta `batch_size` y hace un flush por lote"""
+
+    def __init__(self, queue, *handlers, batch_size=500):
+        super().__init__(queue, *handlers)
+        self.batch_size = batch_size
+
+    def _monitor(self):
+        while True:
+            batch = [self.queue.get()]
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self.queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            stop = False
+            for record in batch:
+                if record is self._sentinel:
+                    stop = True
+                else:
+                    self.handle(record)
+            for handler in self.handlers:
+                handler.flush()
+            for _ in batch:
+                self.queue.task_done()
+            if stop:
+                break
+
+
+class QueuedFileHandler(QueueHandler):
+    """
+    Handler configurable desde `LOGGING` que escribe en un archivo rotado a
+    través de una cola acotada. Si la cola se llena, los registros nuevos se
+    descartan (y se cuentan en `dropped`) en lugar de bloquear el request.
+    """
+
+    def __init__(self, filename, when='midnight', maxBytes=0, backupCount=0,
+                 queue_size=10000, batch_size=500):
+        super().__init__(queue.Queue(queue_size))
+        self.queue_size = queue_size
+        self.batch_size = batch_size
+        self.dropped = 0
+        self.target = SizedTimedRotatingFileHandler(
+            filename, when=when, maxBytes=maxBytes, backupCount=backupCount
+        )
+        self._start_listener()
+        atexit.register(self.close)
+        if hasattr(os, 'register_at_fork'):
+            # El hilo del listener no sobrevive a un fork (p. ej. gunicorn --preload)
+            os.register_at_fork(after_in_child=self._restart_after_fork)
+
+    def _start_listener(self):
+        self.listener = BatchingQueueListener(self.queue, self.target, batch_size=self.batch_size)
+        self.listener.start()
+
+    def _restart_after_fork(self):
+        self.queue = queue.Queue(self.queue_size)
+        self._start_listener()
+
+    def setFormatter(self, fmt):
+        # El formateo se hace en el hilo del listener
+        super().setFormatter(fmt)
+        self.target.setFormatter(fmt)
+
+    def prepare(self, record):
+        """Congela mensaje y excepción sin formatear el registro completo"""
+        record = logging.makeLogRecord(vars(record))
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = (self.formatter or logging.Formatter()).formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+    def close(self):
+        listener = getattr(self, 'listener', None)
+        if listener is not None and listener._thread is not None:
+            listener.stop()
+        self.target.close()
+        super().close()
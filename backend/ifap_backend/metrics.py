@@ -0,0 +1,307 @@
+"""
+Registro de métricas en proceso con exportación en formato de texto de
+Prometheus (ver `render` y la vista `metrics` en health_views).
+
+Tipos soportados: contadores, gauges e histogramas con etiquetas. Cada
+proceso acumula en memoria; con `METRICS_MULTIPROC_DIR` configurado (varios
+workers de gunicorn/daphne) cada proceso vuelca periódicamente su snapshot a
+`<dir>/<pid>.json` y el endpoint suma los archivos de todos:
+
+- contadores e histogramas se suman siempre, también los de procesos ya
+  terminados, para que los totales no retrocedan;
+- los gauges solo cuentan los procesos vivos.
+
+El directorio debe vaciarse al arrancar el servicio (como con
+prometheus_client en modo multiproceso).
+"""
+import json
+import logging
+import math
+import os
+import threading
+import time
+
+from django.conf import settings
+
+logger = logging.getLogger('middleware')
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class Metric:
+    type = None
+
+    def __init__(self, registry, name, documentation, labelnames=()):
+        self.registry = registry
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.values = {}
+
+    def _key(self, labels):
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f'{self.name} espera las etiquetas {self.labelnames}, recibió {tuple(labels)}')
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+
+class Counter(Metric):
+    type = 'counter'
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self.registry.lock:
+            self.values[key] = self.values.get(key, 0) + amount
+        self.registry.touch()
+
+
+class Gauge(Metric):
+    type = 'gauge'
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self.registry.lock:
+            self.values[key] = self.values.get(key, 0) + amount
+        self.registry.touch()
+
+    def dec(self, amount=1, **labels):
+        self.inc(-amount, **labels)
+
+    def set(self, value, **labels):
+        key = self._key(labels)
+        with self.registry.lock:
+            self.values[key] = value
+        self.registry.touch()
+
+
+class Histogram(Metric):
+    """Cada serie guarda [conteo por bucket..., suma, total]"""
+    type = 'histogram'
+
+    def __init__(self, registry, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(registry, name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        with self.registry.lock:
+            series = self.values.get(key)
+            if series is None:
+                series = self.values[key] = [0] * (len(self.buckets) + 2)
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[index] += 1
+                    break
+            series[-2] += value
+            series[-1] += 1
+        self.registry.touch()
+
+    def time(self, **labels):
+        return _Timer(self, labels)
+
+
+class _Timer:
+    def __init__(self, histogram, labels):
+        self.histogram = histogram
+        self.labels = labels
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.histogram.observe(time.perf_counter() - self.start, **self.labels)
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.metrics = {}
+        self._flusher_pid = None
+
+    def _register(self, cls, name, documentation, labelnames=(), **kwargs):
+        with self.lock:
+            metric = self.metrics.get(name)
+            if metric is None:
+                metric = self.metrics[name] = cls(self, name, documentation, labelnames, **kwargs)
+            return metric
+
+    def counter(self, name, documentation, labelnames=()):
+        return self._register(Counter, name, documentation, labelnames)
+
+    def gauge(self, name, documentation, labelnames=()):
+        return self._register(Gauge, name, documentation, labelnames)
+
+    def histogram(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        return self._register(Histogram, name, documentation, labelnames, buckets=buckets)
+
+    # --- Multiproceso ---
+
+    @property
+    def multiproc_dir(self):
+        return getattr(settings, 'METRICS_MULTIPROC_DIR', None)
+
+    def touch(self):
+        """Arranca el volcado periódico en este proceso (también tras un fork)"""
+        if self._flusher_pid == os.getpid() or not self.multiproc_dir:
+            return
+        self._flusher_pid = os.getpid()
+        thread = threading.Thread(target=self._flush_loop, name='metrics-flusher', daemon=True)
+        thread.start()
+
+    def _flush_loop(self):
+        interval = getattr(settings, 'METRICS_FLUSH_INTERVAL', 5)
+        while True:
+            time.sleep(interval)
+            try:
+                self.flush()
+            except Exception as e:
+                logger.warning(f"No se pudieron volcar las métricas: {e}")
+
+    def snapshot(self):
+        with self.lock:
+            return {
+                name: {
+                    'type': metric.type,
+                    'help': metric.documentation,
+                    'labelnames': list(metric.labelnames),
+                    'buckets': list(getattr(metric, 'buckets', ())),
+                    'values': [[list(key), value if metric.type != 'histogram' else list(value)]
+                               for key, value in metric.values.items()],
+                }
+                for name, metric in self.metrics.items()
+            }
+
+    def flush(self):
+        """Escribe el snapshot del proceso de forma atómica"""
+        directory = self.multiproc_dir
+        if not directory:
+            return
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, f'{os.getpid()}.json')
+        temporary = f'{path}.tmp'
+        with open(temporary, 'w') as snapshot_file:
+            json.dump(self.snapshot(), snapshot_file)
+        os.replace(temporary, path)
+
+    def collect(self):
+        """Snapshot combinado de todos los procesos (o solo de este)"""
+        directory = self.multiproc_dir
+        if not directory:
+            return self.snapshot()
+
+        self.flush()
+        merged = {}
+        for filename in sorted(os.listdir(directory)):
+            if not filename.endswith('.json'):
+                continue
+            pid = int(filename[:-len('.json')])
+            try:
+                with open(os.path.join(directory, filename)) as snapshot_file:
+                    snapshot = json.load(snapshot_file)
+            except (OSError, ValueError):
+                continue
+            _merge(merged, snapshot, alive=_is_alive(pid))
+        return merged
+
+
+def _is_alive(pid):
+    if pid == os.getpid():
+        return True
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def _merge(merged, snapshot, alive):
+    for name, metric in snapshot.items():
+        if metric['type'] == 'gauge' and not alive:
+            continue
+        target = merged.setdefault(name, {**metric, 'values': []})
+        series = {tuple(key): value for key, value in target['values']}
+        for key, value in metric['values']:
+            key = tuple(key)
+            current = series.get(key)
+            if current is None:
+                series[key] = value
+            elif metric['type'] == 'histogram':
+                series[key] = [a + b for a, b in zip(current, value)]
+            else:
+                series[key] = current + value
+        target['values'] = [[list(key), value] for key, value in series.items()]
+
+
+# --- Exportación ---
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _labels(names, values, extra=None):
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(f'{extra[0]}="{extra[1]}"')
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def _number(value):
+    if value == math.inf:
+        return '+Inf'
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def render(snapshot):
+    """Formato de texto de exposición de Prometheus (versión 0.0.4)"""
+    lines = []
+    for name in sorted(snapshot):
+        metric = snapshot[name]
+        lines.append(f"# HELP {name} {metric['help']}")
+        lines.append(f"# TYPE {name} {metric['type']}")
+        names = metric['labelnames']
+        for key, value in sorted(metric['values'], key=lambda item: item[0]):
+            if metric['type'] != 'histogram':
+                lines.append(f'{name}{_labels(names, key)} {_number(value)}')
+                continue
+            cumulative = 0
+            for bound, count in zip(metric['buckets'], value):
+                cumulative += count
+                lines.append(f"{name}_bucket{_labels(names, key, ('le', _number(bound)))} {cumulative}")
+            lines.append(f"{name}_bucket{_labels(names, key, ('le', '+Inf'))} {value[-1]}")
+            lines.append(f'{name}_sum{_labels(names, key)} {_number(value[-2])}')
+            lines.append(f'{name}_count{_labels(names, key)} {value[-1]}')
+    return '\n'.join(lines) + '\n'
+
+
+registry = MetricsRegistry()
+
+REQUEST_LATENCY = registry.histogram(
+    'http_request_duration_seconds', 'Duración de los requests HTTP por vista',
+    ('view', 'method', 'status'),
+)
+DB_QUERIES = registry.counter(
+    'db_queries_total', 'Consultas SQL ejecutadas por vista', ('view',),
+)
+DB_QUERY_SECONDS = registry.counter(
+    'db_query_duration_seconds_total', 'Tiempo total en base de datos por vista', ('view',),
+)
+CACHE_REQUESTS = registry.counter(
+    'cache_requests_total', 'Lecturas de cache por alias, prefijo de clave y resultado',
+    ('alias', 'prefix', 'result'),
+)
+CHANNEL_SEND_LATENCY = registry.histogram(
+    'channel_layer_send_duration_seconds', 'Duración de los envíos al channel layer',
+    ('operation',),
+)
+WEBSOCKET_CONNECTIONS = registry.gauge(
+    'websocket_connections', 'Conexiones WebSocket abiertas por consumer', ('consumer',),
+)
+
+
+def cache_prefix(key):
+    """Prefijo de una clave generada con `CacheService.make_key`"""
+    return str(key).split(':', 1)[0]
@@ -2,9 +2,13 @@
 Middleware para manejo centralizado de errores
 """
 import logging
+import time
 import traceback
 from django.http import JsonResponse
 from django.conf import settings
+from .query_budget import QueryCollector, QueryBudgetExceeded, budget_for, get_config
+from .metrics import REQUEST_LATENCY, DB_QUERIES, DB_QUERY_SECONDS
+from .db_routers import pin_to_primary
 import json
 
 logger = logging.getLogger('middleware')
@@ -51,35 +55,34 @@ class ErrorHandlingMiddleware:
 
 class RequestLoggingMiddleware:
     """
-    Middleware para logging de requests
+    Middleware para logging de requests: una sola línea por request, al
+    terminar, con estado, duración y consultas (las mide
+    `QueryBudgetMiddleware`). El muestreo de lecturas exitosas y la
+    escritura a disco los hace el handler configurado en `LOGGING`.
     """
     
     def __init__(self, get_response):
         self.get_response = get_response
 
     def __call__(self, request):
-        # Log del request entrante
-        logger.info(
-            f"Request: {request.method} {request.path}",
-            extra={
-                'request_method': request.method,
-                'request_path': request.path,
-                'user': request.user.id if hasattr(request, 'user') and request.user.is_authenticated else None,
-                'ip_address': self.get_client_ip(request),
-                'user_agent': request.META.get('HTTP_USER_AGENT', ''),
-            }
-        )
-
+        start = time.perf_counter()
         response = self.get_response(request)
+        duration_ms = (time.perf_counter() - start) * 1000
 
-        # Log del response
+        match = getattr(request, 'resolver_match', None)
         logger.info(
-            f"Response: {response.status_code} for {request.method} {request.path}",
+            f"{request.method} {request.path} {response.status_code} {duration_ms:.1f}ms",
             extra={
-                'response_status': response.status_code,
                 'request_method': request.method,
                 'request_path': request.path,
+                'view_name': match.view_name if match else None,
+                'response_status': response.status_code,
+                'duration_ms': round(duration_ms, 1),
+                'query_count': getattr(request, 'query_count', None),
+                'db_time_ms': getattr(request, 'db_time_ms', None),
                 'user': request.user.id if hasattr(request, 'user') and request.user.is_authenticated else None,
+                'ip_address': self.get_client_ip(request),
+                'user_agent': request.META.get('HTTP_USER_AGENT', ''),
             }
         )
 
@@ -115,4 +118,134 @@ class SecurityHeadersMiddleware:
         if not settings.DEBUG:
             response['Strict-Transport-Security'] = 'max-age=31536000; includeSubDomains'
         
-        return response
\ No newline at end of file
+        return response
+
+
+class NotificationBatchMiddleware:
+    """
+    Middleware que agrupa las notificaciones en tiempo real de cada request
+    y las envía al channel layer en un solo lote al terminar
+    """
+    
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        from notifications.utils import notification_batch
+
+        with notification_batch():
+            response = self.get_response(request)
+        return response
+
+
+class ReplicaPinningMiddleware:
+    """
+    Middleware que, tras una escritura correcta de un usuario autenticado,
+    envía sus lecturas al primario durante `DATABASE_REPLICA['PIN_SECONDS']`
+    para que vea lo que acaba de escribir aunque la réplica vaya retrasada
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        if request.method not in ('GET', 'HEAD', 'OPTIONS') and response.status_code < 400:
+            # DRF propaga el usuario autenticado (JWT) al HttpRequest
+            user = getattr(request, 'user', None)
+            if user is not None and user.is_authenticated:
+                pin_to_primary(user)
+        return response
+
+
+class QueryBudgetMiddleware:
+    """
+    Middleware que mide el trabajo en base de datos de cada request.
+
+    - Añade `Server-Timing` con el tiempo total y el de base de datos.
+    - Registra las formas de SQL repetidas (posibles N+1) con el nombre de
+      la vista.
+    - Compara el número de consultas con el presupuesto de la vista
+      (`QUERY_BUDGET['ENDPOINTS']` o `QUERY_BUDGET['DEFAULT']`): en modo
+      estricto (tests) lanza `QueryBudgetExceeded`; si no, solo avisa.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        config = get_config()
+        if not config['ENABLED']:
+            return self.get_response(request)
+
+        start = time.perf_counter()
+        with QueryCollector() as collector:
+            response = self.get_response(request)
+        total_ms = (time.perf_counter() - start) * 1000
+        request.query_count = collector.count
+        request.db_time_ms = round(collector.duration_ms, 1)
+
+        match = getattr(request, 'resolver_match', None)
+        view_name = match.view_name if match else request.path
+
+        if config['SERVER_TIMING']:
+            response['Server-Timing'] = (
+                f'db;dur={collector.duration_ms:.1f};desc="{collector.count} queries", '
+                f'total;dur={total_ms:.1f}'
+            )
+
+        for shape, total in collector.repeated(config['N_PLUS_ONE_THRESHOLD']):
+            logger.warning(
+                f"Possible N+1 in {view_name}: {total}x {shape[:300]}",
+                extra={
+                    'view_name': view_name,
+                    'request_path': request.path,
+                    'query_shape': shape,
+                    'query_repetitions': total,
+                }
+            )
+
+        budget = budget_for(view_name, config)
+        if budget is not None and collector.count > budget:
+            message = (
+                f"Query budget exceeded in {view_name}: {collector.count} queries "
+                f"(budget {budget}, {collector.duration_ms:.1f} ms)"
+            )
+            if config['STRICT']:
+                raise QueryBudgetExceeded(message)
+            logger.warning(message, extra={
+                'view_name': view_name,
+                'request_path': request.path,
+                'query_count': collector.count,
+                'query_budget': budget,
+            })
+
+        return response
+
+
+class MetricsMiddleware:
+    """
+    Middleware que alimenta el registro de métricas: histograma de latencia
+    por vista, método y estado, y consultas/tiempo de base de datos por vista
+    (medidos por `QueryBudgetMiddleware`, que debe ir después).
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        start = time.perf_counter()
+        response = self.get_response(request)
+        duration = time.perf_counter() - start
+
+        match = getattr(request, 'resolver_match', None)
+        # Sin vista resuelta (404) se agrupa todo para no crear una serie por ruta
+        view_name = match.view_name if match else 'unmatched'
+        REQUEST_LATENCY.observe(duration, view=view_name, method=request.method, status=response.status_code)
+
+        query_count = getattr(request, 'query_count', None)
+        if query_count is not None:
+            DB_QUERIES.inc(query_count, view=view_name)
+            DB_QUERY_SECONDS.inc(request.db_time_ms / 1000, view=view_name)
+
+        return response
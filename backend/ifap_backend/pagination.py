@@ -1,10 +1,179 @@
 """
 Clases de paginación personalizadas para APIs
 """
-from rest_framework.pagination import PageNumberPagination, LimitOffsetPagination
+import base64
+import binascii
+import datetime
+import json
+import logging
+
+from django.core.exceptions import FieldDoesNotExist
+from django.core.paginator import Paginator as DjangoPaginator
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connections
+from django.db.models import Model, Q
+from django.db.models.signals import post_save, post_delete
+from rest_framework.exceptions import ValidationError
+from rest_framework.pagination import BasePagination, PageNumberPagination, LimitOffsetPagination
 from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
 from collections import OrderedDict
 
+from .cache_service import bump_version, cache_service, get_version
+
+logger = logging.getLogger('middleware')
+
+
+class CursorJSONEncoder(DjangoJSONEncoder):
+    """Como DjangoJSONEncoder pero sin truncar los microsegundos de las fechas"""
+
+    def default(self, o):
+        if isinstance(o, datetime.datetime):
+            return o.isoformat()
+        return super().default(o)
+
+
+def _count_version_key(model):
+    return cache_service.make_key('pagination_count_version', model._meta.label_lower)
+
+
+def get_count_version(model):
+    """Versión actual de los conteos cacheados de un modelo"""
+    return get_version(_count_version_key(model))
+
+
+def bump_count_version(model):
+    """Invalida todos los conteos cacheados de un modelo cambiando su versión"""
+    bump_version(_count_version_key(model))
+
+
+def register_count_invalidation(model, *related_models, ignore_fields=()):
+    """
+    Conecta post_save/post_delete para invalidar los conteos de `model`
+    cuando se escribe en él o en `related_models` (tablas que cambian el
+    resultado de sus filtros, p. ej. asignaciones o permisos de acceso).
+
+    Los guardados con `update_fields` limitados a `ignore_fields` (contadores
+    como vistas o descargas) no invalidan.
+    """
+    ignore_fields = frozenset(ignore_fields)
+
+    for sender in (model,) + related_models:
+        def handler(sender, update_fields=None, **kwargs):
+            if update_fields and ignore_fields and set(update_fields) <= ignore_fields:
+                return
+            bump_count_version(model)
+
+        uid = f'count_invalidation:{model._meta.label_lower}:{sender._meta.label_lower}'
+        post_save.connect(handler, sender=sender, weak=False, dispatch_uid=f'{uid}:save')
+        post_delete.connect(handler, sender=sender, weak=False, dispatch_uid=f'{uid}:delete')
+
+
+class PrecountedPaginator(DjangoPaginator):
+    """Paginador de Django que usa un total ya calculado en lugar de COUNT(*)"""
+
+    def __init__(self, *args, count=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._precount = count
+
+    @property
+    def count(self):
+        if self._precount is None:
+            return super().count
+        return self._precount
+
+
+class CachedCountMixin:
+    """
+    Mixin de paginación que evita el COUNT(*) exacto en cada petición.
+
+    El total se cachea por modelo, filtros normalizados (query params sin
+    página/cursor/orden) y usuario durante `count_cache_timeout` segundos.
+    La clave incluye la versión del modelo, que cambia en cada escritura
+    registrada con `register_count_invalidation`.
+
+    `count_mode`:
+        - 'exact': COUNT(*) en cada petición
+        - 'cached': COUNT(*) cacheado (por defecto)
+        - 'estimated': estimación del planificador de PostgreSQL si supera
+          `count_estimate_threshold`; por debajo, o en otros motores, se
+          usa el conteo cacheado
+    """
+    count_mode = 'cached'
+    count_cache_timeout = 60
+    count_estimate_threshold = 100000
+
+    def get_count_ignored_params(self):
+        params = {'ordering'}
+        for attr in ('page_query_param', 'page_size_query_param', 'cursor_query_param'):
+            value = getattr(self, attr, None)
+            if value:
+                params.add(value)
+        return params
+
+    def get_count_cache_key(self, queryset, request):
+        ignored = self.get_count_ignored_params()
+        params = {
+            key: ','.join(sorted(values))
+            for key, values in sorted(request.query_params.lists())
+            if key not in ignored
+        }
+        user_id = request.user.id if request.user.is_authenticated else 'anonymous'
+        return cache_service.make_key(
+            'pagination_count',
+            queryset.model._meta.label_lower,
+            get_count_version(queryset.model),
+            request.path,
+            user_id,
+            **params
+        )
+
+    def get_count(self, queryset, request):
+        queryset = queryset.order_by()
+        if self.count_mode == 'estimated':
+            estimate = self.estimate_count(queryset)
+            if estimate is not None and estimate >= self.count_estimate_threshold:
+                return estimate
+            return self.cached_count(queryset, request)
+        if self.count_mode == 'cached':
+            return self.cached_count(queryset, request)
+        return queryset.count()
+
+    def cached_count(self, queryset, request):
+        """COUNT cacheado por filtros normalizados y usuario"""
+        cache_key = self.get_count_cache_key(queryset, request)
+        count = cache_service.get(cache_key, cache_alias='api')
+        if count is None:
+            count = queryset.count()
+            cache_service.set(cache_key, count, self.count_cache_timeout, cache_alias='api')
+        return count
+
+    def estimate_count(self, queryset):
+        """Estimación de filas según el plan de PostgreSQL; None en otros motores"""
+        connection = connections[queryset.db]
+        if connection.vendor != 'postgresql':
+            return None
+        sql, params = queryset.query.sql_with_params()
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute(f'EXPLAIN (FORMAT JSON) {sql}', params)
+                plan = cursor.fetchone()[0]
+            if isinstance(plan, str):
+                plan = json.loads(plan)
+            return int(plan[0]['Plan']['Plan Rows'])
+        except Exception as e:
+            logger.warning(f"No se pudo estimar el conteo: {e}")
+            return None
+
+    def paginate_queryset(self, queryset, request, view=None):
+        # Paginación por número de página: el paginador de Django recibe el total ya calculado
+        if hasattr(queryset, 'model'):
+            count = self.get_count(queryset, request)
+            self.django_paginator_class = lambda *args, **kwargs: PrecountedPaginator(
+                *args, count=count, **kwargs
+            )
+        return super().paginate_queryset(queryset, request, view)
+
 class StandardResultsPagination(PageNumberPagination):
     """Paginación estándar para la mayoría de APIs"""
     page_size = 20
@@ -57,7 +226,10 @@ class SmallResultsPagination(PageNumberPagination):
         ]))
 
 class CursorPagination(LimitOffsetPagination):
-    """Paginación por cursor para listas en tiempo real como chat"""
+    """
+    Paginación limit/offset (se mantiene el nombre por compatibilidad).
+    Para listas grandes usar `KeysetPagination`, que no depende de OFFSET.
+    """
     default_limit = 20
     limit_query_param = 'limit'
     offset_query_param = 'offset'
@@ -92,8 +264,8 @@ class ForumPagination(PageNumberPagination):
             ('results', data)
         ]))
 
-class TaskPagination(PageNumberPagination):
-    """Paginación específica para tareas"""
+class TaskPagination(CachedCountMixin, PageNumberPagination):
+    """Paginación específica para tareas (conteo cacheado)"""
     page_size = 25
     page_size_query_param = 'page_size'
     max_page_size = 100
@@ -107,4 +279,221 @@ class TaskPagination(PageNumberPagination):
             ('current_page', self.page.number),
             ('page_size', self.page_size),
             ('results', data)
-        ]))
\ No newline at end of file
+        ]))
+
+class KeysetPagination(CachedCountMixin, BasePagination):
+    """
+    Paginación por cursor (keyset) para cualquier queryset ordenado.
+
+    En lugar de OFFSET filtra por la posición del último elemento entregado
+    usando el orden completo del queryset, por ejemplo
+    `(-is_pinned, -updated_at, -id)`. Siempre se agrega la clave primaria
+    como desempate para que el orden sea estable. Los campos del orden no
+    deben admitir NULL.
+
+    El cursor es opaco (base64) y el total (`count`) es opcional: con
+    `count_mode = None` no se calcula; el resto de modos son los de
+    `CachedCountMixin`.
+    """
+    page_size = 20
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    cursor_query_param = 'cursor'
+    ordering = ('-pk',)
+    count_mode = None
+    invalid_cursor_message = 'Cursor inválido'
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params.get(self.page_size_query_param, self.page_size))
+        except (TypeError, ValueError):
+            return self.page_size
+        return max(1, min(size, self.max_page_size))
+
+    def get_ordering(self, queryset):
+        """Orden efectivo del queryset con la clave primaria como desempate"""
+        ordering = list(queryset.query.order_by)
+        if not ordering or not all(isinstance(field, str) for field in ordering):
+            ordering = list(queryset.model._meta.ordering) or list(self.ordering)
+        ordering = [field for field in ordering if field != '?']
+
+        pk_name = queryset.model._meta.pk.name
+        names = {field.lstrip('-') for field in ordering}
+        if not names & {'pk', 'id', pk_name}:
+            descending = ordering[0].startswith('-') if ordering else True
+            ordering.append('-pk' if descending else 'pk')
+        return ordering
+
+    def encode_cursor(self, position, reverse=False):
+        payload = {'p': position}
+        if reverse:
+            payload['r'] = 1
+        raw = json.dumps(payload, cls=CursorJSONEncoder, separators=(',', ':'))
+        return base64.urlsafe_b64encode(raw.encode()).decode()
+
+    def decode_cursor(self, cursor, ordering, model):
+        try:
+            payload = json.loads(base64.urlsafe_b64decode(cursor.encode()).decode())
+            position = payload['p']
+            reverse = bool(payload.get('r'))
+        except (binascii.Error, UnicodeDecodeError, ValueError, KeyError, TypeError):
+            raise ValidationError({self.cursor_query_param: self.invalid_cursor_message})
+
+        if not isinstance(position, list) or len(position) != len(ordering):
+            raise ValidationError({self.cursor_query_param: self.invalid_cursor_message})
+
+        try:
+            values = [
+                self._to_python(model, field.lstrip('-'), value)
+                for field, value in zip(ordering, position)
+            ]
+        except Exception:
+            raise ValidationError({self.cursor_query_param: self.invalid_cursor_message})
+        return values, reverse
+
+    def _to_python(self, model, path, value):
+        """Convierte un valor del cursor al tipo del campo correspondiente"""
+        field = None
+        try:
+            for part in path.split('__'):
+                field = model._meta.pk if part == 'pk' else model._meta.get_field(part)
+                if field.is_relation and field.related_model is not None:
+                    model = field.related_model
+        except FieldDoesNotExist:
+            # Campos anotados: se usa el valor tal cual
+            return value
+        if field.is_relation:
+            field = field.target_field
+        return field.to_python(value)
+
+    def _position_value(self, obj, path):
+        value = obj
+        for part in path.split('__'):
+            value = getattr(value, part, None)
+            if value is None:
+                break
+        if isinstance(value, Model):
+            value = value.pk
+        return value
+
+    def get_position(self, obj):
+        return [self._position_value(obj, field.lstrip('-')) for field in self.ordering_fields]
+
+    def _keyset_filter(self, ordering, values, reverse):
+        """Construye (a > x) OR (a = x AND b > y) OR ... según la dirección de cada campo"""
+        condition = Q()
+        for index, field in enumerate(ordering):
+            descending = field.startswith('-')
+            lookup = 'lt' if descending != reverse else 'gt'
+            name = field.lstrip('-')
+            clause = Q(**{f'{name}__{lookup}': values[index]})
+            for prev_field, prev_value in zip(ordering[:index], values[:index]):
+                clause &= Q(**{prev_field.lstrip('-'): prev_value})
+            condition |= clause
+        return condition
+
+    @staticmethod
+    def _reverse_ordering(ordering):
+        return [field[1:] if field.startswith('-') else f'-{field}' for field in ordering]
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.page_size_value = self.get_page_size(request)
+        self.ordering_fields = self.get_ordering(queryset)
+        self.count = self.get_count(queryset, request) if self.count_mode else None
+
+        reverse = False
+        self.has_cursor = False
+        cursor = request.query_params.get(self.cursor_query_param)
+        if cursor:
+            values, reverse = self.decode_cursor(cursor, self.ordering_fields, queryset.model)
+            queryset = queryset.filter(self._keyset_filter(self.ordering_fields, values, reverse))
+            self.has_cursor = True
+
+        ordering = self._reverse_ordering(self.ordering_fields) if reverse else self.ordering_fields
+        rows = list(queryset.order_by(*ordering)[:self.page_size_value + 1])
+        has_extra = len(rows) > self.page_size_value
+        rows = rows[:self.page_size_value]
+
+        if reverse:
+            rows.reverse()
+            self.has_next = True
+            self.has_previous = has_extra
+        else:
+            self.has_next = has_extra
+            self.has_previous = self.has_cursor
+
+        self.page = rows
+        return rows
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        url = self.request.build_absolute_uri()
+        cursor = self.encode_cursor(self.get_position(self.page[-1]))
+        return replace_query_param(url, self.cursor_query_param, cursor)
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        url = self.request.build_absolute_uri()
+        if not self.page:
+            return remove_query_param(url, self.cursor_query_param)
+        cursor = self.encode_cursor(self.get_position(self.page[0]), reverse=True)
+        return replace_query_param(url, self.cursor_query_param, cursor)
+
+    def get_paginated_response(self, data):
+        fields = [
+            ('next', self.get_next_link()),
+            ('previous', self.get_previous_link()),
+        ]
+        if self.count is not None:
+            fields.append(('count', self.count))
+        fields.extend([
+            ('page_size', self.page_size_value),
+            ('results', data),
+        ])
+        return Response(OrderedDict(fields))
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'previous': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'count': {'type': 'integer'},
+                'page_size': {'type': 'integer'},
+                'results': schema,
+            },
+        }
+
+
+class ForumTopicPagination(KeysetPagination):
+    """Paginación por cursor para temas del foro (fijados primero)"""
+    page_size = 15
+    max_page_size = 50
+    ordering = ('-is_pinned', '-updated_at', '-pk')
+    count_mode = 'cached'
+
+
+class LibraryFilePagination(KeysetPagination):
+    """Paginación por cursor para la biblioteca"""
+    page_size = 50
+    max_page_size = 200
+    ordering = ('-created_at', '-pk')
+    count_mode = 'cached'
+
+
+class TaskKeysetPagination(KeysetPagination):
+    """Paginación por cursor para tareas"""
+    page_size = 25
+    max_page_size = 100
+    ordering = ('-created_at', '-pk')
+    count_mode = 'cached'
+
+
+class NotificationPagination(KeysetPagination):
+    """Paginación por cursor para notificaciones"""
+    page_size = 20
+    max_page_size = 50
+    ordering = ('-timestamp', '-pk')
@@ -0,0 +1,89 @@
+"""
+Instrumentación de consultas por request.
+
+`QueryCollector` se engancha a todas las conexiones con
+`connection.execute_wrapper` y acumula, por request, el número de consultas,
+el tiempo total en base de datos y cuántas veces se repite cada forma de SQL
+(la sentencia sin parámetros y con las listas `IN (...)` colapsadas). Una
+forma repetida muchas veces en el mismo request es casi siempre un N+1.
+
+La configuración vive en `settings.QUERY_BUDGET` (ver `QueryBudgetMiddleware`):
+presupuesto por defecto, presupuestos por nombre de vista, umbral de
+repeticiones y si superar el presupuesto debe fallar (tests) o solo avisar.
+"""
+import re
+import time
+from collections import Counter
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import connections
+
+DEFAULTS = {
+    'ENABLED': True,
+    'STRICT': False,
+    'DEFAULT': 50,
+    'ENDPOINTS': {},
+    'N_PLUS_ONE_THRESHOLD': 5,
+    'SERVER_TIMING': True,
+}
+
+_IN_LIST = re.compile(r'IN \((?:%s|\?)(?:, (?:%s|\?))*\)')
+_LITERAL = re.compile(r"'(?:[^']|'')*'|\b\d+\b")
+_SPACES = re.compile(r'\s+')
+
+
+class QueryBudgetExceeded(AssertionError):
+    """Un request superó su presupuesto de consultas (modo estricto)"""
+
+
+def get_config():
+    return {**DEFAULTS, **getattr(settings, 'QUERY_BUDGET', {})}
+
+
+def sql_shape(sql):
+    """Forma normalizada de una sentencia para agrupar repeticiones"""
+    shape = _LITERAL.sub('?', sql)
+    shape = _IN_LIST.sub('IN (...)', shape)
+    return _SPACES.sub(' ', shape).strip()
+
+
+class QueryCollector:
+    """Cuenta consultas, tiempo y formas de SQL mientras está activo"""
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+        self.shapes = Counter()
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.duration += time.perf_counter() - start
+            self.count += 1
+            self.shapes[sql_shape(sql)] += 1
+
+    def __enter__(self):
+        self._stack = ExitStack()
+        for connection in connections.all():
+            self._stack.enter_context(connection.execute_wrapper(self))
+        return self
+
+    def __exit__(self, *exc_info):
+        self._stack.close()
+
+    @property
+    def duration_ms(self):
+        return self.duration * 1000
+
+    def repeated(self, threshold):
+        """Formas ejecutadas al menos `threshold` veces, de más a menos"""
+        return [(shape, total) for shape, total in self.shapes.most_common() if total >= threshold]
+
+
+def budget_for(view_name, config=None):
+    """Presupuesto de consultas de una vista (None = sin límite)"""
+    config = config or get_config()
+    return config['ENDPOINTS'].get(view_name, config['DEFAULT'])
@@ -2,7 +2,8 @@
 Optimizaciones de queries para mejorar el rendimiento de la base de datos
 """
 from django.db import models
-from django.db.models import Prefetch, Q, Count, Avg
+from django.db.models import Prefetch, Q, Count, Avg, Exists, OuterRef, Subquery
+from django.db.models.functions import Coalesce
 from django.core.cache import cache
 from ifap_backend.cache_service import cache_service, CacheKeys
 
@@ -69,19 +70,49 @@ class UserQueryOptimizer:
 
 class CourseQueryOptimizer:
     """Optimizaciones específicas para Course queries"""
-    
+
     @staticmethod
-    def get_courses_with_details():
-        """Cursos con información completa"""
+    def student_count_subquery():
+        """Número de inscritos por curso como subconsulta (sin JOIN ni GROUP BY)"""
         from courses.models import Course
-        
-        return Course.objects.select_related(
+
+        enrollments = Course.students.through.objects.filter(
+            course_id=OuterRef('pk')
+        ).order_by().values('course_id').annotate(total=Count('*')).values('total')
+        return Coalesce(Subquery(enrollments), 0)
+
+    @staticmethod
+    def lesson_count_subquery():
+        from lessons.models import Lesson
+
+        lessons = Lesson.objects.filter(
+            course_id=OuterRef('pk')
+        ).order_by().values('course_id').annotate(total=Count('*')).values('total')
+        return Coalesce(Subquery(lessons), 0)
+
+    @staticmethod
+    def enrolled_exists(user):
+        """EXISTS de la inscripción del usuario en cada curso"""
+        from courses.models import Course
+
+        return Exists(Course.students.through.objects.filter(course_id=OuterRef('pk'), user_id=user.id))
+
+    @staticmethod
+    def get_courses_with_details(user=None):
+        """
+        Cursos con instructor y número de inscritos. No precarga la lista de
+        estudiantes; con `user` autenticado anota `user_is_enrolled`.
+        """
+        from courses.models import Course
+
+        queryset = Course.objects.select_related(
             'instructor'
-        ).prefetch_related(
-            'students'
         ).annotate(
-            student_count=Count('students')
+            student_count=CourseQueryOptimizer.student_count_subquery()
         )
+        if user is not None and user.is_authenticated:
+            queryset = queryset.annotate(user_is_enrolled=CourseQueryOptimizer.enrolled_exists(user))
+        return queryset
     
     @staticmethod
     def get_course_with_lessons(course_id):
@@ -109,11 +140,11 @@ class CourseQueryOptimizer:
         if user.is_instructor:
             return Course.objects.filter(
                 instructor=user
-            ).select_related().prefetch_related(
-                'students'
+            ).select_related(
+                'instructor'
             ).annotate(
-                student_count=Count('students'),
-                lesson_count=Count('lessons')
+                student_count=CourseQueryOptimizer.student_count_subquery(),
+                lesson_count=CourseQueryOptimizer.lesson_count_subquery()
             )
         else:
             return Course.objects.filter(
@@ -121,7 +152,9 @@ class CourseQueryOptimizer:
             ).select_related(
                 'instructor'
             ).annotate(
-                lesson_count=Count('lessons')
+                student_count=CourseQueryOptimizer.student_count_subquery(),
+                lesson_count=CourseQueryOptimizer.lesson_count_subquery(),
+                user_is_enrolled=CourseQueryOptimizer.enrolled_exists(user)
             )
 
 class ForumQueryOptimizer:
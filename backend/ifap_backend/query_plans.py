@@ -0,0 +1,78 @@
+"""
+Planes de ejecución de las consultas de un request.
+
+`capture_plans` registra las consultas ejecutadas dentro del bloque y, al
+salir, obtiene el EXPLAIN de cada SELECT. `full_scans` devuelve las tablas
+que el plan recorre completas:
+
+- SQLite: líneas `SCAN <tabla>` sin índice (`SCAN ... USING INDEX` recorre
+  el índice en orden y se corta con el LIMIT de la paginación);
+- PostgreSQL: nodos `Seq Scan on <tabla>`. El EXPLAIN se hace con
+  `enable_seqscan = off` para que en tablas pequeñas de prueba el planner
+  solo elija un scan secuencial cuando no hay índice utilizable.
+"""
+import re
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+
+from django.db import connections, transaction
+from django.test.utils import CaptureQueriesContext
+
+_SQLITE_SCAN = re.compile(r'^SCAN (?:TABLE )?(\w+)(?: AS \w+)?$')
+_POSTGRES_SCAN = re.compile(r'Seq Scan on (\w+)')
+
+
+def explain(sql, using='default'):
+    """Líneas del plan de `sql` (ya interpolado) en el backend `using`"""
+    connection = connections[using]
+    if connection.vendor == 'sqlite':
+        with connection.cursor() as cursor:
+            cursor.execute(f'EXPLAIN QUERY PLAN {sql}')
+            return [row[-1] for row in cursor.fetchall()]
+    if connection.vendor == 'postgresql':
+        with transaction.atomic(using=using), connection.cursor() as cursor:
+            cursor.execute('SET LOCAL enable_seqscan = off')
+            cursor.execute(f'EXPLAIN {sql}')
+            return [row[0] for row in cursor.fetchall()]
+    raise NotImplementedError(f'EXPLAIN no soportado para {connection.vendor}')
+
+
+def full_scans(plan, vendor):
+    """Tablas que `plan` recorre completas"""
+    pattern = _SQLITE_SCAN if vendor == 'sqlite' else _POSTGRES_SCAN
+    tables = set()
+    for line in plan:
+        match = pattern.search(line.strip())
+        if match:
+            tables.add(match.group(1))
+    return tables
+
+
+@dataclass
+class PlanReport:
+    vendor: str
+    # [(sql, plan, tablas recorridas completas)]
+    queries: list = field(default_factory=list)
+
+    def scans(self, tables=None):
+        """[(tabla, sql)] de los full scans, opcionalmente solo de `tables`"""
+        return [
+            (table, sql)
+            for sql, _, scanned in self.queries
+            for table in sorted(scanned)
+            if tables is None or table in tables
+        ]
+
+
+@contextmanager
+def capture_plans(using='default'):
+    connection = connections[using]
+    report = PlanReport(vendor=connection.vendor)
+    with CaptureQueriesContext(connection) as context:
+        yield report
+    for query in context.captured_queries:
+        sql = query['sql']
+        if not sql.lstrip().upper().startswith('SELECT'):
+            continue
+        plan = explain(sql, using)
+        report.queries.append((sql, plan, full_scans(plan, connection.vendor)))
@@ -0,0 +1,416 @@
+"""
+Generador de datos sintéticos a escala (ver el comando `seed_scale`).
+
+Produce volúmenes parecidos a producción para reproducir localmente los
+problemas de N+1 y de conteos y medir sus correcciones:
+
+- todo se inserta con `bulk_create` por bloques de `chunk_size`, sin señales
+  y sin cargar en memoria más que un bloque de filas dependientes;
+- `random.Random(seed)`: la misma semilla y los mismos volúmenes generan los
+  mismos datos;
+- sesgo realista: la popularidad de los cursos y de los temas del foro sigue
+  una Zipf, el avance en las lecciones una Beta y cada estudiante tiene su
+  propia tasa de acierto en los quizzes.
+
+Como `bulk_create` no dispara señales, al terminar se reconstruyen los
+rollups de quizzes y los contadores del dashboard y se invalidan las caches
+de cursos y foro.
+"""
+import bisect
+import itertools
+import logging
+import math
+import random
+import time
+from dataclasses import dataclass, fields, replace
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.db import connection, transaction
+from django.db.models import OuterRef, Subquery
+from django.utils import timezone
+
+from courses.models import Course
+from forum.models import ForumCategory, ForumTopic, ForumReply
+from lessons.models import Lesson, LessonCompletion
+from quizzes.models import Quiz, Question, Option, QuizAttempt, UserAnswer
+from .cache_service import invalidate_courses_cache, invalidate_forum_cache
+
+logger = logging.getLogger('middleware')
+
+User = get_user_model()
+
+DEFAULT_PASSWORD = 'seed-Pass-2024'
+ZIPF_EXPONENT = 1.1
+
+# Campos de `SeedVolumes` que son proporciones y no cambian con la escala
+_SHAPE_FIELDS = {
+    'enrollments_per_user', 'lessons_per_course', 'quizzes_per_course',
+    'questions_per_quiz', 'options_per_question', 'forum_categories',
+}
+
+
+@dataclass
+class SeedVolumes:
+    users: int = 50_000
+    instructors: int = 500
+    courses: int = 2_000
+    enrollments_per_user: int = 4
+    lessons_per_course: int = 10
+    lesson_completions: int = 1_000_000
+    quizzes_per_course: int = 1
+    questions_per_quiz: int = 10
+    options_per_question: int = 4
+    quiz_answers: int = 5_000_000
+    forum_categories: int = 10
+    forum_topics: int = 50_000
+    forum_replies: int = 500_000
+
+    def scaled(self, factor):
+        """Multiplica los volúmenes (no las proporciones) por `factor`"""
+        return replace(self, **{
+            field.name: max(int(getattr(self, field.name) * factor), 1)
+            for field in fields(self) if field.name not in _SHAPE_FIELDS
+        })
+
+
+def zipf_cum_weights(size, exponent=ZIPF_EXPONENT):
+    """Pesos acumulados 1/rank^s para `random.choices(cum_weights=...)`"""
+    return list(itertools.accumulate(1 / (rank ** exponent) for rank in range(1, size + 1)))
+
+
+def chunked(iterable, size):
+    iterator = iter(iterable)
+    while True:
+        chunk = list(itertools.islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+class ScaleSeeder:
+    """
+    Genera el dataset por etapas (`run`). Los ids de usuarios, cursos,
+    lecciones y preguntas se conservan en memoria porque las etapas
+    siguientes los referencian; las filas de volumen (completados,
+    respuestas, réplicas) se generan y escriben bloque a bloque.
+    """
+
+    def __init__(self, volumes, seed=42, prefix='seed', chunk_size=5000,
+                 password=DEFAULT_PASSWORD, log=None):
+        self.volumes = volumes
+        self.rng = random.Random(seed)
+        self.prefix = prefix
+        self.chunk_size = chunk_size
+        self.password = password
+        self.log = log or logger.info
+        self.now = timezone.now()
+        self.counts = {}
+
+    def run(self):
+        if not connection.features.can_return_rows_from_bulk_insert:
+            raise RuntimeError(
+                f'{connection.vendor} no devuelve los ids de bulk_create; seed_scale necesita SQLite >= 3.35 o PostgreSQL'
+            )
+        if User.objects.filter(username__startswith=f'{self.prefix}_').exists():
+            raise ValueError(f"Ya existen usuarios con el prefijo '{self.prefix}_'; use otro prefijo")
+
+        for stage in (
+            self.seed_users, self.seed_courses, self.seed_enrollments, self.seed_lessons,
+            self.seed_lesson_completions, self.seed_quizzes, self.seed_quiz_attempts, self.seed_forum,
+        ):
+            start = time.perf_counter()
+            stage()
+            self.log(f'{stage.__name__}: {time.perf_counter() - start:.1f}s')
+
+        self.rebuild_derived_data()
+        return self.counts
+
+    # --- Utilidades ---
+
+    def _insert(self, model, objects, count_as=None, dates=None):
+        """
+        Inserta por bloques y devuelve los pks en el orden de `objects`.
+        `dates(obj)` da las fechas de cada fila (ver `_backdate`).
+        """
+        pks = []
+        for chunk in chunked(objects, self.chunk_size):
+            with transaction.atomic():
+                created = model.objects.bulk_create(chunk, batch_size=self.chunk_size)
+                if dates:
+                    self._backdate(model, created, dates)
+            pks.extend(obj.pk for obj in created)
+        name = count_as or model._meta.label_lower
+        self.counts[name] = self.counts.get(name, 0) + len(pks)
+        return pks
+
+    def _past(self, max_days):
+        return self.now - timedelta(seconds=self.rng.randrange(max_days * 86400))
+
+    def _between(self, start):
+        """Fecha al azar entre `start` y ahora"""
+        return start + (self.now - start) * self.rng.random()
+
+    def _backdate(self, model, objects, dates):
+        """
+        Reparte en el tiempo filas ya insertadas: `auto_now`/`auto_now_add`
+        pisan en el INSERT cualquier fecha, pero `bulk_update` las escribe tal cual.
+        """
+        fields = None
+        for obj in objects:
+            values = dates(obj)
+            for name, value in values.items():
+                setattr(obj, name, value)
+            fields = fields or list(values)
+        if fields:
+            model.objects.bulk_update(objects, fields, batch_size=self.chunk_size)
+
+    # --- Etapas ---
+
+    def seed_users(self):
+        password = make_password(self.password)
+        volumes = self.volumes
+        self.instructor_ids = self._insert(User, (
+            User(
+                username=f'{self.prefix}_instructor{i}', email=f'{self.prefix}_instructor{i}@ifap.edu.pe',
+                password=password, first_name='Docente', last_name=str(i),
+                is_student=False, is_instructor=True, date_joined=self._past(730),
+            )
+            for i in range(volumes.instructors)
+        ))
+        self.student_ids = self._insert(User, (
+            User(
+                username=f'{self.prefix}_student{i}', email=f'{self.prefix}_student{i}@ifap.edu.pe',
+                password=password, first_name='Estudiante', last_name=str(i), date_joined=self._past(730),
+            )
+            for i in range(volumes.users)
+        ))
+        # Tasa de acierto propia de cada estudiante en los quizzes
+        self.skill = [self.rng.betavariate(5, 2) for _ in self.student_ids]
+
+    def seed_courses(self):
+        modalities = ['virtual', 'presencial', 'hibrido']
+        self.course_ids = self._insert(Course, (
+            Course(
+                title=f'Curso {i}', description=f'Curso sintético {i}',
+                instructor_id=self.rng.choice(self.instructor_ids),
+                duration_hours=self.rng.choice([20, 40, 60, 80]),
+                modality=self.rng.choice(modalities), is_active=self.rng.random() < 0.9,
+            )
+            for i in range(self.volumes.courses)
+        ))
+        # Índices de curso por popularidad: el rango no coincide con el orden de los ids
+        self.courses_by_popularity = self.rng.sample(range(len(self.course_ids)), len(self.course_ids))
+        self.course_weights = zipf_cum_weights(len(self.course_ids))
+
+    def seed_enrollments(self):
+        per_user = min(self.volumes.enrollments_per_user, len(self.course_ids))
+        self.enrolled = []
+        for _ in self.student_ids:
+            wanted = self.rng.randint(1, max(2 * per_user - 1, 1))
+            wanted = min(wanted, len(self.course_ids))
+            chosen = set()
+            while len(chosen) < wanted:
+                chosen.add(self.rng.choices(self.courses_by_popularity, cum_weights=self.course_weights)[0])
+            # Ordenados por índice: el orden no depende de los ids de la base de datos
+            self.enrolled.append(tuple(self.course_ids[index] for index in sorted(chosen)))
+
+        Enrollment = Course.students.through
+        self._insert(Enrollment, (
+            Enrollment(course_id=course_id, user_id=student_id)
+            for student_id, course_ids in zip(self.student_ids, self.enrolled) for course_id in course_ids
+        ), count_as='courses.enrollment')
+
+    def seed_lessons(self):
+        per_course = self.volumes.lessons_per_course
+        instructor = dict(Course.objects.filter(id__in=self.course_ids).values_list('id', 'instructor_id'))
+        pks = self._insert(Lesson, (
+            Lesson(
+                title=f'Lección {order}', description='Lección sintética', course_id=course_id,
+                instructor_id=instructor[course_id], content='Contenido de la lección. ' * 40,
+                order=order, duration_minutes=self.rng.choice([15, 30, 45, 60]), is_published=True,
+            )
+            for course_id in self.course_ids for order in range(1, per_course + 1)
+        ))
+        self.lessons = {
+            course_id: pks[index * per_course:(index + 1) * per_course]
+            for index, course_id in enumerate(self.course_ids)
+        }
+
+    def seed_lesson_completions(self):
+        """
+        Cada inscripción completa las primeras n lecciones del curso, con n
+        tomado de una Beta cuya media da el total pedido de completados.
+        """
+        target = self.volumes.lesson_completions
+        per_course = self.volumes.lessons_per_course
+        enrollments = sum(len(course_ids) for course_ids in self.enrolled)
+        mean = min(target / max(enrollments * per_course, 1), 1.0)
+
+        def progress():
+            if mean >= 1:
+                return 1.0
+            return self.rng.betavariate(0.8, 0.8 * (1 - mean) / mean)
+
+        def completions():
+            produced = 0
+            for student_id, course_ids in zip(self.student_ids, self.enrolled):
+                for course_id in course_ids:
+                    for lesson_id in self.lessons[course_id][:round(progress() * per_course)]:
+                        if produced >= target:
+                            return
+                        produced += 1
+                        yield LessonCompletion(user_id=student_id, lesson_id=lesson_id)
+
+        self._insert(LessonCompletion, completions(), dates=lambda completion: {'completed_at': self._past(365)})
+
+    def seed_quizzes(self):
+        volumes = self.volumes
+        instructor = dict(Course.objects.filter(id__in=self.course_ids).values_list('id', 'instructor_id'))
+        quiz_courses = [course_id for course_id in self.course_ids for _ in range(volumes.quizzes_per_course)]
+        quiz_ids = self._insert(Quiz, (
+            Quiz(
+                title=f'Evaluación {index % volumes.quizzes_per_course + 1}', course_id=course_id,
+                created_by_id=instructor[course_id], is_published=True, max_attempts=0,
+                passing_score=self.rng.choice([60, 70, 80]),
+            )
+            for index, course_id in enumerate(quiz_courses)
+        ))
+        self.quizzes_by_course = {}
+        for quiz_id, course_id in zip(quiz_ids, quiz_courses):
+            self.quizzes_by_course.setdefault(course_id, []).append(quiz_id)
+        self.passing_score = dict(Quiz.objects.filter(id__in=quiz_ids).values_list('id', 'passing_score'))
+
+        question_quizzes = [quiz_id for quiz_id in quiz_ids for _ in range(volumes.questions_per_quiz)]
+        question_ids = self._insert(Question, (
+            Question(quiz_id=quiz_id, question_text=f'Pregunta {index % volumes.questions_per_quiz + 1}',
+                     order=index % volumes.questions_per_quiz, points=1)
+            for index, quiz_id in enumerate(question_quizzes)
+        ))
+        correct_index = [self.rng.randrange(volumes.options_per_question) for _ in question_ids]
+        option_ids = self._insert(Option, (
+            Option(question_id=question_id, option_text=f'Opción {order + 1}',
+                   is_correct=order == correct_index[index], order=order)
+            for index, question_id in enumerate(question_ids) for order in range(volumes.options_per_question)
+        ))
+
+        # quiz_id -> [(question_id, opción correcta, [opciones incorrectas])]
+        self.questions = {}
+        per_question = volumes.options_per_question
+        for index, (question_id, quiz_id) in enumerate(zip(question_ids, question_quizzes)):
+            options = option_ids[index * per_question:(index + 1) * per_question]
+            correct = options[correct_index[index]]
+            self.questions.setdefault(quiz_id, []).append(
+                (question_id, correct, [option_id for option_id in options if option_id != correct])
+            )
+
+    def seed_quiz_attempts(self):
+        """
+        Intentos completos de estudiantes inscritos hasta sumar `quiz_answers`
+        respuestas. Cada bloque inserta intentos, respuestas y opciones
+        elegidas, en ese orden, para enlazar los ids devueltos.
+        """
+        volumes = self.volumes
+        attempts_total = math.ceil(volumes.quiz_answers / volumes.questions_per_quiz)
+        attempt_numbers = {}
+        Selection = UserAnswer.selected_options.through
+        attempts_per_chunk = max(self.chunk_size // volumes.questions_per_quiz, 1)
+
+        for chunk_start in range(0, attempts_total, attempts_per_chunk):
+            attempts, answered = [], []
+            for _ in range(min(attempts_per_chunk, attempts_total - chunk_start)):
+                student = self.rng.randrange(len(self.student_ids))
+                student_id = self.student_ids[student]
+                quiz_id = self.rng.choice(self.quizzes_by_course[self.rng.choice(self.enrolled[student])])
+                number = attempt_numbers[student_id, quiz_id] = attempt_numbers.get((student_id, quiz_id), 0) + 1
+
+                choices = []
+                for question_id, correct, wrong in self.questions[quiz_id]:
+                    hit = self.rng.random() < self.skill[student]
+                    choices.append((question_id, correct if hit else self.rng.choice(wrong), hit))
+                score = sum(1 for _, _, hit in choices if hit)
+                percentage = score / len(choices) * 100
+                attempts.append(QuizAttempt(
+                    user_id=student_id, quiz_id=quiz_id, attempt_number=number,
+                    score=score, max_score=len(choices), percentage=percentage,
+                    is_passed=percentage >= self.passing_score[quiz_id],
+                    time_taken_seconds=self.rng.randint(60, 1800), completed_at=self._past(365),
+                ))
+                answered.append(choices)
+
+            with transaction.atomic():
+                attempts = QuizAttempt.objects.bulk_create(attempts, batch_size=self.chunk_size)
+                self._backdate(QuizAttempt, attempts, lambda attempt: {
+                    'started_at': attempt.completed_at - timedelta(seconds=attempt.time_taken_seconds),
+                })
+                answers = UserAnswer.objects.bulk_create([
+                    UserAnswer(attempt_id=attempt.pk, question_id=question_id,
+                               is_correct=hit, points_earned=1 if hit else 0)
+                    for attempt, choices in zip(attempts, answered) for question_id, _, hit in choices
+                ], batch_size=self.chunk_size)
+                options = [option_id for choices in answered for _, option_id, _ in choices]
+                Selection.objects.bulk_create([
+                    Selection(useranswer_id=answer.pk, option_id=option_id)
+                    for answer, option_id in zip(answers, options)
+                ], batch_size=self.chunk_size)
+                # Las respuestas llevan la fecha de envío de su intento, en un solo UPDATE
+                UserAnswer.objects.filter(attempt_id__in=[attempt.pk for attempt in attempts]).update(
+                    answered_at=Subquery(
+                        QuizAttempt.objects.filter(pk=OuterRef('attempt_id')).values('completed_at')[:1]
+                    )
+                )
+
+            self.counts['quizzes.quizattempt'] = self.counts.get('quizzes.quizattempt', 0) + len(attempts)
+            self.counts['quizzes.useranswer'] = self.counts.get('quizzes.useranswer', 0) + len(answers)
+
+    def seed_forum(self):
+        volumes = self.volumes
+        category_ids = self._insert(ForumCategory, (
+            ForumCategory(name=f'Categoría {i + 1}', description='Categoría sintética')
+            for i in range(volumes.forum_categories)
+        ))
+        # Unos pocos estudiantes escriben la mayor parte de los mensajes
+        authors = self.rng.sample(self.student_ids, len(self.student_ids))
+        author_weights = zipf_cum_weights(len(authors), exponent=0.8)
+
+        def author():
+            return authors[bisect.bisect(author_weights, self.rng.random() * author_weights[-1])]
+
+        topic_dates = {}
+
+        def topic_date(topic):
+            created = topic_dates[topic.pk] = self._past(365)
+            return {'created_at': created, 'updated_at': created}
+
+        def reply_date(reply):
+            created = self._between(topic_dates[reply.topic_id])
+            return {'created_at': created, 'updated_at': created}
+
+        self.topic_ids = self._insert(ForumTopic, (
+            ForumTopic(
+                title=f'Tema {i + 1}', content='Contenido del tema. ' * 20,
+                category_id=self.rng.choice(category_ids), author_id=author(),
+                is_pinned=self.rng.random() < 0.01, views_count=int(self.rng.paretovariate(1.2) * 10),
+            )
+            for i in range(volumes.forum_topics)
+        ), dates=topic_date)
+        topics = self.rng.sample(self.topic_ids, len(self.topic_ids))
+        topic_weights = zipf_cum_weights(len(topics))
+        self._insert(ForumReply, (
+            ForumReply(
+                content='Respuesta sintética. ' * 8, author_id=author(),
+                topic_id=topics[bisect.bisect(topic_weights, self.rng.random() * topic_weights[-1])],
+            )
+            for _ in range(volumes.forum_replies)
+        ), dates=reply_date)
+
+    def rebuild_derived_data(self):
+        """Rollups y contadores que las señales habrían mantenido"""
+        from quizzes.analytics import rebuild_quiz_analytics
+        from users.dashboard_service import rebuild_counters
+
+        rebuild_quiz_analytics()
+        rebuild_counters()
+        invalidate_courses_cache(self.course_ids)
+        invalidate_forum_cache()
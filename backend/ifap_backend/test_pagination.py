@@ -0,0 +1,138 @@
+"""
+Tests para la paginación por cursor (keyset)
+"""
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.test.utils import CaptureQueriesContext
+from django.db import connection
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from courses.models import Course
+from notifications.models import Notification
+from tasks.models import Task
+
+User = get_user_model()
+
+
+class KeysetPaginationTest(APITestCase):
+    """Tests de KeysetPagination usando el listado de notificaciones"""
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='keyset_user',
+            email='keyset@example.com',
+            password='testpass123'
+        )
+        self.client.force_authenticate(user=self.user)
+
+        # Varias notificaciones con el mismo timestamp para forzar el desempate por id
+        same_time = timezone.now()
+        for index in range(7):
+            notification = Notification.objects.create(
+                recipient=self.user,
+                message=f'Notificación {index}'
+            )
+            if index < 4:
+                Notification.objects.filter(pk=notification.pk).update(timestamp=same_time)
+
+    def test_iterates_all_pages_without_duplicates(self):
+        """Recorrer todas las páginas devuelve cada elemento una sola vez y en orden"""
+        url = '/api/notifications/?page_size=3'
+        seen = []
+        pages = 0
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertNotIn('count', response.data)
+            seen.extend(item['id'] for item in response.data['results'])
+            url = response.data['next']
+            pages += 1
+
+        expected = list(
+            Notification.objects.filter(recipient=self.user)
+            .order_by('-timestamp', '-id')
+            .values_list('id', flat=True)
+        )
+        self.assertEqual(seen, expected)
+        self.assertEqual(pages, 3)
+
+    def test_previous_link_returns_previous_page(self):
+        """El cursor `previous` devuelve la página anterior"""
+        first = self.client.get('/api/notifications/?page_size=3')
+        self.assertIsNone(first.data['previous'])
+
+        second = self.client.get(first.data['next'])
+        back = self.client.get(second.data['previous'])
+
+        self.assertEqual(
+            [item['id'] for item in back.data['results']],
+            [item['id'] for item in first.data['results']]
+        )
+
+    def test_invalid_cursor(self):
+        """Un cursor mal formado devuelve 400"""
+        response = self.client.get('/api/notifications/?cursor=no-es-un-cursor')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class CachedCountPaginationTest(APITestCase):
+    """Tests del conteo cacheado e invalidado por escrituras"""
+
+    def setUp(self):
+        caches['api'].clear()
+        self.instructor = User.objects.create_user(
+            username='count_instructor',
+            email='count_instructor@example.com',
+            password='testpass123'
+        )
+        self.instructor.set_role('instructor')
+        self.instructor.save()
+        self.course = Course.objects.create(
+            title='Curso conteo',
+            description='Curso para probar conteos',
+            instructor=self.instructor
+        )
+        for index in range(3):
+            self._create_task(f'Tarea {index}')
+        self.client.force_authenticate(user=self.instructor)
+
+    def _create_task(self, title):
+        return Task.objects.create(
+            title=title,
+            description='Descripción',
+            course=self.course,
+            instructor=self.instructor,
+            due_date=timezone.now() + timedelta(days=7)
+        )
+
+    def _count_queries(self, url):
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(url)
+        count_queries = [q for q in context.captured_queries if 'COUNT(' in q['sql'].upper()]
+        return response, len(count_queries)
+
+    def test_count_is_cached_between_requests(self):
+        """La segunda petición con los mismos filtros no ejecuta COUNT"""
+        response, first = self._count_queries('/api/tasks/')
+        self.assertEqual(response.data['count'], 3)
+
+        # Mismos filtros: solo desaparece el COUNT del paginador
+        response, second = self._count_queries('/api/tasks/')
+        self.assertEqual(response.data['count'], 3)
+        self.assertEqual(second, first - 1)
+
+    def test_count_invalidated_on_write(self):
+        """Crear un registro invalida el conteo cacheado"""
+        self.assertEqual(self.client.get('/api/tasks/').data['count'], 3)
+        self._create_task('Tarea nueva')
+        self.assertEqual(self.client.get('/api/tasks/').data['count'], 4)
+
+    def test_count_scoped_by_filters(self):
+        """Cada conjunto de filtros tiene su propio conteo"""
+        self.assertEqual(self.client.get('/api/tasks/').data['count'], 3)
+        response = self.client.get('/api/tasks/', {'status': 'published'})
+        self.assertEqual(response.data['count'], 0)
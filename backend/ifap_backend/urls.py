@@ -13,6 +13,7 @@ from users.views import UserViewSet
 from rest_framework_simplejwt.views import TokenRefreshView
 
 from ifap_backend.views import HealthCheckView
+from ifap_backend.health_views import metrics
 
 
 schema_view = get_schema_view(
@@ -42,6 +43,7 @@ urlpatterns = [
     path('api/library/', include('library.urls')),
     path('api/contact/', include('contact.urls')),
     path('api/health-check/', HealthCheckView.as_view(), name='health_check'),
+    path('metrics', metrics, name='metrics'),
 
     # Swagger UI and ReDoc
     path('swagger/', schema_view.with_ui('swagger', cache_timeout=0), name='schema-swagger-ui'),
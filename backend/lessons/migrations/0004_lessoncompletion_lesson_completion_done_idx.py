@@ -0,0 +1,17 @@
+# Generated by Django 4.2.7 on 2026-10-19 14:32
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('lessons', '0003_lessoncompletion'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='lessoncompletion',
+            index=models.Index(condition=models.Q(('is_completed', True)), fields=['lesson', 'user'], name='lesson_completion_done_idx'),
+        ),
+    ]
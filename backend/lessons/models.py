@@ -29,6 +29,12 @@ class LessonCompletion(models.Model):
     class Meta:
         unique_together = ['user', 'lesson']
         ordering = ['-completed_at']
+        indexes = [
+            # Completados de las lecciones de un curso (métricas y progreso)
+            models.Index(
+                fields=['lesson', 'user'], condition=models.Q(is_completed=True), name='lesson_completion_done_idx'
+            ),
+        ]
 
     def __str__(self):
         return f"{self.user.username} completed {self.lesson.title}"
@@ -0,0 +1,17 @@
+# Generated by Django 4.2.7 on 2026-10-19 14:32
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('library', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='libraryfile',
+            index=models.Index(fields=['visibility', 'course'], name='library_file_visibility_idx'),
+        ),
+    ]
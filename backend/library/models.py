@@ -61,6 +61,9 @@ class LibraryFile(models.Model):
         verbose_name = "Archivo de Biblioteca"
         verbose_name_plural = "Archivos de Biblioteca"
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['visibility', 'course'], name='library_file_visibility_idx'),
+        ]
     
     def __str__(self):
         return self.title
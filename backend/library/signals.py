@@ -0,0 +1,6 @@
+from ifap_backend.pagination import register_count_invalidation
+from .models import LibraryFile, LibraryAccess
+
+
+# Los conteos cacheados del listado de archivos dependen también de los permisos de acceso
+register_count_invalidation(LibraryFile, LibraryAccess, ignore_fields=('download_count',))
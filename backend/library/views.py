@@ -16,6 +16,8 @@ from .serializers import (
     LibraryStatsSerializer
 )
 from users.permissions import IsInstructorOrAdmin, IsOwnerOrInstructorOrAdmin
+from ifap_backend.pagination import LibraryFilePagination
+from ifap_backend.db_routers import read_from_replica
 
 class LibraryCategoryViewSet(viewsets.ModelViewSet):
     queryset = LibraryCategory.objects.all()
@@ -41,6 +43,7 @@ class LibraryFileViewSet(viewsets.ModelViewSet):
     search_fields = ['title', 'description', 'tags']
     ordering_fields = ['title', 'created_at', 'download_count', 'file_size']
     ordering = ['-created_at']
+    pagination_class = LibraryFilePagination
     
     def get_serializer_class(self):
         if self.action in ['create', 'update', 'partial_update']:
@@ -76,13 +79,13 @@ class LibraryFileViewSet(viewsets.ModelViewSet):
         # Archivos propios
         visibility_filter |= Q(uploaded_by=user)
         
-        # Archivos con permisos específicos
+        # Archivos con permisos específicos (subconsulta en vez de JOIN + DISTINCT,
+        # así cada rama del OR puede resolverse por índice)
         visibility_filter |= Q(
-            access_permissions__user=user,
-            access_permissions__can_view=True
+            id__in=LibraryAccess.objects.filter(user=user, can_view=True).values('file_id')
         )
         
-        return queryset.filter(visibility_filter).distinct()
+        return queryset.filter(visibility_filter)
     
     def get_permissions(self):
         if self.action in ['create']:
@@ -178,8 +181,9 @@ class LibraryFileViewSet(viewsets.ModelViewSet):
     @action(detail=False, methods=['get'])
     def favorites(self, request):
         """Archivos favoritos del usuario"""
-        favorites = LibraryFavorite.objects.filter(user=request.user)
-        files = [fav.file for fav in favorites]
+        files = LibraryFile.objects.filter(
+            favorited_by__user=request.user
+        ).order_by('-created_at')
         
         page = self.paginate_queryset(files)
         if page is not None:
@@ -211,6 +215,7 @@ class LibraryFileViewSet(viewsets.ModelViewSet):
         return Response(serializer.data)
     
     @action(detail=False, methods=['get'])
+    @read_from_replica
     def stats(self, request):
         """Estadísticas de la biblioteca"""
         if not request.user.role in ['instructor', 'admin']:
@@ -0,0 +1,88 @@
+"""
+Comando de gestión para archivar notificaciones leídas antiguas.
+Uso: python manage.py archive_notifications [--days 90] [--purge-days 365] [--batch-size 1000] [--dry-run]
+"""
+
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from notifications.models import Notification, ArchivedNotification
+
+
+class Command(BaseCommand):
+    help = 'Mueve las notificaciones leídas antiguas al archivo y purga el archivo vencido'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days',
+            type=int,
+            default=settings.NOTIFICATION_RETENTION_DAYS,
+            help='Antigüedad mínima (días) de las notificaciones leídas a archivar'
+        )
+        parser.add_argument(
+            '--purge-days',
+            type=int,
+            default=settings.NOTIFICATION_ARCHIVE_RETENTION_DAYS,
+            help='Antigüedad (días) a partir de la cual se eliminan del archivo; 0 = no purgar'
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Cantidad de filas por lote'
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Solo mostrar cuántas filas se procesarían'
+        )
+
+    def handle(self, *args, **options):
+        now = timezone.now()
+        cutoff = now - timedelta(days=options['days'])
+        batch_size = options['batch_size']
+
+        candidates = Notification.objects.filter(read=True, timestamp__lt=cutoff)
+
+        if options['dry_run']:
+            self.stdout.write(f'Se archivarían {candidates.count()} notificaciones')
+            if options['purge_days']:
+                purge_cutoff = now - timedelta(days=options['purge_days'])
+                purge = ArchivedNotification.objects.filter(archived_at__lt=purge_cutoff).count()
+                self.stdout.write(f'Se purgarían {purge} notificaciones archivadas')
+            return
+
+        archived = 0
+        while True:
+            with transaction.atomic():
+                batch = list(
+                    candidates.order_by('id').values(
+                        'id', 'recipient_id', 'message', 'timestamp'
+                    )[:batch_size]
+                )
+                if not batch:
+                    break
+
+                ArchivedNotification.objects.bulk_create([
+                    ArchivedNotification(
+                        original_id=row['id'],
+                        recipient_id=row['recipient_id'],
+                        message=row['message'],
+                        timestamp=row['timestamp'],
+                    )
+                    for row in batch
+                ])
+                # Solo leídas: el contador de no leídas no cambia
+                Notification.objects.filter(id__in=[row['id'] for row in batch]).delete()
+            archived += len(batch)
+
+        self.stdout.write(self.style.SUCCESS(f'Notificaciones archivadas: {archived}'))
+
+        if options['purge_days']:
+            purge_cutoff = now - timedelta(days=options['purge_days'])
+            purged, _ = ArchivedNotification.objects.filter(archived_at__lt=purge_cutoff).delete()
+            self.stdout.write(self.style.SUCCESS(f'Notificaciones archivadas purgadas: {purged}'))
@@ -1,9 +1,15 @@
-from django.db import models
+from django.db import models, transaction
+from django.db.models import F
+from django.db.models.functions import Greatest
 from django.conf import settings
-from django.db.models.signals import post_save
+from django.db.models.signals import post_save, post_delete
 from django.dispatch import receiver
+from ifap_backend.cache_service import cache_service, CacheKeys, invalidate_now_and_on_commit
 from .utils import send_notification_to_user
 
+UNREAD_COUNT_CACHE_TIMEOUT = 60 * 10
+
+
 class Notification(models.Model):
     recipient = models.ForeignKey(
         settings.AUTH_USER_MODEL,
@@ -16,12 +22,131 @@ class Notification(models.Model):
 
     class Meta:
         ordering = ['timestamp']
+        indexes = [
+            # Bandeja de entrada: no leídas de un usuario, más recientes primero
+            models.Index(fields=['recipient', 'read', '-timestamp'], name='notif_inbox_idx'),
+            models.Index(fields=['recipient', '-timestamp', '-id'], name='notif_recipient_ts_idx'),
+        ]
 
     def __str__(self):
         return f'Notification for {self.recipient.username}: {self.message[:50]}...'
 
+    @classmethod
+    def mark_read_for(cls, user, ids=None, up_to_id=None):
+        """
+        Marca como leídas las notificaciones del usuario en una sola consulta.
+        Sin `ids` ni `up_to_id` marca todas. Devuelve cuántas cambiaron.
+        """
+        queryset = cls.objects.filter(recipient=user, read=False)
+        if ids is not None:
+            queryset = queryset.filter(id__in=ids)
+        if up_to_id is not None:
+            queryset = queryset.filter(id__lte=up_to_id)
+
+        with transaction.atomic():
+            updated = queryset.update(read=True)
+            if updated:
+                NotificationCounter.decrement(user.id, updated)
+        return updated
+
+
+class NotificationCounter(models.Model):
+    """Contador de notificaciones no leídas por usuario (espejo en cache)"""
+    user = models.OneToOneField(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='notification_counter'
+    )
+    unread_count = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = 'Contador de notificaciones'
+        verbose_name_plural = 'Contadores de notificaciones'
+
+    def __str__(self):
+        return f'{self.user_id}: {self.unread_count} sin leer'
+
+    @staticmethod
+    def cache_key(user_id):
+        return cache_service.make_key(CacheKeys.NOTIFICATION_COUNT, user_id)
+
+    @classmethod
+    def _invalidate_cache(cls, user_id):
+        invalidate_now_and_on_commit(cache_service.delete, cls.cache_key(user_id), 'api')
+
+    @classmethod
+    def _recount(cls, user_id):
+        """Crea o corrige el contador a partir de la tabla de notificaciones"""
+        count = Notification.objects.filter(recipient_id=user_id, read=False).count()
+        cls.objects.update_or_create(user_id=user_id, defaults={'unread_count': count})
+        return count
+
+    @classmethod
+    def increment(cls, user_id, amount=1):
+        updated = cls.objects.filter(user_id=user_id).update(
+            unread_count=F('unread_count') + amount
+        )
+        if not updated:
+            cls._recount(user_id)
+        cls._invalidate_cache(user_id)
+
+    @classmethod
+    def decrement(cls, user_id, amount=1):
+        # Sin fila no hay nada que corregir: se recalcula en la próxima lectura
+        cls.objects.filter(user_id=user_id).update(
+            unread_count=Greatest(F('unread_count') - amount, 0)
+        )
+        cls._invalidate_cache(user_id)
+
+    @classmethod
+    def get_unread_count(cls, user_id):
+        """Lectura del contador: cache primero y después la fila del contador"""
+        key = cls.cache_key(user_id)
+        count = cache_service.get(key, cache_alias='api')
+        if count is not None:
+            return count
+
+        count = cls.objects.filter(user_id=user_id).values_list('unread_count', flat=True).first()
+        if count is None:
+            count = cls._recount(user_id)
+        cache_service.set(key, count, UNREAD_COUNT_CACHE_TIMEOUT, cache_alias='api')
+        return count
+
+
+class ArchivedNotification(models.Model):
+    """Notificaciones leídas antiguas retiradas de la bandeja de entrada"""
+    original_id = models.BigIntegerField(db_index=True)
+    recipient = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='archived_notifications'
+    )
+    message = models.TextField()
+    timestamp = models.DateTimeField()
+    archived_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['-timestamp']
+        indexes = [
+            models.Index(fields=['recipient', '-timestamp'], name='notif_archive_recipient_idx'),
+            models.Index(fields=['archived_at'], name='notif_archive_date_idx'),
+        ]
+
+    def __str__(self):
+        return f'Archived notification for {self.recipient_id}: {self.message[:50]}...'
+
 
 @receiver(post_save, sender=Notification)
 def notify_user(sender, instance, created, **kwargs):
     if created:
+        if not instance.read:
+            NotificationCounter.increment(instance.recipient_id)
         send_notification_to_user(instance.recipient.id, instance.message)
+
+
+@receiver(post_delete, sender=Notification)
+def update_counter_on_delete(sender, instance, **kwargs):
+    if not instance.read:
+        NotificationCounter.decrement(instance.recipient_id)
@@ -4,4 +4,23 @@ from .models import Notification
 class NotificationSerializer(serializers.ModelSerializer):
     class Meta:
         model = Notification
-        fields = ['id', 'recipient', 'message', 'timestamp', 'read']
\ No newline at end of file
+        fields = ['id', 'recipient', 'message', 'timestamp', 'read']
+
+
+class NotificationMarkReadSerializer(serializers.Serializer):
+    """Parámetros para marcar notificaciones como leídas en bloque"""
+    all = serializers.BooleanField(required=False, default=False)
+    up_to_id = serializers.IntegerField(required=False, min_value=1)
+    ids = serializers.ListField(
+        child=serializers.IntegerField(min_value=1),
+        required=False,
+        allow_empty=False,
+        max_length=500
+    )
+
+    def validate(self, attrs):
+        if not attrs.get('all') and 'up_to_id' not in attrs and 'ids' not in attrs:
+            raise serializers.ValidationError(
+                'Debe indicar all=true, up_to_id o ids'
+            )
+        return attrs
@@ -1,3 +1,197 @@
+from datetime import timedelta
+from io import StringIO
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.core.management import call_command
+from django.db import transaction
 from django.test import TestCase
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from .models import Notification, NotificationCounter, ArchivedNotification
+from .utils import notification_batch
+
+User = get_user_model()
+
+
+class NotificationCounterTest(TestCase):
+    def setUp(self):
+        caches['api'].clear()
+        self.user = User.objects.create_user(
+            username='counter_user',
+            email='counter@test.com',
+            password='testpass123'
+        )
+
+    def test_counter_follows_create_and_read(self):
+        notifications = [
+            Notification.objects.create(recipient=self.user, message=f'Mensaje {i}')
+            for i in range(3)
+        ]
+        self.assertEqual(NotificationCounter.get_unread_count(self.user.id), 3)
+
+        Notification.mark_read_for(self.user, up_to_id=notifications[1].id)
+        self.assertEqual(NotificationCounter.get_unread_count(self.user.id), 1)
+
+        # Marcar otra vez las mismas no descuenta de nuevo
+        Notification.mark_read_for(self.user, up_to_id=notifications[1].id)
+        self.assertEqual(NotificationCounter.get_unread_count(self.user.id), 1)
+
+        notifications[2].delete()
+        self.assertEqual(NotificationCounter.get_unread_count(self.user.id), 0)
+
+    def test_counter_rebuilt_when_missing(self):
+        Notification.objects.create(recipient=self.user, message='Mensaje')
+        NotificationCounter.objects.all().delete()
+        caches['api'].clear()
+        self.assertEqual(NotificationCounter.get_unread_count(self.user.id), 1)
+
+
+class NotificationInboxAPITest(APITestCase):
+    def setUp(self):
+        caches['api'].clear()
+        self.user = User.objects.create_user(
+            username='inbox_user',
+            email='inbox@test.com',
+            password='testpass123'
+        )
+        self.other = User.objects.create_user(
+            username='other_user',
+            email='other@test.com',
+            password='testpass123'
+        )
+        self.notifications = [
+            Notification.objects.create(recipient=self.user, message=f'Mensaje {i}')
+            for i in range(4)
+        ]
+        self.client.force_authenticate(user=self.user)
+
+    def test_unread_count(self):
+        response = self.client.get('/api/notifications/unread-count/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['unread_count'], 4)
+
+    def test_mark_read_up_to_id(self):
+        response = self.client.post(
+            '/api/notifications/mark-read/',
+            {'up_to_id': self.notifications[1].id},
+            format='json'
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['updated'], 2)
+        self.assertEqual(response.data['unread_count'], 2)
+
+    def test_mark_all_read(self):
+        response = self.client.post('/api/notifications/mark-read/', {'all': True}, format='json')
+        self.assertEqual(response.data['updated'], 4)
+        self.assertEqual(response.data['unread_count'], 0)
+        self.assertFalse(Notification.objects.filter(recipient=self.user, read=False).exists())
+
+    def test_mark_read_requires_scope(self):
+        response = self.client.post('/api/notifications/mark-read/', {}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_list_filters_unread(self):
+        Notification.mark_read_for(self.user, ids=[self.notifications[0].id])
+        response = self.client.get('/api/notifications/', {'read': 'false'})
+        self.assertEqual(len(response.data['results']), 3)
+
+    def test_mark_as_read_ignores_request_body(self):
+        notification = self.notifications[0]
+        response = self.client.patch(
+            f'/api/notifications/{notification.id}/mark-as-read/',
+            {'read': False, 'message': 'Editado'},
+            format='json'
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.data['read'])
+        notification.refresh_from_db()
+        self.assertTrue(notification.read)
+        self.assertEqual(notification.message, 'Mensaje 0')
+        self.assertEqual(NotificationCounter.get_unread_count(self.user.id), 3)
+
+    def test_cannot_mark_other_users_notification(self):
+        foreign = Notification.objects.create(recipient=self.other, message='Ajena')
+        response = self.client.patch(f'/api/notifications/{foreign.id}/mark-as-read/', {}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+        foreign.refresh_from_db()
+        self.assertFalse(foreign.read)
+
+
+class ArchiveNotificationsCommandTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='archive_user',
+            email='archive@test.com',
+            password='testpass123'
+        )
+
+    def test_archives_only_old_read_notifications(self):
+        old_read = Notification.objects.create(recipient=self.user, message='Vieja leída')
+        old_unread = Notification.objects.create(recipient=self.user, message='Vieja sin leer')
+        recent_read = Notification.objects.create(recipient=self.user, message='Reciente leída')
+        Notification.mark_read_for(self.user, ids=[old_read.id, recent_read.id])
+        Notification.objects.filter(id__in=[old_read.id, old_unread.id]).update(
+            timestamp=timezone.now() - timedelta(days=200)
+        )
+
+        call_command('archive_notifications', days=90, purge_days=0, stdout=StringIO())
+
+        self.assertFalse(Notification.objects.filter(id=old_read.id).exists())
+        self.assertTrue(Notification.objects.filter(id=old_unread.id).exists())
+        self.assertTrue(Notification.objects.filter(id=recent_read.id).exists())
+        self.assertTrue(ArchivedNotification.objects.filter(original_id=old_read.id).exists())
+        self.assertEqual(NotificationCounter.get_unread_count(self.user.id), 1)
+
+
+class NotificationDeliveryTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='push_user',
+            email='push@test.com',
+            password='testpass123'
+        )
+        self.other = User.objects.create_user(
+            username='push_other',
+            email='push_other@test.com',
+            password='testpass123'
+        )
+
+    @patch('notifications.utils.dispatch_events')
+    def test_pushes_are_coalesced_per_user(self, mock_dispatch):
+        with notification_batch():
+            with self.captureOnCommitCallbacks(execute=True):
+                for i in range(3):
+                    Notification.objects.create(recipient=self.user, message=f'Mensaje {i}')
+                Notification.objects.create(recipient=self.other, message='Otro')
+
+        mock_dispatch.assert_called_once()
+        events = dict(mock_dispatch.call_args[0][0])
+        self.assertEqual(events[f'user_{self.user.id}']['count'], 3)
+        self.assertEqual(events[f'user_{self.user.id}']['message'], 'Mensaje 2')
+        self.assertEqual(events[f'user_{self.other.id}']['count'], 1)
+
+    @patch('notifications.utils.dispatch_events')
+    def test_no_push_for_rolled_back_rows(self, mock_dispatch):
+        with self.captureOnCommitCallbacks(execute=True):
+            try:
+                with transaction.atomic():
+                    Notification.objects.create(recipient=self.user, message='Revertida')
+                    raise RuntimeError('rollback')
+            except RuntimeError:
+                pass
+
+        mock_dispatch.assert_not_called()
+
+    @patch('notifications.utils.dispatch_events')
+    def test_push_waits_for_commit(self, mock_dispatch):
+        with self.captureOnCommitCallbacks(execute=False) as callbacks:
+            Notification.objects.create(recipient=self.user, message='Pendiente')
+            mock_dispatch.assert_not_called()
 
-# Create your tests here.
+        for callback in callbacks:
+            callback()
+        mock_dispatch.assert_called_once()
@@ -1,7 +1,12 @@
 from django.urls import path
-from .views import NotificationListView, NotificationMarkAsReadView
+from .views import (
+    NotificationListView, NotificationMarkAsReadView,
+    NotificationUnreadCountView, NotificationMarkReadView
+)
 
 urlpatterns = [
     path('', NotificationListView.as_view(), name='notification-list'),
+    path('unread-count/', NotificationUnreadCountView.as_view(), name='notification-unread-count'),
+    path('mark-read/', NotificationMarkReadView.as_view(), name='notification-mark-read'),
     path('<int:id>/mark-as-read/', NotificationMarkAsReadView.as_view(), name='notification-mark-as-read'),
-]
\ No newline at end of file
+]
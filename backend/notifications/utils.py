@@ -1,18 +1,101 @@
 from channels.layers import get_channel_layer
 from asgiref.sync import async_to_sync
-import json
+from contextlib import contextmanager
+from contextvars import ContextVar
+from django.db import transaction
+import asyncio
+import logging
 
-def send_notification_to_user(user_id, message):
+logger = logging.getLogger('notifications')
+
+# Lote activo de envíos en tiempo real (por petición o bloque `notification_batch`)
+_current_batch = ContextVar('notification_batch', default=None)
+
+
+class NotificationBatch:
+    """Agrupa los envíos por usuario para despacharlos en un solo lote"""
+
+    def __init__(self):
+        self.messages = {}
+
+    def add(self, user_id, message):
+        self.messages.setdefault(user_id, []).append(message)
+
+    def build_events(self):
+        """Un único frame por usuario con el último mensaje y el total"""
+        return [
+            (
+                f'user_{user_id}',
+                {
+                    'type': 'send_notification',
+                    'message': messages[-1],
+                    'messages': messages,
+                    'count': len(messages),
+                },
+            )
+            for user_id, messages in self.messages.items()
+        ]
+
+
+async def _group_send_many(channel_layer, events):
+    results = await asyncio.gather(
+        *(channel_layer.group_send(group, event) for group, event in events),
+        return_exceptions=True
+    )
+    return [result for result in results if isinstance(result, Exception)]
+
+
+def dispatch_events(events):
+    """Envía todos los eventos al channel layer en una sola llamada concurrente"""
+    if not events:
+        return
     channel_layer = get_channel_layer()
-    group_name = f'user_{user_id}'
+    if channel_layer is None:
+        return
     try:
-        async_to_sync(channel_layer.group_send)(
-            group_name,
-            {
-                'type': 'send_notification',
-                'message': message
-            }
+        errors = async_to_sync(_group_send_many)(channel_layer, events)
+    except Exception as e:
+        logger.warning(f"No se pudieron enviar {len(events)} notificaciones en tiempo real: {e}")
+        return
+    if errors:
+        logger.warning(
+            f"Fallaron {len(errors)} de {len(events)} envíos en tiempo real: {errors[0]}"
         )
-    except Exception:
-        # In test/dev without channel layer, skip realtime push.
+
+
+def _deliver(user_id, message):
+    batch = _current_batch.get()
+    if batch is not None:
+        batch.add(user_id, message)
+        return
+    single = NotificationBatch()
+    single.add(user_id, message)
+    dispatch_events(single.build_events())
+
+
+@contextmanager
+def notification_batch():
+    """
+    Acumula los envíos hechos dentro del bloque y los despacha al salir,
+    agrupados por usuario. Los bloques anidados reutilizan el lote externo.
+    """
+    if _current_batch.get() is not None:
+        yield _current_batch.get()
         return
+
+    batch = NotificationBatch()
+    token = _current_batch.set(batch)
+    try:
+        yield batch
+    finally:
+        _current_batch.reset(token)
+        dispatch_events(batch.build_events())
+
+
+def send_notification_to_user(user_id, message):
+    """
+    Programa el envío en tiempo real para después del commit. Si la
+    transacción se revierte no se envía nada; dentro de `notification_batch`
+    los envíos se agrupan por usuario.
+    """
+    transaction.on_commit(lambda: _deliver(user_id, message))
@@ -1,21 +1,68 @@
-from rest_framework import generics
+from rest_framework import generics, status
 from rest_framework.permissions import IsAuthenticated
-from .models import Notification
-from .serializers import NotificationSerializer
+from rest_framework.response import Response
+from rest_framework.views import APIView
+from .models import Notification, NotificationCounter
+from .serializers import NotificationSerializer, NotificationMarkReadSerializer
+from ifap_backend.pagination import NotificationPagination
 
 class NotificationListView(generics.ListAPIView):
     serializer_class = NotificationSerializer
     permission_classes = [IsAuthenticated]
+    pagination_class = NotificationPagination
 
     def get_queryset(self):
-        return Notification.objects.filter(recipient=self.request.user).order_by('-timestamp')
+        queryset = Notification.objects.filter(recipient=self.request.user)
+
+        # ?read=false usa el índice (recipient, read, -timestamp)
+        read = self.request.query_params.get('read')
+        if read is not None:
+            queryset = queryset.filter(read=read.lower() in ('1', 'true', 'yes'))
+
+        return queryset.order_by('-timestamp', '-id')
 
 class NotificationMarkAsReadView(generics.UpdateAPIView):
     serializer_class = NotificationSerializer
     permission_classes = [IsAuthenticated]
-    queryset = Notification.objects.all()
     lookup_field = 'id'
 
-    def perform_update(self, serializer):
-        serializer.instance.read = True
-        serializer.save()
+    def get_queryset(self):
+        return Notification.objects.filter(recipient=self.request.user)
+
+    def update(self, request, *args, **kwargs):
+        # Solo marca como leída: el cuerpo del request se ignora para no
+        # desincronizar el contador con campos escritos por el cliente
+        notification = self.get_object()
+        Notification.mark_read_for(request.user, ids=[notification.id])
+        notification.read = True
+        return Response(self.get_serializer(notification).data)
+
+class NotificationUnreadCountView(APIView):
+    """Contador de notificaciones no leídas (badge)"""
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        return Response({'unread_count': NotificationCounter.get_unread_count(request.user.id)})
+
+class NotificationMarkReadView(APIView):
+    """Marcar como leídas todas, hasta un id o una lista de ids"""
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request):
+        serializer = NotificationMarkReadSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        data = serializer.validated_data
+
+        if data.get('all'):
+            updated = Notification.mark_read_for(request.user)
+        else:
+            updated = Notification.mark_read_for(
+                request.user,
+                ids=data.get('ids'),
+                up_to_id=data.get('up_to_id')
+            )
+
+        return Response({
+            'updated': updated,
+            'unread_count': NotificationCounter.get_unread_count(request.user.id)
+        }, status=status.HTTP_200_OK)
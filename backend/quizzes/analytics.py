@@ -0,0 +1,243 @@
+"""
+Rollups de analítica de quizzes.
+
+- `QuizStats`: intentos, aprobados, media de porcentaje y de tiempo e
+  histograma de puntuaciones por quiz.
+- `QuestionStats` / `OptionStats`: dificultad, discriminación y
+  distribución de distractores por pregunta.
+- `UserQuizStats`: agregados de intentos finalizados por usuario.
+
+Se actualizan de forma incremental al finalizar cada intento
+(`record_attempt`) y se pueden reconstruir desde el historial completo con
+`rebuild_quiz_analytics`, que trabaja con consultas agrupadas en lugar de
+recorrer los intentos uno a uno.
+"""
+import logging
+
+from django.db import transaction
+from django.db.models import Count, F, Max, Q, Sum
+from django.db.models.functions import Floor
+
+from .models import (
+    QuizAttempt, UserAnswer, QuizStats, QuestionStats, OptionStats, UserQuizStats
+)
+
+logger = logging.getLogger(__name__)
+
+BUCKETS = QuizStats.HISTOGRAM_BUCKETS
+
+
+def histogram_bucket(percentage):
+    """Tramo del histograma (0-9) para un porcentaje entre 0 y 100"""
+    return min(max(int((percentage or 0) // 10), 0), BUCKETS - 1)
+
+
+def _empty_histogram():
+    return [0] * BUCKETS
+
+
+def histogram_labels():
+    return [f'{i * 10}-{i * 10 + 10}' for i in range(BUCKETS)]
+
+
+# --- Actualización incremental ---
+
+def record_attempt_started(attempt):
+    """Cuenta un intento nuevo en el rollup de su quiz"""
+    QuizStats.objects.get_or_create(quiz_id=attempt.quiz_id, defaults={'score_histogram': _empty_histogram()})
+    QuizStats.objects.filter(quiz_id=attempt.quiz_id).update(started_count=F('started_count') + 1)
+
+
+def record_attempt(attempt):
+    """
+    Suma un intento finalizado a los rollups. Debe llamarse una sola vez por
+    intento, justo después de guardar su resultado.
+    """
+    if attempt.completed_at is None:
+        return
+
+    percentage = attempt.percentage or 0
+    time_taken = attempt.time_taken_seconds or 0
+    passed = 1 if attempt.is_passed else 0
+
+    answers = list(
+        UserAnswer.objects.filter(attempt=attempt).values_list('question_id', 'is_correct')
+    )
+    selected = list(
+        UserAnswer.selected_options.through.objects.filter(
+            useranswer__attempt=attempt
+        ).values_list('option_id', flat=True)
+    )
+
+    with transaction.atomic():
+        stats, _ = QuizStats.objects.select_for_update().get_or_create(
+            quiz_id=attempt.quiz_id, defaults={'score_histogram': _empty_histogram()}
+        )
+        histogram = list(stats.score_histogram) or _empty_histogram()
+        histogram[histogram_bucket(percentage)] += 1
+        stats.completed_count = F('completed_count') + 1
+        stats.passed_count = F('passed_count') + passed
+        stats.percentage_sum = F('percentage_sum') + percentage
+        stats.time_sum_seconds = F('time_sum_seconds') + time_taken
+        stats.score_histogram = histogram
+        stats.save()
+
+        UserQuizStats.objects.get_or_create(user_id=attempt.user_id)
+        UserQuizStats.objects.filter(user_id=attempt.user_id).update(
+            completed_count=F('completed_count') + 1,
+            passed_count=F('passed_count') + passed,
+            percentage_sum=F('percentage_sum') + percentage,
+            time_sum_seconds=F('time_sum_seconds') + time_taken,
+            last_completed_at=attempt.completed_at,
+        )
+
+        if answers:
+            QuestionStats.objects.bulk_create(
+                [QuestionStats(question_id=question_id) for question_id, _ in answers],
+                ignore_conflicts=True
+            )
+            # Una actualización por grupo (aciertos / fallos) en lugar de una por pregunta
+            for is_correct in (True, False):
+                ids = [question_id for question_id, correct in answers if bool(correct) == is_correct]
+                if not ids:
+                    continue
+                QuestionStats.objects.filter(question_id__in=ids).update(
+                    answers_count=F('answers_count') + 1,
+                    correct_count=F('correct_count') + (1 if is_correct else 0),
+                    percentage_sum=F('percentage_sum') + percentage,
+                    percentage_sq_sum=F('percentage_sq_sum') + percentage * percentage,
+                    correct_percentage_sum=F('correct_percentage_sum') + (percentage if is_correct else 0),
+                )
+
+        if selected:
+            OptionStats.objects.bulk_create(
+                [OptionStats(option_id=option_id) for option_id in selected],
+                ignore_conflicts=True
+            )
+            OptionStats.objects.filter(option_id__in=selected).update(
+                selected_count=F('selected_count') + 1
+            )
+
+
+# --- Reconstrucción completa ---
+
+def rebuild_quiz_analytics(quiz_ids=None):
+    """
+    Recalcula todos los rollups (o los de `quiz_ids`) desde el historial de
+    intentos. Cada tabla sale de una consulta agrupada. Devuelve cuántas filas
+    se generaron por tabla.
+    """
+    attempts = QuizAttempt.objects.all()
+    if quiz_ids:
+        attempts = attempts.filter(quiz_id__in=quiz_ids)
+    completed = attempts.filter(completed_at__isnull=False)
+    answers = UserAnswer.objects.filter(attempt__in=completed)
+    Selection = UserAnswer.selected_options.through
+
+    quiz_rows = attempts.order_by().values('quiz_id').annotate(
+        started=Count('id'),
+        completed=Count('id', filter=Q(completed_at__isnull=False)),
+        passed=Count('id', filter=Q(completed_at__isnull=False, is_passed=True)),
+        percentage_total=Sum('percentage', filter=Q(completed_at__isnull=False)),
+        time_total=Sum('time_taken_seconds', filter=Q(completed_at__isnull=False)),
+    )
+    # 100% cae en el tramo 10 y se suma al último al recorrer las filas
+    histogram_rows = completed.order_by().annotate(
+        bucket=Floor(F('percentage') / 10)
+    ).values('quiz_id', 'bucket').annotate(total=Count('id'))
+
+    percentage = F('attempt__percentage')
+    question_rows = answers.order_by().values('question_id').annotate(
+        answered=Count('id'),
+        correct=Count('id', filter=Q(is_correct=True)),
+        percentage_total=Sum(percentage),
+        percentage_sq_total=Sum(percentage * percentage),
+        correct_percentage_total=Sum(percentage, filter=Q(is_correct=True)),
+    )
+    option_rows = Selection.objects.filter(
+        useranswer__in=answers
+    ).order_by().values('option_id').annotate(total=Count('id'))
+
+    histograms = {}
+    for row in histogram_rows:
+        histogram = histograms.setdefault(row['quiz_id'], _empty_histogram())
+        histogram[histogram_bucket(row['bucket'] * 10)] += row['total']
+
+    quiz_stats = [
+        QuizStats(
+            quiz_id=row['quiz_id'],
+            started_count=row['started'],
+            completed_count=row['completed'],
+            passed_count=row['passed'],
+            percentage_sum=row['percentage_total'] or 0,
+            time_sum_seconds=row['time_total'] or 0,
+            score_histogram=histograms.get(row['quiz_id'], _empty_histogram()),
+        )
+        for row in quiz_rows
+    ]
+    question_stats = [
+        QuestionStats(
+            question_id=row['question_id'],
+            answers_count=row['answered'],
+            correct_count=row['correct'],
+            percentage_sum=row['percentage_total'] or 0,
+            percentage_sq_sum=row['percentage_sq_total'] or 0,
+            correct_percentage_sum=row['correct_percentage_total'] or 0,
+        )
+        for row in question_rows
+    ]
+    option_stats = [
+        OptionStats(option_id=row['option_id'], selected_count=row['total'])
+        for row in option_rows
+    ]
+
+    with transaction.atomic():
+        quiz_filter = Q(quiz_id__in=quiz_ids) if quiz_ids else Q()
+        QuizStats.objects.filter(quiz_filter).delete()
+        QuestionStats.objects.filter(
+            Q(question__quiz_id__in=quiz_ids) if quiz_ids else Q()
+        ).delete()
+        OptionStats.objects.filter(
+            Q(option__question__quiz_id__in=quiz_ids) if quiz_ids else Q()
+        ).delete()
+        QuizStats.objects.bulk_create(quiz_stats, batch_size=500)
+        QuestionStats.objects.bulk_create(question_stats, batch_size=500)
+        OptionStats.objects.bulk_create(option_stats, batch_size=500)
+
+        user_count = None
+        if not quiz_ids:
+            # Los agregados por usuario abarcan todos los quizzes
+            user_count = _rebuild_user_stats()
+
+    result = {
+        'quizzes': len(quiz_stats),
+        'questions': len(question_stats),
+        'options': len(option_stats),
+    }
+    if user_count is not None:
+        result['users'] = user_count
+    logger.info(f"Rollups de quizzes reconstruidos: {result}")
+    return result
+
+
+def _rebuild_user_stats():
+    rows = list(QuizAttempt.objects.filter(completed_at__isnull=False).order_by().values('user_id').annotate(
+        completed=Count('id'),
+        passed=Count('id', filter=Q(is_passed=True)),
+        percentage_total=Sum('percentage'),
+        time_total=Sum('time_taken_seconds'),
+        last=Max('completed_at'),
+    ))
+    UserQuizStats.objects.all().delete()
+    UserQuizStats.objects.bulk_create([
+        UserQuizStats(
+            user_id=row['user_id'],
+            completed_count=row['completed'],
+            passed_count=row['passed'],
+            percentage_sum=row['percentage_total'] or 0,
+            time_sum_seconds=row['time_total'] or 0,
+            last_completed_at=row['last'],
+        )
+        for row in rows
+    ], batch_size=500)
+    return len(rows)
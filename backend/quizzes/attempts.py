@@ -0,0 +1,221 @@
+"""
+Ciclo de vida de los intentos de quiz.
+
+`start_attempt` crea el intento con un único INSERT ... SELECT condicional
+que, en la misma sentencia, calcula el siguiente `attempt_number` y
+comprueba que no haya un intento abierto ni se haya alcanzado
+`max_attempts`. Si dos inicios simultáneos calculan el mismo número, la
+restricción única (usuario, quiz, número) rechaza al segundo, que devuelve
+el intento del primero. Con `client_request_id` el inicio es idempotente:
+repetir la petición (doble clic, reintento de red) devuelve el mismo
+intento.
+
+Como el INSERT no pasa por `save()`, la señal `post_save` se envía aquí
+(notificación y rollup de intentos iniciados).
+
+`grade_attempt` califica y cierra un intento con las respuestas dadas de una
+vez: toma la clave de respuestas del payload de preguntas cacheado (ver
+`delivery.py`) y crea las respuestas con `bulk_create`. Las preguntas sin
+responder cuentan como incorrectas.
+
+`quiz_payload` sirve el quiz serializado desde cache, por versión del quiz
+y de su curso, en la variante para estudiantes (sin `is_correct`).
+"""
+from datetime import timedelta
+
+from django.db import IntegrityError, connections, router, transaction
+from django.db.models import Q
+from django.db.models.signals import post_save
+from django.utils import timezone
+
+from ifap_backend.cache_service import CacheKeys, cache_service, get_course_version, get_quiz_version
+from .analytics import record_attempt
+from .delivery import answer_key, new_shuffle_seed, student_questions
+from .models import QuizAttempt, UserAnswer
+
+START_RETRIES = 3
+QUIZ_PAYLOAD_TIMEOUT = 60 * 60
+CLIENT_REQUEST_ID_MAX_LENGTH = QuizAttempt._meta.get_field('client_request_id').max_length
+
+
+class AttemptError(ValueError):
+    """No se puede iniciar o finalizar el intento"""
+
+
+class MaxAttemptsReached(AttemptError):
+    """El usuario ya usó todos los intentos del quiz"""
+
+
+AUTO_GRADED_TYPES = ('multiple_choice', 'true_false')
+
+
+def deadline_for(quiz, start=None):
+    """Fin del tiempo de un intento de `quiz` que empieza en `start` (None si no hay límite)"""
+    if not quiz.time_limit_minutes:
+        return None
+    return (start or timezone.now()) + timedelta(minutes=quiz.time_limit_minutes)
+
+
+def open_attempt(quiz, user, lock=False):
+    """Intento en curso más reciente de `user` en `quiz` (bloqueado si `lock`)"""
+    attempts = QuizAttempt.objects.filter(user=user, quiz=quiz, completed_at__isnull=True)
+    if lock:
+        attempts = attempts.select_for_update()
+    attempt = attempts.order_by('-attempt_number').first()
+    if attempt is not None:
+        attempt.quiz = quiz
+    return attempt
+
+
+def _insert_attempt(attempt, max_attempts):
+    """
+    INSERT condicional de `attempt` con el siguiente número de intento.
+    Devuelve (id, attempt_number) o None si hay un intento abierto, se
+    alcanzó el máximo o la restricción única rechazó la fila.
+    """
+    using = router.db_for_write(QuizAttempt)
+    connection = connections[using]
+    qn = connection.ops.quote_name
+    meta = QuizAttempt._meta
+    number = meta.get_field('attempt_number')
+    fields = [field for field in meta.concrete_fields if not field.primary_key]
+
+    # En PostgreSQL los parámetros de un INSERT ... SELECT no toman el tipo de la columna
+    typed = connection.vendor == 'postgresql'
+    columns, values, params = [], [], []
+    for field in fields:
+        columns.append(qn(field.column))
+        if field is number:
+            values.append('s.last_number + 1')
+        else:
+            values.append(f'CAST(%s AS {field.db_type(connection)})' if typed else '%s')
+            params.append(field.get_db_prep_save(field.pre_save(attempt, add=True), connection))
+
+    sql = (
+        f"INSERT INTO {qn(meta.db_table)} ({', '.join(columns)}) "
+        f"SELECT {', '.join(values)} FROM ("
+        f"SELECT COUNT(*) AS total, COUNT({qn(meta.get_field('completed_at').column)}) AS completed, "
+        f"COALESCE(MAX({qn(number.column)}), 0) AS last_number FROM {qn(meta.db_table)} "
+        f"WHERE {qn(meta.get_field('user').column)} = %s AND {qn(meta.get_field('quiz').column)} = %s"
+        f") s WHERE s.total = s.completed AND (%s = 0 OR s.total < %s)"
+    )
+    params += [attempt.user_id, attempt.quiz_id, max_attempts, max_attempts]
+    returning = connection.features.can_return_columns_from_insert
+    if returning:
+        sql += f" RETURNING {qn(meta.pk.column)}, {qn(number.column)}"
+
+    try:
+        with transaction.atomic(using=using), connection.cursor() as cursor:
+            cursor.execute(sql, params)
+            if returning:
+                return cursor.fetchone()
+            if cursor.rowcount != 1:
+                return None
+    except IntegrityError:
+        return None
+    return QuizAttempt.objects.filter(
+        user_id=attempt.user_id, quiz_id=attempt.quiz_id, completed_at__isnull=True
+    ).order_by('-attempt_number').values_list('pk', 'attempt_number').first()
+
+
+def _existing_attempt(quiz, user, client_request_id):
+    """El intento de la misma petición o, si no, el intento abierto"""
+    condition = Q(completed_at__isnull=True)
+    if client_request_id:
+        condition |= Q(client_request_id=client_request_id)
+    candidates = list(QuizAttempt.objects.filter(condition, user=user, quiz=quiz).order_by('-attempt_number'))
+    for attempt in candidates:
+        if client_request_id and attempt.client_request_id == client_request_id:
+            return attempt
+    return candidates[0] if candidates else None
+
+
+def start_attempt(quiz, user, client_request_id=None):
+    """
+    Inicia (o retoma) el intento de `user` en `quiz`. Devuelve
+    (intento, creado). Lanza `MaxAttemptsReached` si no quedan intentos.
+    """
+    client_request_id = client_request_id or None
+    for _ in range(START_RETRIES):
+        attempt = QuizAttempt(
+            user=user, quiz=quiz, client_request_id=client_request_id,
+            deadline_at=deadline_for(quiz), shuffle_seed=new_shuffle_seed(quiz)
+        )
+        row = _insert_attempt(attempt, quiz.max_attempts)
+        if row is not None:
+            attempt.pk, attempt.attempt_number = row
+            attempt._state.adding = False
+            attempt._state.db = router.db_for_write(QuizAttempt)
+            post_save.send(sender=QuizAttempt, instance=attempt, created=True, update_fields=None,
+                           raw=False, using=attempt._state.db)
+            return attempt, True
+
+        existing = _existing_attempt(quiz, user, client_request_id)
+        if existing is not None:
+            return existing, False
+        if quiz.max_attempts and QuizAttempt.objects.filter(user=user, quiz=quiz).count() >= quiz.max_attempts:
+            raise MaxAttemptsReached('Has alcanzado el máximo número de intentos permitidos')
+        # El intento abierto que bloqueó el INSERT se finalizó entretanto: reintentar
+    raise AttemptError('No se pudo iniciar el intento, inténtalo de nuevo')
+
+
+def grade_attempt(attempt, answers, completed_at=None):
+    """
+    Califica `answers` ({question_id: (opciones elegidas, texto)}) y finaliza
+    `attempt`. Las respuestas a preguntas de otro quiz se ignoran.
+    """
+    answers = {int(question_id): answer for question_id, answer in answers.items()}
+
+    total_score = 0
+    max_score = 0
+    graded = []
+    for question_id, (question_type, points, option_ids, correct) in answer_key(attempt.quiz_id).items():
+        max_score += points
+        if question_id not in answers:
+            continue
+        selected_ids, text_answer = answers[question_id]
+        selected = {option_id for option_id in selected_ids or [] if option_id in option_ids}
+
+        user_answer = UserAnswer(attempt=attempt, question_id=question_id, text_answer=text_answer or '')
+        if question_type in AUTO_GRADED_TYPES:
+            user_answer.is_correct = selected == correct
+            user_answer.points_earned = points if user_answer.is_correct else 0
+            total_score += user_answer.points_earned
+        # Ensayo y respuesta corta: calificación manual
+        graded.append((user_answer, selected))
+
+    UserAnswer.objects.bulk_create([user_answer for user_answer, _ in graded])
+    Selection = UserAnswer.selected_options.through
+    Selection.objects.bulk_create([
+        Selection(useranswer_id=user_answer.id, option_id=option_id)
+        for user_answer, selected in graded
+        for option_id in sorted(selected)
+    ])
+
+    attempt.score = total_score
+    attempt.max_score = max_score
+    attempt.percentage = (total_score / max_score * 100) if max_score > 0 else 0
+    attempt.is_passed = attempt.percentage >= attempt.quiz.passing_score
+    attempt.completed_at = completed_at or timezone.now()
+    attempt.time_taken_seconds = max(int((attempt.completed_at - attempt.started_at).total_seconds()), 0)
+    attempt.save()
+    record_attempt(attempt)
+    return attempt
+
+
+def quiz_payload(quiz):
+    """
+    Quiz serializado con sus preguntas sin `is_correct` (lo mismo para todos
+    los estudiantes), cacheado por versión del quiz y del curso
+    """
+    from .serializers import QuizSerializer
+
+    key = cache_service.make_key(
+        CacheKeys.QUIZ_PAYLOAD, 'student', quiz.pk, get_quiz_version(quiz.pk), get_course_version(quiz.course_id)
+    )
+    payload = cache_service.get(key, cache_alias='api')
+    if payload is None:
+        payload = QuizSerializer(quiz).data
+        payload['questions'] = student_questions(payload['questions'])
+        cache_service.set(key, payload, QUIZ_PAYLOAD_TIMEOUT, cache_alias='api')
+    return payload
@@ -0,0 +1,112 @@
+"""
+Entrega de preguntas de quizzes.
+
+`question_payload` arma una sola vez por versión del quiz (ver
+`bump_quiz_version`) las preguntas serializadas con sus opciones, en dos
+variantes: completa (autores y calificación) y para estudiantes, sin
+`is_correct` ni `explanation`. Se guarda en la cache `api` junto con los datos del quiz que
+hacen falta para decidir el acceso, así servir las preguntas no consulta la
+base de datos.
+
+Con `randomize_questions` cada intento tiene su `shuffle_seed`:
+`shuffle_questions` ordena preguntas y opciones de selección múltiple de
+forma determinista a partir de ella (recargar la página no cambia el orden).
+Las respuestas referencian ids, no posiciones, así que calificar no depende
+del orden: `grade_attempt` usa `answer_key` del mismo payload.
+"""
+import random
+
+from django.db.models import Prefetch
+
+from ifap_backend.cache_service import CacheKeys, cache_service, get_quiz_version
+from .models import Question, Quiz
+
+QUESTIONS_TIMEOUT = 60 * 60
+SHUFFLED_OPTION_TYPES = ('multiple_choice',)
+
+
+def student_questions(questions):
+    """Copia de `questions` (serializadas) sin `explanation` ni `is_correct` en las opciones"""
+    return [_student_question(question) for question in questions]
+
+
+def with_explanations(questions, full_questions):
+    """`questions` de estudiante con la `explanation` de `full_questions` (para resultados)"""
+    explanations = {question['id']: question['explanation'] for question in full_questions}
+    return [{**question, 'explanation': explanations.get(question['id'])} for question in questions]
+
+
+def _student_question(question):
+    return {
+        **{key: value for key, value in question.items() if key != 'explanation'},
+        'options': [
+            {key: value for key, value in option.items() if key != 'is_correct'}
+            for option in question['options']
+        ],
+    }
+
+
+def _build(quiz_id):
+    from .serializers import QuestionSerializer
+
+    quiz = Quiz.objects.filter(pk=quiz_id).prefetch_related(
+        Prefetch('questions', queryset=Question.objects.order_by('order').prefetch_related('options'))
+    ).first()
+    if quiz is None:
+        return None
+    questions = QuestionSerializer(quiz.questions.all(), many=True).data
+    return {
+        'quiz': {
+            'id': quiz.pk,
+            'course': quiz.course_id,
+            'created_by': quiz.created_by_id,
+            'is_published': quiz.is_published,
+            'randomize_questions': quiz.randomize_questions,
+        },
+        'questions': questions,
+        'student_questions': student_questions(questions),
+    }
+
+
+def question_payload(quiz_id):
+    """Payload de preguntas de `quiz_id` (None si el quiz no existe)"""
+    key = cache_service.make_key(CacheKeys.QUIZ_QUESTIONS, quiz_id, get_quiz_version(quiz_id))
+    payload = cache_service.get(key, cache_alias='api')
+    if payload is None:
+        payload = _build(quiz_id)
+        if payload is not None:
+            cache_service.set(key, payload, QUESTIONS_TIMEOUT, cache_alias='api')
+    return payload
+
+
+def shuffle_questions(questions, seed):
+    """Copia de `questions` en el orden que corresponde a `seed`"""
+    rng = random.Random(seed)
+    shuffled = [dict(question) for question in questions]
+    rng.shuffle(shuffled)
+    for question in shuffled:
+        if question['question_type'] in SHUFFLED_OPTION_TYPES:
+            options = list(question['options'])
+            rng.shuffle(options)
+            question['options'] = options
+    return shuffled
+
+
+def new_shuffle_seed(quiz):
+    """Semilla para un intento nuevo de `quiz` (None si no se aleatoriza)"""
+    if not quiz.randomize_questions:
+        return None
+    return random.SystemRandom().randrange(2 ** 31)
+
+
+def answer_key(quiz_id):
+    """{question_id: (tipo, puntos, ids de opciones, ids correctos)} de todas las preguntas"""
+    return {
+        question['id']: (
+            question['question_type'],
+            question['points'],
+            {option['id'] for option in question['options']},
+            {option['id'] for option in question['options'] if option['is_correct']},
+        )
+        for question in question_payload(quiz_id)['questions']
+    }
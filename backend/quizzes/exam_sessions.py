@@ -0,0 +1,324 @@
+"""
+Sesiones de examen con el tiempo controlado por el servidor.
+
+Mientras el intento está abierto el cliente autoguarda sus respuestas
+(`save_answers`) en un estado compacto por intento que vive en cache:
+
+    {'attempt': id, 'deadline': epoch | None, 'flushed': epoch, 'seed': int | None,
+     'answers': {'<question_id>': [[opciones], 'texto']}}
+
+Los autoguardados de una misma sesión (varias pestañas, reintentos) y el
+envío final se serializan con un bloqueo en cache (`cache.add`), así leer,
+añadir y guardar el estado no pierde las respuestas de otro guardado
+simultáneo ni confirma respuestas que llegan cuando el intento ya se calificó.
+
+El estado se vuelca a `QuizAttempt.staged_answers` como mucho cada
+`FLUSH_SECONDS`, así las escrituras se reparten a lo largo del examen en vez
+de concentrarse en el envío final, y si la cache se pierde solo se pierden
+los últimos segundos. El envío final (`finalize`) añade lo que traiga el
+request a lo ya guardado y califica de una vez.
+
+El plazo (`deadline_at` = inicio + `time_limit_minutes`) lo controla el
+servidor: pasados `GRACE_SECONDS` de tolerancia no se aceptan más respuestas
+y el intento se califica con lo guardado hasta entonces. Los intentos
+vencidos que nadie envía los cierra `finalize_expired_attempts` (comando
+`manage.py finalize_expired_attempts`).
+"""
+import logging
+import time
+import uuid
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from ifap_backend.cache_service import CacheKeys, cache_service
+from .attempts import AttemptError, grade_attempt, open_attempt, start_attempt
+from .delivery import question_payload
+from .models import QuizAttempt
+
+logger = logging.getLogger('middleware')
+
+LOCK_TIMEOUT = 10
+LOCK_WAIT = 3
+LOCK_POLL = 0.01
+
+
+class AttemptExpired(AttemptError):
+    """El tiempo del intento terminó"""
+
+
+def get_config():
+    return {
+        'FLUSH_SECONDS': 30,
+        'GRACE_SECONDS': 30,
+        'STATE_TIMEOUT': 6 * 60 * 60,
+        **getattr(settings, 'EXAM_SESSION', {}),
+    }
+
+
+def _state_key(quiz_id, user_id):
+    return cache_service.make_key(CacheKeys.EXAM_SESSION, quiz_id, user_id)
+
+
+def _store(quiz_id, user_id, state):
+    cache_service.set(_state_key(quiz_id, user_id), state, get_config()['STATE_TIMEOUT'])
+
+
+def _lock_key(quiz_id, user_id):
+    return cache_service.make_key(CacheKeys.EXAM_SESSION, 'lock', quiz_id, user_id)
+
+
+def _acquire_lock(quiz_id, user_id):
+    """
+    Bloqueo de escritura del estado de una sesión; devuelve su token. Si no
+    se obtiene en `LOCK_WAIT` segundos (bloqueo huérfano, cache caída) se
+    sigue sin él y devuelve None.
+    """
+    key = _lock_key(quiz_id, user_id)
+    token = uuid.uuid4().hex
+    give_up = time.monotonic() + LOCK_WAIT
+    acquired = cache_service.add(key, token, LOCK_TIMEOUT)
+    while not acquired and time.monotonic() < give_up:
+        time.sleep(LOCK_POLL)
+        acquired = cache_service.add(key, token, LOCK_TIMEOUT)
+    if not acquired:
+        logger.warning(f"Exam session lock timeout for quiz {quiz_id}, user {user_id}")
+        return None
+    return token
+
+
+def _release_lock(quiz_id, user_id, token):
+    key = _lock_key(quiz_id, user_id)
+    if token is not None and cache_service.get(key) == token:
+        cache_service.delete(key)
+
+
+@contextmanager
+def _session_lock(quiz_id, user_id):
+    token = _acquire_lock(quiz_id, user_id)
+    try:
+        yield
+    finally:
+        _release_lock(quiz_id, user_id, token)
+
+
+def clear_session(quiz_id, user_id):
+    cache_service.delete(_state_key(quiz_id, user_id))
+
+
+def _state_for(attempt):
+    return {
+        'attempt': attempt.pk,
+        'deadline': attempt.deadline_at.timestamp() if attempt.deadline_at else None,
+        'flushed': time.time(),
+        'seed': attempt.shuffle_seed,
+        'answers': dict(attempt.staged_answers or {}),
+    }
+
+
+def load_state(quiz_id, user):
+    """Estado de la sesión abierta de `user` en `quiz_id` (None si no hay intento abierto)"""
+    state = cache_service.get(_state_key(quiz_id, user.pk))
+    if state is None:
+        attempt = QuizAttempt.objects.filter(
+            user=user, quiz_id=quiz_id, completed_at__isnull=True
+        ).order_by('-attempt_number').first()
+        if attempt is None:
+            return None
+        state = _state_for(attempt)
+        _store(quiz_id, user.pk, state)
+    return state
+
+
+def prime_session(attempt):
+    """Deja en cache el estado de `attempt` (sin pisar el de ese mismo intento)"""
+    state = cache_service.get(_state_key(attempt.quiz_id, attempt.user_id))
+    if state is None or state['attempt'] != attempt.pk:
+        _store(attempt.quiz_id, attempt.user_id, _state_for(attempt))
+
+
+def is_expired(deadline, now=None):
+    """True si pasó el plazo `deadline` (epoch o datetime) más la tolerancia"""
+    if deadline is None:
+        return False
+    if isinstance(deadline, datetime):
+        deadline = deadline.timestamp()
+    return (now or time.time()) > deadline + get_config()['GRACE_SECONDS']
+
+
+def remaining_seconds(state, now=None):
+    if state['deadline'] is None:
+        return None
+    return max(int(state['deadline'] - (now or time.time())), 0)
+
+
+def compact_answers(answers):
+    """Respuestas del request ([{question_id, selected_options, text_answer}]) en formato compacto"""
+    return {
+        str(answer['question_id']): [
+            sorted(int(option_id) for option_id in answer.get('selected_options') or []),
+            answer.get('text_answer') or '',
+        ]
+        for answer in answers
+    }
+
+
+def expand_answers(compact):
+    return [
+        {'question_id': int(question_id), 'selected_options': option_ids, 'text_answer': text_answer}
+        for question_id, (option_ids, text_answer) in compact.items()
+    ]
+
+
+def validate_answers(quiz, answers):
+    """Lanza `AttemptError` si alguna respuesta es de una pregunta que no es del quiz"""
+    question_ids = {str(question['id']) for question in question_payload(quiz.pk)['questions']}
+    unknown = sorted(set(answers) - question_ids, key=int)
+    if unknown:
+        raise AttemptError(f"Preguntas que no pertenecen a este quiz: {', '.join(unknown)}")
+
+
+def _flush(state):
+    """Guarda las respuestas en el intento; False si el intento ya se finalizó"""
+    updated = QuizAttempt.objects.filter(pk=state['attempt'], completed_at__isnull=True).update(
+        staged_answers=state['answers']
+    )
+    state['flushed'] = time.time()
+    return bool(updated)
+
+
+def _is_open(attempt_id):
+    return QuizAttempt.objects.filter(pk=attempt_id, completed_at__isnull=True).exists()
+
+
+def save_answers(quiz, user, answers):
+    """
+    Autoguardado: añade `answers` (formato del request) a la sesión abierta
+    de `user` en `quiz` y devuelve el estado. Solo escribe en la base de
+    datos si el último volcado tiene más de `FLUSH_SECONDS`.
+    """
+    compact = compact_answers(answers)
+    validate_answers(quiz, compact)
+    with _session_lock(quiz.pk, user.pk):
+        state = load_state(quiz.pk, user)
+        if state is None:
+            raise AttemptError('No hay un intento activo para este quiz')
+        now = time.time()
+        if is_expired(state['deadline'], now):
+            raise AttemptExpired('El tiempo para responder este intento terminó')
+
+        state['answers'].update(compact)
+        # Un envío pudo calificar el intento mientras se esperaba el bloqueo
+        if now - state['flushed'] >= get_config()['FLUSH_SECONDS']:
+            still_open = _flush(state)
+        else:
+            still_open = _is_open(state['attempt'])
+        if not still_open:
+            clear_session(quiz.pk, user.pk)
+            raise AttemptError('El intento ya fue finalizado')
+        _store(quiz.pk, user.pk, state)
+    return state
+
+
+def staged_answers(attempt):
+    """Respuestas guardadas de `attempt`: las de la cache si son de este intento, si no las volcadas"""
+    state = cache_service.get(_state_key(attempt.quiz_id, attempt.user_id))
+    if state is not None and state['attempt'] == attempt.pk:
+        return dict(state['answers'])
+    return dict(attempt.staged_answers or {})
+
+
+def finalize(attempt, answers=None, now=None):
+    """
+    Califica `attempt` (bloqueado por el llamador) con las respuestas
+    guardadas más `answers` (formato del request). Si el plazo venció, las
+    respuestas del request se descartan y el intento termina en el plazo.
+
+    El bloqueo de la sesión se mantiene hasta el commit: un autoguardado
+    simultáneo espera y luego encuentra el intento cerrado, en vez de
+    confirmar respuestas que ya no se califican.
+    """
+    now = now or timezone.now()
+    quiz_id, user_id = attempt.quiz_id, attempt.user_id
+    token = _acquire_lock(quiz_id, user_id)
+    try:
+        staged = staged_answers(attempt)
+        completed_at = now
+        if is_expired(attempt.deadline_at, now.timestamp()):
+            completed_at = min(now, attempt.deadline_at)
+        elif answers:
+            staged.update(compact_answers(answers))
+        grade_attempt(attempt, staged, completed_at=completed_at)
+    except Exception:
+        _release_lock(quiz_id, user_id, token)
+        raise
+
+    def close_session():
+        clear_session(quiz_id, user_id)
+        _release_lock(quiz_id, user_id, token)
+
+    transaction.on_commit(close_session)
+    return attempt
+
+
+def start_session(quiz, user, client_request_id=None):
+    """
+    Inicia o retoma el intento (ver `start_attempt`). Un intento abierto cuyo
+    plazo ya venció se finaliza con lo guardado antes de iniciar otro.
+    """
+    attempt, created = start_attempt(quiz, user, client_request_id)
+    if not created and attempt.completed_at is None and is_expired(attempt.deadline_at):
+        with transaction.atomic():
+            expired = open_attempt(quiz, user, lock=True)
+            if expired is not None and expired.pk == attempt.pk:
+                finalize(expired)
+        attempt, created = start_attempt(quiz, user, client_request_id)
+    if attempt.completed_at is None:
+        prime_session(attempt)
+    return attempt, created
+
+
+def finalize_expired_attempts(now=None, batch_size=100):
+    """
+    Finaliza los intentos abiertos cuyo plazo (más la tolerancia) venció.
+    Cada intento se califica en su propia transacción. Devuelve cuántos se
+    finalizaron.
+    """
+    now = now or timezone.now()
+    cutoff = now - timedelta(seconds=get_config()['GRACE_SECONDS'])
+    expired = QuizAttempt.objects.filter(completed_at__isnull=True, deadline_at__lt=cutoff)
+    finalized = 0
+    last_id = 0
+    while True:
+        ids = list(expired.filter(id__gt=last_id).order_by('id').values_list('id', flat=True)[:batch_size])
+        if not ids:
+            return finalized
+        last_id = ids[-1]
+        for attempt_id in ids:
+            with transaction.atomic():
+                attempt = (
+                    QuizAttempt.objects.select_for_update(of=('self',))
+                    .select_related('quiz')
+                    .filter(pk=attempt_id, completed_at__isnull=True)
+                    .first()
+                )
+                if attempt is None:
+                    # Enviado mientras tanto
+                    continue
+                finalize(attempt, now=now)
+            finalized += 1
+            logger.info(f"Attempt {attempt_id} finalized after its deadline")
+
+
+def session_data(state, now=None):
+    """Respuesta de la API para el estado de una sesión"""
+    deadline = state['deadline']
+    return {
+        'attempt': state['attempt'],
+        'deadline_at': datetime.fromtimestamp(deadline, tz=dt_timezone.utc) if deadline is not None else None,
+        'remaining_seconds': remaining_seconds(state, now),
+        'answers': expand_answers(state['answers']),
+    }
@@ -0,0 +1,64 @@
+"""
+Comando de gestión para finalizar los intentos de quiz con el tiempo vencido.
+Uso: python manage.py finalize_expired_attempts [--batch-size 100] [--interval SEGUNDOS] [--dry-run]
+"""
+
+import logging
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+from django.utils import timezone
+
+from quizzes.exam_sessions import finalize_expired_attempts, get_config
+from quizzes.models import QuizAttempt
+
+logger = logging.getLogger('middleware')
+
+
+class Command(BaseCommand):
+    help = 'Califica con las respuestas autoguardadas los intentos abiertos cuyo plazo venció'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=100,
+            help='Cantidad de intentos por lote'
+        )
+        parser.add_argument(
+            '--interval',
+            type=int,
+            default=0,
+            help='Repetir cada N segundos (proceso permanente); 0 = una sola pasada'
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Solo mostrar cuántos intentos se finalizarían'
+        )
+
+    def handle(self, *args, **options):
+        if options['dry_run']:
+            cutoff = timezone.now() - timedelta(seconds=get_config()['GRACE_SECONDS'])
+            pending = QuizAttempt.objects.filter(completed_at__isnull=True, deadline_at__lt=cutoff).count()
+            self.stdout.write(f'Se finalizarían {pending} intentos')
+            return
+
+        while True:
+            try:
+                finalized = finalize_expired_attempts(batch_size=options['batch_size'])
+            except Exception:
+                if not options['interval']:
+                    raise
+                # Como proceso permanente un error no debe detener las pasadas siguientes
+                logger.exception('Finalize expired attempts pass failed')
+            else:
+                self.stdout.write(self.style.SUCCESS(f'Intentos finalizados: {finalized}'))
+            finally:
+                # Entre pasadas: descarta conexiones caídas o más viejas que CONN_MAX_AGE
+                close_old_connections()
+            if not options['interval']:
+                return
+            time.sleep(options['interval'])
@@ -0,0 +1,26 @@
+"""
+Comando de gestión para reconstruir los rollups de analítica de quizzes.
+Uso: python manage.py rebuild_quiz_analytics [--quiz ID ...]
+"""
+
+from django.core.management.base import BaseCommand
+
+from quizzes.analytics import rebuild_quiz_analytics
+
+
+class Command(BaseCommand):
+    help = 'Recalcula las estadísticas de quizzes, preguntas, opciones y usuarios desde el historial de intentos'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--quiz',
+            type=int,
+            action='append',
+            dest='quiz_ids',
+            help='Reconstruir solo este quiz (se puede repetir); sin él se reconstruye todo'
+        )
+
+    def handle(self, *args, **options):
+        result = rebuild_quiz_analytics(quiz_ids=options['quiz_ids'])
+        summary = ', '.join(f'{name}: {count}' for name, count in result.items())
+        self.stdout.write(self.style.SUCCESS(f'Rollups reconstruidos ({summary})'))
@@ -0,0 +1,76 @@
+# Generated by Django 4.2.7 on 2026-10-19 13:44
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0005_metric_counter'),
+        ('quizzes', '0002_quiztemplate'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OptionStats',
+            fields=[
+                ('option', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='stats', serialize=False, to='quizzes.option')),
+                ('selected_count', models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                'verbose_name': 'Estadísticas de opción',
+                'verbose_name_plural': 'Estadísticas de opciones',
+            },
+        ),
+        migrations.CreateModel(
+            name='QuestionStats',
+            fields=[
+                ('question', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='stats', serialize=False, to='quizzes.question')),
+                ('answers_count', models.PositiveIntegerField(default=0)),
+                ('correct_count', models.PositiveIntegerField(default=0)),
+                ('percentage_sum', models.FloatField(default=0)),
+                ('percentage_sq_sum', models.FloatField(default=0)),
+                ('correct_percentage_sum', models.FloatField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Estadísticas de pregunta',
+                'verbose_name_plural': 'Estadísticas de preguntas',
+            },
+        ),
+        migrations.CreateModel(
+            name='QuizStats',
+            fields=[
+                ('quiz', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='stats', serialize=False, to='quizzes.quiz')),
+                ('started_count', models.PositiveIntegerField(default=0)),
+                ('completed_count', models.PositiveIntegerField(default=0)),
+                ('passed_count', models.PositiveIntegerField(default=0)),
+                ('percentage_sum', models.FloatField(default=0)),
+                ('time_sum_seconds', models.BigIntegerField(default=0)),
+                ('score_histogram', models.JSONField(default=list, help_text='Intentos por tramo de 10 puntos porcentuales')),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Estadísticas de quiz',
+                'verbose_name_plural': 'Estadísticas de quizzes',
+            },
+        ),
+        migrations.CreateModel(
+            name='UserQuizStats',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='quiz_stats', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('completed_count', models.PositiveIntegerField(default=0)),
+                ('passed_count', models.PositiveIntegerField(default=0)),
+                ('percentage_sum', models.FloatField(default=0)),
+                ('time_sum_seconds', models.BigIntegerField(default=0)),
+                ('last_completed_at', models.DateTimeField(blank=True, null=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Estadísticas de quizzes por usuario',
+                'verbose_name_plural': 'Estadísticas de quizzes por usuario',
+            },
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 4.2.7 on 2026-10-19 14:32
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('quizzes', '0003_analytics_rollups'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='quizattempt',
+            index=models.Index(condition=models.Q(('completed_at__isnull', True)), fields=['user', 'quiz'], name='quiz_attempt_open_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='quizattempt',
+            index=models.Index(fields=['quiz', 'completed_at'], name='quiz_attempt_completed_idx'),
+        ),
+    ]
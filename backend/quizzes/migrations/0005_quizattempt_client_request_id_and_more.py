@@ -0,0 +1,22 @@
+# Generated by Django 4.2.7 on 2026-10-19 14:45
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('quizzes', '0004_quizattempt_quiz_attempt_open_idx_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='quizattempt',
+            name='client_request_id',
+            field=models.CharField(blank=True, max_length=64, null=True),
+        ),
+        migrations.AddConstraint(
+            model_name='quizattempt',
+            constraint=models.UniqueConstraint(fields=('user', 'quiz', 'client_request_id'), name='quiz_attempt_client_request_uniq'),
+        ),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 4.2.7 on 2026-10-19 15:01
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('quizzes', '0005_quizattempt_client_request_id_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='quizattempt',
+            name='deadline_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='quizattempt',
+            name='staged_answers',
+            field=models.JSONField(blank=True, default=dict),
+        ),
+        migrations.AddIndex(
+            model_name='quizattempt',
+            index=models.Index(condition=models.Q(('completed_at__isnull', True)), fields=['deadline_at'], name='quiz_attempt_deadline_idx'),
+        ),
+    ]
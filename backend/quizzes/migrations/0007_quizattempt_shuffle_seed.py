@@ -0,0 +1,18 @@
+# Generated by Django 4.2.7 on 2026-10-19 15:08
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('quizzes', '0006_quizattempt_deadline_staged_answers'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='quizattempt',
+            name='shuffle_seed',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+    ]
@@ -111,10 +111,35 @@ class QuizAttempt(models.Model):
     started_at = models.DateTimeField(auto_now_add=True)
     completed_at = models.DateTimeField(null=True, blank=True)
     attempt_number = models.PositiveIntegerField(default=1)
+    # Identificador que envía el cliente para que iniciar el intento sea idempotente
+    client_request_id = models.CharField(max_length=64, null=True, blank=True)
+    # Límite para responder (inicio + time_limit_minutes); null = sin límite
+    deadline_at = models.DateTimeField(null=True, blank=True)
+    # Respuestas autoguardadas: {question_id: [opciones, texto]} (ver quizzes/exam_sessions.py)
+    staged_answers = models.JSONField(default=dict, blank=True)
+    # Orden aleatorio de preguntas y opciones del intento (ver quizzes/delivery.py); null = orden del quiz
+    shuffle_seed = models.PositiveIntegerField(null=True, blank=True)
 
     class Meta:
         ordering = ['-started_at']
         unique_together = ['user', 'quiz', 'attempt_number']
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'quiz', 'client_request_id'], name='quiz_attempt_client_request_uniq'
+            ),
+        ]
+        indexes = [
+            # Intento en curso de un usuario en un quiz
+            models.Index(
+                fields=['user', 'quiz'], condition=models.Q(completed_at__isnull=True), name='quiz_attempt_open_idx'
+            ),
+            # Intentos completados por quiz (libro de calificaciones, analítica)
+            models.Index(fields=['quiz', 'completed_at'], name='quiz_attempt_completed_idx'),
+            # Intentos abiertos con el tiempo vencido (finalize_expired_attempts)
+            models.Index(
+                fields=['deadline_at'], condition=models.Q(completed_at__isnull=True), name='quiz_attempt_deadline_idx'
+            ),
+        ]
         
     def __str__(self):
         return f"{self.user.username} - {self.quiz.title} - Intento {self.attempt_number}"
@@ -133,3 +158,111 @@ class UserAnswer(models.Model):
         
     def __str__(self):
         return f"{self.attempt} - {self.question}"
+
+
+class QuizStats(models.Model):
+    """Rollup de intentos por quiz (ver quizzes/analytics.py)"""
+    HISTOGRAM_BUCKETS = 10
+
+    quiz = models.OneToOneField(Quiz, on_delete=models.CASCADE, primary_key=True, related_name='stats')
+    started_count = models.PositiveIntegerField(default=0)
+    completed_count = models.PositiveIntegerField(default=0)
+    passed_count = models.PositiveIntegerField(default=0)
+    percentage_sum = models.FloatField(default=0)
+    time_sum_seconds = models.BigIntegerField(default=0)
+    score_histogram = models.JSONField(default=list, help_text="Intentos por tramo de 10 puntos porcentuales")
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = 'Estadísticas de quiz'
+        verbose_name_plural = 'Estadísticas de quizzes'
+
+    def __str__(self):
+        return f"Estadísticas de {self.quiz_id}"
+
+    @property
+    def pass_rate(self):
+        return (self.passed_count / self.completed_count * 100) if self.completed_count else 0
+
+    @property
+    def average_percentage(self):
+        return (self.percentage_sum / self.completed_count) if self.completed_count else 0
+
+    @property
+    def average_time_seconds(self):
+        return (self.time_sum_seconds / self.completed_count) if self.completed_count else 0
+
+
+class QuestionStats(models.Model):
+    """
+    Rollup por pregunta para análisis de ítems. Guarda las sumas necesarias
+    para calcular la dificultad (porcentaje de aciertos) y la discriminación
+    (correlación punto-biserial entre acierto y porcentaje del intento).
+    """
+    question = models.OneToOneField(Question, on_delete=models.CASCADE, primary_key=True, related_name='stats')
+    answers_count = models.PositiveIntegerField(default=0)
+    correct_count = models.PositiveIntegerField(default=0)
+    percentage_sum = models.FloatField(default=0)
+    percentage_sq_sum = models.FloatField(default=0)
+    correct_percentage_sum = models.FloatField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = 'Estadísticas de pregunta'
+        verbose_name_plural = 'Estadísticas de preguntas'
+
+    def __str__(self):
+        return f"Estadísticas de pregunta {self.question_id}"
+
+    @property
+    def difficulty(self):
+        """Porcentaje de respuestas correctas (más alto = más fácil)"""
+        return (self.correct_count / self.answers_count * 100) if self.answers_count else 0
+
+    @property
+    def discrimination(self):
+        """Correlación punto-biserial; None si no hay varianza suficiente"""
+        n = self.answers_count
+        x = self.correct_count
+        y = self.percentage_sum
+        denominator = (n * x - x * x) * (n * self.percentage_sq_sum - y * y)
+        if n < 2 or denominator <= 0:
+            return None
+        return (n * self.correct_percentage_sum - x * y) / denominator ** 0.5
+
+
+class OptionStats(models.Model):
+    """Veces que se eligió cada opción (distribución de distractores)"""
+    option = models.OneToOneField(Option, on_delete=models.CASCADE, primary_key=True, related_name='stats')
+    selected_count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        verbose_name = 'Estadísticas de opción'
+        verbose_name_plural = 'Estadísticas de opciones'
+
+    def __str__(self):
+        return f"Opción {self.option_id}: {self.selected_count}"
+
+
+class UserQuizStats(models.Model):
+    """Rollup de intentos finalizados por usuario"""
+    user = models.OneToOneField(
+        settings.AUTH_USER_MODEL, on_delete=models.CASCADE, primary_key=True, related_name='quiz_stats'
+    )
+    completed_count = models.PositiveIntegerField(default=0)
+    passed_count = models.PositiveIntegerField(default=0)
+    percentage_sum = models.FloatField(default=0)
+    time_sum_seconds = models.BigIntegerField(default=0)
+    last_completed_at = models.DateTimeField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = 'Estadísticas de quizzes por usuario'
+        verbose_name_plural = 'Estadísticas de quizzes por usuario'
+
+    def __str__(self):
+        return f"Estadísticas de quizzes de {self.user_id}"
+
+    @property
+    def average_percentage(self):
+        return (self.percentage_sum / self.completed_count) if self.completed_count else 0
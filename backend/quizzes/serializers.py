@@ -58,8 +58,8 @@ class QuizAttemptSerializer(serializers.ModelSerializer):
         model = QuizAttempt
         fields = ['id', 'user', 'quiz', 'score', 'max_score', 'percentage', 'is_passed',
                  'time_taken_seconds', 'time_taken_formatted', 'started_at', 'completed_at',
-                 'attempt_number', 'quiz_details', 'user_details']
-        read_only_fields = ['id', 'started_at', 'completed_at']
+                 'deadline_at', 'attempt_number', 'quiz_details', 'user_details']
+        read_only_fields = ['id', 'started_at', 'completed_at', 'deadline_at']
     
     def get_time_taken_formatted(self, obj):
         if obj.time_taken_seconds:
@@ -68,6 +68,13 @@ class QuizAttemptSerializer(serializers.ModelSerializer):
             return f"{minutes}m {seconds}s"
         return "0s"
 
+class QuizAttemptPayloadSerializer(QuizAttemptSerializer):
+    """Intento con `quiz_details` tomado del payload cacheado del quiz (contexto `quiz_payload`)"""
+    quiz_details = serializers.SerializerMethodField()
+
+    def get_quiz_details(self, obj):
+        return self.context['quiz_payload']
+
 class UserAnswerSerializer(serializers.ModelSerializer):
     question_details = QuestionSerializer(source='question', read_only=True)
     selected_options_details = OptionSerializer(source='selected_options', many=True, read_only=True)
@@ -129,8 +136,11 @@ class QuizTemplateSerializer(serializers.ModelSerializer):
         read_only_fields = ['id', 'created_by', 'created_at', 'updated_at']
 
 class QuizSubmissionSerializer(serializers.Serializer):
+    # Opcional en el envío final: se califican las respuestas ya autoguardadas
     answers = serializers.ListField(
-        child=serializers.DictField()
+        child=serializers.DictField(),
+        required=False,
+        default=list
     )
     
     def validate_answers(self, value):
@@ -139,4 +149,9 @@ class QuizSubmissionSerializer(serializers.Serializer):
                 raise serializers.ValidationError("Cada respuesta debe tener un question_id")
             if 'selected_options' not in answer and 'text_answer' not in answer:
                 raise serializers.ValidationError("Cada respuesta debe tener selected_options o text_answer")
+            selected = answer.get('selected_options') or []
+            if not isinstance(selected, list) or not all(str(option_id).isdigit() for option_id in selected):
+                raise serializers.ValidationError("selected_options debe ser una lista de ids de opciones")
+            if not str(answer['question_id']).isdigit():
+                raise serializers.ValidationError("question_id debe ser un id de pregunta")
         return value
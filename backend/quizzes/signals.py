@@ -1,10 +1,33 @@
-from django.db.models.signals import post_save
+from django.db.models.signals import post_delete, post_save
 from django.dispatch import receiver
-from .models import QuizAttempt
+from .models import Option, Question, Quiz, QuizAttempt
+from .analytics import record_attempt_started
+from ifap_backend.cache_service import bump_quiz_version
 from notifications.models import Notification
 
 @receiver(post_save, sender=QuizAttempt)
 def create_notification_on_quiz_attempt(sender, instance, created, **kwargs):
     if created and not instance.completed_at:
         message = f"New pending quiz: {instance.quiz.title} in {instance.quiz.course.title}"
-        Notification.objects.create(recipient=instance.user, message=message)
\ No newline at end of file
+        Notification.objects.create(recipient=instance.user, message=message)
+
+
+@receiver(post_save, sender=QuizAttempt)
+def count_started_attempt(sender, instance, created, **kwargs):
+    if created:
+        record_attempt_started(instance)
+
+
+@receiver([post_save, post_delete], sender=Quiz)
+def invalidate_quiz_payload(sender, instance, **kwargs):
+    bump_quiz_version(instance.pk)
+
+
+@receiver([post_save, post_delete], sender=Question)
+def invalidate_quiz_payload_on_question(sender, instance, **kwargs):
+    bump_quiz_version(instance.quiz_id)
+
+
+@receiver([post_save, post_delete], sender=Option)
+def invalidate_quiz_payload_on_option(sender, instance, **kwargs):
+    bump_quiz_version(instance.question.quiz_id)
@@ -1,12 +1,25 @@
 import json
-from django.test import TestCase
+import threading
+import time
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
+from django.core.cache import caches
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.contrib.auth import get_user_model
 from django.utils import timezone
 from rest_framework.test import APITestCase
 from rest_framework import status
 from courses.models import Course
 from lessons.models import Lesson
-from .models import Quiz, Question, Option, QuizAttempt, UserAnswer
+from .models import (
+    Quiz, Question, Option, QuizAttempt, UserAnswer,
+    QuizStats, QuestionStats, OptionStats, UserQuizStats
+)
+from .analytics import rebuild_quiz_analytics
 
 User = get_user_model()
 
@@ -273,3 +286,555 @@ class QuizAPITest(APITestCase):
         self.client.force_authenticate(user=self.student)
         response = self.client.delete(f'/api/quizzes/{self.quiz.id}/')
         self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+
+class QuizAttemptTestCase(APITestCase):
+    """
+    Docente, estudiante inscrito y quiz publicado para los tests de intentos.
+    Cada clase fija el prefijo de los nombres y los campos propios del quiz.
+    """
+    prefix = 'quiz'
+    quiz_fields = {}
+
+    def setUp(self):
+        caches['default'].clear()
+        caches['api'].clear()
+        self.instructor = self.create_user(f'{self.prefix}_instructor', 'instructor')
+        self.student = self.create_user(f'{self.prefix}_student')
+        self.course = Course.objects.create(
+            title=f'{self.prefix} course', description='d', instructor=self.instructor
+        )
+        self.course.students.add(self.student)
+        self.quiz = Quiz.objects.create(
+            title=f'{self.prefix} quiz', course=self.course, created_by=self.instructor,
+            is_published=True, **self.quiz_fields
+        )
+
+    def create_user(self, username, role='student'):
+        user = User.objects.create_user(username=username, email=f'{username}@test.com', password='testpass123')
+        user.set_role(role)
+        user.save()
+        return user
+
+
+class QuizAnalyticsTest(QuizAttemptTestCase):
+    prefix = 'analytics'
+    quiz_fields = {'passing_score': 70}
+
+    def setUp(self):
+        super().setUp()
+        self.question = Question.objects.create(
+            quiz=self.quiz,
+            question_text='What is 2+2?',
+            question_type='multiple_choice',
+            points=10
+        )
+        self.wrong = Option.objects.create(question=self.question, option_text='3', is_correct=False)
+        self.right = Option.objects.create(question=self.question, option_text='4', is_correct=True)
+
+        self.students = [self.student]
+        for i in range(1, 3):
+            student = self.create_user(f'analytics_student_{i}')
+            self.course.students.add(student)
+            self.students.append(student)
+
+    def _take_quiz(self, student, option):
+        self.client.force_authenticate(user=student)
+        self.client.post(f'/api/quizzes/{self.quiz.id}/start_attempt/')
+        response = self.client.post(
+            f'/api/quizzes/{self.quiz.id}/submit/',
+            {'answers': [{'question_id': self.question.id, 'selected_options': [option.id]}]},
+            format='json'
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def _snapshot(self):
+        quiz_stats = QuizStats.objects.get(quiz=self.quiz)
+        question_stats = QuestionStats.objects.get(question=self.question)
+        return {
+            'quiz': (
+                quiz_stats.started_count, quiz_stats.completed_count, quiz_stats.passed_count,
+                quiz_stats.percentage_sum, quiz_stats.score_histogram,
+            ),
+            'question': (
+                question_stats.answers_count, question_stats.correct_count,
+                question_stats.percentage_sum, question_stats.percentage_sq_sum,
+                question_stats.correct_percentage_sum,
+            ),
+            'options': dict(OptionStats.objects.values_list('option_id', 'selected_count')),
+            'users': dict(UserQuizStats.objects.values_list('user_id', 'passed_count')),
+        }
+
+    def test_rollups_follow_submissions(self):
+        self._take_quiz(self.students[0], self.right)
+        self._take_quiz(self.students[1], self.right)
+        self._take_quiz(self.students[2], self.wrong)
+
+        quiz_stats = QuizStats.objects.get(quiz=self.quiz)
+        self.assertEqual(quiz_stats.started_count, 3)
+        self.assertEqual(quiz_stats.completed_count, 3)
+        self.assertEqual(quiz_stats.passed_count, 2)
+        self.assertEqual(quiz_stats.score_histogram[9], 2)
+        self.assertEqual(quiz_stats.score_histogram[0], 1)
+
+        question_stats = QuestionStats.objects.get(question=self.question)
+        self.assertEqual(question_stats.correct_count, 2)
+        self.assertAlmostEqual(question_stats.discrimination, 1.0)
+        self.assertEqual(OptionStats.objects.get(option=self.wrong).selected_count, 1)
+        self.assertEqual(UserQuizStats.objects.get(user=self.students[0]).passed_count, 1)
+
+    def test_rebuild_matches_incremental_rollups(self):
+        self._take_quiz(self.students[0], self.right)
+        self._take_quiz(self.students[1], self.wrong)
+        incremental = self._snapshot()
+
+        rebuild_quiz_analytics()
+        self.assertEqual(self._snapshot(), incremental)
+
+    def test_item_analysis_endpoint(self):
+        self._take_quiz(self.students[0], self.right)
+        self._take_quiz(self.students[1], self.wrong)
+
+        self.client.force_authenticate(user=self.instructor)
+        response = self.client.get(f'/api/quizzes/{self.quiz.id}/analytics/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['pass_rate'], 50)
+        item = response.data['questions'][0]
+        self.assertEqual(item['difficulty'], 50)
+        rates = {option['option_id']: option['selected_rate'] for option in item['options']}
+        self.assertEqual(rates, {self.wrong.id: 50, self.right.id: 50})
+
+        self.client.force_authenticate(user=self.students[0])
+        response = self.client.get(f'/api/quizzes/{self.quiz.id}/analytics/')
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_user_stats_read_rollup(self):
+        self._take_quiz(self.students[0], self.right)
+        response = self.client.get('/api/quizzes/stats/user_stats/')
+        self.assertEqual(response.data['total_attempts'], 1)
+        self.assertEqual(response.data['success_rate'], 100)
+
+
+class QuizAttemptLifecycleTest(QuizAttemptTestCase):
+    prefix = 'lifecycle'
+    quiz_fields = {'passing_score': 70, 'max_attempts': 2}
+
+    def setUp(self):
+        super().setUp()
+        self.question = Question.objects.create(
+            quiz=self.quiz, question_text='What is 2+2?', question_type='multiple_choice', points=10
+        )
+        self.right = Option.objects.create(question=self.question, option_text='4', is_correct=True)
+        self.client.force_authenticate(user=self.student)
+
+    def _start(self, **data):
+        return self.client.post(f'/api/quizzes/{self.quiz.id}/start_attempt/', data, format='json')
+
+    def _submit(self):
+        return self.client.post(
+            f'/api/quizzes/{self.quiz.id}/submit/',
+            {'answers': [{'question_id': self.question.id, 'selected_options': [self.right.id]}]},
+            format='json'
+        )
+
+    def test_start_resumes_open_attempt(self):
+        first = self._start()
+        second = self._start()
+
+        self.assertEqual(first.status_code, status.HTTP_200_OK)
+        self.assertEqual(first.data['id'], second.data['id'])
+        self.assertEqual(first.data['attempt_number'], 1)
+        self.assertEqual(QuizAttempt.objects.filter(user=self.student, quiz=self.quiz).count(), 1)
+        # Las señales de creación se envían aunque el INSERT no pase por save()
+        self.assertEqual(QuizStats.objects.get(quiz=self.quiz).started_count, 1)
+        self.assertEqual(first.data['quiz_details']['id'], self.quiz.id)
+
+    def test_numbering_and_max_attempts(self):
+        self._start()
+        self._submit()
+        second = self._start()
+        self.assertEqual(second.data['attempt_number'], 2)
+        self._submit()
+
+        response = self._start()
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('máximo', response.data['error'])
+
+    def test_resumed_start_does_not_load_questions(self):
+        self._start()
+        with CaptureQueriesContext(connection) as context:
+            self.assertEqual(self._start().status_code, status.HTTP_200_OK)
+        # Solo la búsqueda del quiz consulta la inscripción; el resto sale de la cache
+        sql = [q['sql'] for q in context.captured_queries]
+        self.assertEqual([q for q in sql if '"quizzes_question"' in q or '"quizzes_option"' in q], [])
+        self.assertEqual(len([q for q in sql if '"courses_course_students"' in q]), 1)
+
+    def test_start_is_idempotent_per_client_request_id(self):
+        first = self._start(client_request_id='req-1')
+        self._submit()
+        replay = self._start(client_request_id='req-1')
+        other = self.client.post(
+            f'/api/quizzes/{self.quiz.id}/start_attempt/', HTTP_IDEMPOTENCY_KEY='req-2'
+        )
+
+        self.assertEqual(replay.data['id'], first.data['id'])
+        self.assertIsNotNone(replay.data['completed_at'])
+        self.assertEqual(other.data['attempt_number'], 2)
+        self.assertEqual(self._start(client_request_id='x' * 65).status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_submit_grades_latest_open_attempt(self):
+        # Datos previos a la creación atómica: dos intentos abiertos
+        QuizAttempt.objects.bulk_create([
+            QuizAttempt(user=self.student, quiz=self.quiz, attempt_number=1),
+            QuizAttempt(user=self.student, quiz=self.quiz, attempt_number=2),
+        ])
+
+        response = self._submit()
+
+        self.assertEqual(response.data['attempt_number'], 2)
+        self.assertEqual(self._submit().data['attempt_number'], 1)
+        self.assertEqual(self._submit().status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_quiz_payload_follows_question_changes(self):
+        from .attempts import quiz_payload
+
+        self.assertEqual(len(quiz_payload(self.quiz)['questions']), 1)
+        Question.objects.create(quiz=self.quiz, question_text='3+3?', question_type='multiple_choice', points=5)
+        self.assertEqual(len(quiz_payload(self.quiz)['questions']), 2)
+
+    def test_quiz_payload_hides_correct_options(self):
+        from .attempts import quiz_payload
+
+        options = [option for question in quiz_payload(self.quiz)['questions'] for option in question['options']]
+        self.assertTrue(options)
+        self.assertTrue(all('is_correct' not in option for option in options))
+
+
+@override_settings(EXAM_SESSION={'FLUSH_SECONDS': 0, 'GRACE_SECONDS': 30, 'STATE_TIMEOUT': 600})
+class ExamSessionTest(QuizAttemptTestCase):
+    prefix = 'exam'
+    quiz_fields = {'quiz_type': 'exam', 'passing_score': 50, 'max_attempts': 2, 'time_limit_minutes': 10}
+
+    def setUp(self):
+        super().setUp()
+        self.first = Question.objects.create(
+            quiz=self.quiz, question_text='2+2?', question_type='multiple_choice', points=10, order=1
+        )
+        self.first_right = Option.objects.create(question=self.first, option_text='4', is_correct=True)
+        self.first_wrong = Option.objects.create(question=self.first, option_text='5', is_correct=False)
+        self.second = Question.objects.create(
+            quiz=self.quiz, question_text='3+3?', question_type='multiple_choice', points=5, order=2
+        )
+        self.second_right = Option.objects.create(question=self.second, option_text='6', is_correct=True)
+        self.client.force_authenticate(user=self.student)
+
+    def _start(self):
+        return self.client.post(f'/api/quizzes/{self.quiz.id}/start_attempt/')
+
+    def _autosave(self, question, option):
+        return self.client.post(
+            f'/api/quizzes/{self.quiz.id}/autosave/',
+            {'answers': [{'question_id': question.id, 'selected_options': [option.id]}]},
+            format='json'
+        )
+
+    def _expire(self, attempt_id):
+        deadline = timezone.now() - timedelta(minutes=2)
+        QuizAttempt.objects.filter(pk=attempt_id).update(deadline_at=deadline)
+        # El estado en cache guarda el plazo del inicio
+        caches['default'].clear()
+        return deadline
+
+    def test_submit_grades_autosaved_answers(self):
+        started = self._start()
+        self.assertIsNotNone(started.data['deadline_at'])
+
+        self.assertEqual(self._autosave(self.first, self.first_wrong).status_code, status.HTTP_200_OK)
+        saved = self._autosave(self.first, self.first_right)
+        self.assertEqual(saved.data['answers'], [
+            {'question_id': self.first.id, 'selected_options': [self.first_right.id], 'text_answer': ''}
+        ])
+        self.assertLessEqual(saved.data['remaining_seconds'], 600)
+        attempt = QuizAttempt.objects.get(pk=started.data['id'])
+        self.assertEqual(attempt.staged_answers, {str(self.first.id): [[self.first_right.id], '']})
+
+        session = self.client.get(f'/api/quizzes/{self.quiz.id}/session/')
+        self.assertEqual(session.data['attempt'], attempt.id)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(f'/api/quizzes/{self.quiz.id}/submit/', {}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        # La pregunta sin responder cuenta en el puntaje máximo
+        self.assertEqual((response.data['score'], response.data['max_score']), (10, 15))
+        self.assertEqual(UserAnswer.objects.filter(attempt=attempt).count(), 1)
+        self.assertEqual(
+            self.client.get(f'/api/quizzes/{self.quiz.id}/session/').status_code, status.HTTP_404_NOT_FOUND
+        )
+
+    def test_staged_answers_survive_cache_loss(self):
+        self._start()
+        self._autosave(self.first, self.first_right)
+        caches['default'].clear()
+
+        response = self.client.post(
+            f'/api/quizzes/{self.quiz.id}/submit/',
+            {'answers': [{'question_id': self.second.id, 'selected_options': [self.second_right.id]}]},
+            format='json'
+        )
+        self.assertEqual(response.data['score'], 15)
+
+    def test_autosave_rejects_questions_of_other_quizzes(self):
+        self._start()
+        other_quiz = Quiz.objects.create(title='Other', course=self.course, created_by=self.instructor)
+        other = Question.objects.create(quiz=other_quiz, question_text='?', question_type='multiple_choice')
+        option = Option.objects.create(question=other, option_text='x', is_correct=True)
+
+        self.assertEqual(self._autosave(other, option).status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_deadline_is_enforced(self):
+        attempt_id = self._start().data['id']
+        self._autosave(self.first, self.first_right)
+        deadline = self._expire(attempt_id)
+
+        self.assertEqual(self._autosave(self.second, self.second_right).status_code, status.HTTP_409_CONFLICT)
+        response = self.client.post(
+            f'/api/quizzes/{self.quiz.id}/submit/',
+            {'answers': [{'question_id': self.second.id, 'selected_options': [self.second_right.id]}]},
+            format='json'
+        )
+        # Las respuestas enviadas después del plazo no cuentan
+        self.assertEqual(response.data['score'], 10)
+        self.assertEqual(QuizAttempt.objects.get(pk=attempt_id).completed_at, deadline)
+
+    def test_sweeper_finalizes_expired_attempts(self):
+        attempt_id = self._start().data['id']
+        self._autosave(self.first, self.first_right)
+        untimed = Quiz.objects.create(
+            title='Untimed', course=self.course, created_by=self.instructor, is_published=True
+        )
+        self.client.post(f'/api/quizzes/{untimed.id}/start_attempt/')
+        self._expire(attempt_id)
+
+        out = StringIO()
+        call_command('finalize_expired_attempts', stdout=out)
+
+        self.assertIn('Intentos finalizados: 1', out.getvalue())
+        attempt = QuizAttempt.objects.get(pk=attempt_id)
+        self.assertEqual((attempt.score, attempt.max_score), (10, 15))
+        self.assertTrue(attempt.is_passed)
+        self.assertEqual(QuizStats.objects.get(quiz=self.quiz).completed_count, 1)
+        self.assertTrue(QuizAttempt.objects.filter(quiz=untimed, completed_at__isnull=True).exists())
+
+    @override_settings(EXAM_SESSION={'FLUSH_SECONDS': 3600, 'GRACE_SECONDS': 30, 'STATE_TIMEOUT': 600})
+    def test_concurrent_autosaves_keep_all_answers(self):
+        from . import exam_sessions
+
+        self._start()
+        # Payload de preguntas y estado ya en cache: los hilos no consultan la base de datos
+        self._autosave(self.first, self.first_wrong)
+        store = exam_sessions._store
+        paused, resume = threading.Event(), threading.Event()
+
+        def slow_store(*args):
+            if not paused.is_set():
+                paused.set()
+                resume.wait(5)
+            store(*args)
+
+        def save(question, option):
+            exam_sessions.save_answers(
+                self.quiz, self.student, [{'question_id': question.id, 'selected_options': [option.id]}]
+            )
+
+        with mock.patch.object(exam_sessions, '_store', slow_store), \
+                mock.patch.object(exam_sessions, '_is_open', return_value=True):
+            first = threading.Thread(target=save, args=(self.first, self.first_right))
+            first.start()
+            paused.wait(5)
+            # El segundo guardado lee el estado mientras el primero aún no lo escribió
+            second = threading.Thread(target=save, args=(self.second, self.second_right))
+            second.start()
+            time.sleep(0.05)
+            resume.set()
+            first.join()
+            second.join()
+
+        answers = exam_sessions.load_state(self.quiz.id, self.student)['answers']
+        self.assertEqual(answers, {
+            str(self.first.id): [[self.first_right.id], ''],
+            str(self.second.id): [[self.second_right.id], ''],
+        })
+
+    @override_settings(EXAM_SESSION={'FLUSH_SECONDS': 3600, 'GRACE_SECONDS': 30, 'STATE_TIMEOUT': 600})
+    def test_autosave_during_submit_is_rejected(self):
+        from ifap_backend.cache_service import cache_service
+        from . import exam_sessions
+        from .attempts import AttemptError
+
+        self._start()
+        self._autosave(self.first, self.first_right)
+        grade = exam_sessions.grade_attempt
+        late = {}
+
+        def grade_then_autosave(*args, **kwargs):
+            attempt = grade(*args, **kwargs)
+            # Autoguardado que llega con el intento calificado pero sin commit
+            late['locked'] = not cache_service.add(exam_sessions._lock_key(self.quiz.id, self.student.id), 'x', 5)
+            try:
+                exam_sessions.save_answers(
+                    self.quiz, self.student, [{'question_id': self.second.id, 'selected_options': [self.second_right.id]}]
+                )
+            except AttemptError as e:
+                late['error'] = e
+            return attempt
+
+        with mock.patch.object(exam_sessions, 'grade_attempt', grade_then_autosave), \
+                mock.patch.object(exam_sessions, 'LOCK_WAIT', 0), \
+                self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(f'/api/quizzes/{self.quiz.id}/submit/', {}, format='json')
+
+        self.assertEqual(response.data['score'], 10)
+        self.assertTrue(late['locked'])
+        self.assertIn('error', late)
+        self.assertIsNone(exam_sessions.load_state(self.quiz.id, self.student))
+        # El bloqueo se liberó con el commit
+        self.assertTrue(cache_service.add(exam_sessions._lock_key(self.quiz.id, self.student.id), 'x', 5))
+
+    def test_sweeper_interval_survives_failed_pass(self):
+        class Stop(Exception):
+            pass
+
+        command = 'quizzes.management.commands.finalize_expired_attempts'
+        out = StringIO()
+        with mock.patch(f'{command}.finalize_expired_attempts', side_effect=[RuntimeError('boom'), 0]), \
+                mock.patch(f'{command}.time.sleep', side_effect=[None, Stop]), \
+                mock.patch(f'{command}.close_old_connections') as close_connections, \
+                self.assertLogs('middleware', 'ERROR'):
+            with self.assertRaises(Stop):
+                call_command('finalize_expired_attempts', '--interval', '1', stdout=out)
+
+        self.assertIn('Intentos finalizados: 0', out.getvalue())
+        self.assertEqual(close_connections.call_count, 2)
+
+    def test_start_after_deadline_finalizes_expired_attempt(self):
+        first_id = self._start().data['id']
+        self._expire(first_id)
+
+        response = self._start()
+
+        self.assertEqual(response.data['attempt_number'], 2)
+        self.assertIsNotNone(QuizAttempt.objects.get(pk=first_id).completed_at)
+
+
+class QuestionDeliveryTest(QuizAttemptTestCase):
+    prefix = 'delivery'
+    quiz_fields = {'passing_score': 50, 'randomize_questions': True}
+
+    def setUp(self):
+        super().setUp()
+        self.correct = {}
+        for order in range(6):
+            question = Question.objects.create(
+                quiz=self.quiz, question_text=f'Q{order}', question_type='multiple_choice', points=1, order=order
+            )
+            options = [
+                Option.objects.create(question=question, option_text=f'O{i}', is_correct=i == 0, order=i)
+                for i in range(4)
+            ]
+            self.correct[question.id] = options[0].id
+        self.url = f'/api/quizzes/{self.quiz.id}/questions/'
+
+    def test_students_get_cached_questions_without_correct_flags(self):
+        self.client.force_authenticate(user=self.student)
+        self.client.post(f'/api/quizzes/{self.quiz.id}/start_attempt/')
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data), 6)
+        self.assertNotIn('is_correct', response.data[0]['options'][0])
+        self.assertTrue(all('explanation' not in question for question in response.data))
+
+        # Payload, inscripción y semilla del intento salen de la cache
+        with self.assertNumQueries(0):
+            self.assertEqual(self.client.get(self.url).data, response.data)
+
+        self.client.force_authenticate(user=self.instructor)
+        self.assertIn('is_correct', self.client.get(self.url).data[0]['options'][0])
+
+    def test_access_follows_enrollment(self):
+        other = self.create_user('delivery_other')
+        self.client.force_authenticate(user=other)
+        self.assertEqual(self.client.get(self.url).status_code, status.HTTP_404_NOT_FOUND)
+
+        self.course.students.add(other)
+        self.assertEqual(self.client.get(self.url).status_code, status.HTTP_200_OK)
+
+    def test_attempt_order_is_deterministic_and_grading_maps_back(self):
+        from .delivery import question_payload, shuffle_questions
+
+        self.client.force_authenticate(user=self.student)
+        attempt_id = self.client.post(f'/api/quizzes/{self.quiz.id}/start_attempt/').data['id']
+        seed = QuizAttempt.objects.get(pk=attempt_id).shuffle_seed
+        self.assertIsNotNone(seed)
+
+        first = self.client.get(self.url).data
+        self.assertEqual(self.client.get(self.url).data, first)
+        expected = shuffle_questions(question_payload(self.quiz.id)['student_questions'], seed)
+        self.assertEqual([question['id'] for question in first], [question['id'] for question in expected])
+        self.assertEqual(
+            [[option['id'] for option in question['options']] for question in first],
+            [[option['id'] for option in question['options']] for question in expected],
+        )
+
+        answers = [
+            {'question_id': question['id'], 'selected_options': [self.correct[question['id']]]}
+            for question in first
+        ]
+        response = self.client.post(f'/api/quizzes/{self.quiz.id}/submit/', {'answers': answers}, format='json')
+        self.assertEqual((response.data['score'], response.data['max_score']), (6, 6))
+
+    def test_attempt_quiz_details_hide_answers_in_attempt_order(self):
+        from .delivery import question_payload, shuffle_questions
+
+        self.client.force_authenticate(user=self.student)
+        started = self.client.post(f'/api/quizzes/{self.quiz.id}/start_attempt/')
+        questions = started.data['quiz_details']['questions']
+        self.assertTrue(all('is_correct' not in option for question in questions for option in question['options']))
+        self.assertTrue(all('explanation' not in question for question in questions))
+
+        seed = QuizAttempt.objects.get(pk=started.data['id']).shuffle_seed
+        expected = shuffle_questions(question_payload(self.quiz.id)['student_questions'], seed)
+        self.assertEqual(questions, expected)
+
+        # Terminado el intento, con show_correct_answers se muestra la explicación
+        submitted = self.client.post(f'/api/quizzes/{self.quiz.id}/submit/', {}, format='json')
+        submitted_questions = submitted.data['quiz_details']['questions']
+        self.assertEqual(
+            [{key: value for key, value in question.items() if key != 'explanation'} for question in submitted_questions],
+            expected
+        )
+        self.assertTrue(all('explanation' in question for question in submitted_questions))
+
+    def test_explanations_stay_hidden_without_show_correct_answers(self):
+        Question.objects.filter(quiz=self.quiz).update(explanation='Porque sí')
+        Quiz.objects.filter(pk=self.quiz.pk).update(show_correct_answers=False)
+
+        self.client.force_authenticate(user=self.student)
+        self.client.post(f'/api/quizzes/{self.quiz.id}/start_attempt/')
+        submitted = self.client.post(f'/api/quizzes/{self.quiz.id}/submit/', {}, format='json')
+        self.assertTrue(all('explanation' not in question for question in submitted.data['quiz_details']['questions']))
+
+    def test_grading_follows_answer_key_changes(self):
+        question_id, option_id = next(iter(self.correct.items()))
+        Option.objects.filter(question_id=question_id).exclude(pk=option_id).first().delete()
+        changed = Option.objects.get(pk=option_id)
+        changed.is_correct = False
+        changed.save()
+
+        self.client.force_authenticate(user=self.student)
+        self.client.post(f'/api/quizzes/{self.quiz.id}/start_attempt/')
+        response = self.client.post(
+            f'/api/quizzes/{self.quiz.id}/submit/',
+            {'answers': [{'question_id': question_id, 'selected_options': [option_id]}]},
+            format='json'
+        )
+        self.assertEqual(response.data['score'], 0)
@@ -3,19 +3,28 @@ from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated, IsAdminUser
 from django.shortcuts import get_object_or_404
-from django.utils import timezone
-from django.http import HttpResponse
-from django.db.models import Count, Avg, Max
-from .models import Quiz, Question, Option, QuizAttempt, UserAnswer, QuizTemplate
+from django.http import Http404, HttpResponse
+from django.db import transaction
+from django.db.models import Count, Max, Sum
+from .models import (
+    Quiz, Question, Option, QuizAttempt, QuizTemplate,
+    QuizStats, QuestionStats, UserQuizStats
+)
+from .analytics import histogram_labels
+from .attempts import open_attempt, quiz_payload, AttemptError, CLIENT_REQUEST_ID_MAX_LENGTH
+from .delivery import question_payload, shuffle_questions, with_explanations
+from . import exam_sessions
 from .serializers import (
     QuizSerializer, QuestionSerializer, OptionSerializer,
-    QuizAttemptSerializer, UserAnswerSerializer,
+    QuizAttemptSerializer, QuizAttemptPayloadSerializer, UserAnswerSerializer,
     QuizCreateSerializer, QuestionCreateSerializer, QuizSubmissionSerializer,
     QuizTemplateSerializer
 )
+from courses.enrollment import is_enrolled
 from courses.models import Course
 from lessons.models import Lesson
 from users.permissions import IsInstructorOrAdmin
+from ifap_backend.db_routers import ReplicaReadMixin
 
 class QuizViewSet(viewsets.ModelViewSet):
     serializer_class = QuizSerializer
@@ -85,19 +94,55 @@ class QuizViewSet(viewsets.ModelViewSet):
             ]
         }
 
+    def _attempt_quiz_details(self, quiz, attempt, user):
+        """
+        `quiz_details` de un intento: el autor del quiz (o un superusuario) ve
+        las preguntas completas; el resto, sin `is_correct` y en el orden del
+        intento si el quiz es aleatorio. La `explanation` solo aparece en el
+        intento ya finalizado y si el quiz tiene `show_correct_answers`.
+        """
+        details = dict(quiz_payload(quiz))
+        payload = question_payload(quiz.pk)
+        if quiz.created_by_id == user.id or user.is_superuser:
+            details['questions'] = payload['questions']
+            return details
+        questions = payload['student_questions']
+        if attempt.shuffle_seed is not None:
+            questions = shuffle_questions(questions, attempt.shuffle_seed)
+        if attempt.completed_at is not None and quiz.show_correct_answers:
+            questions = with_explanations(questions, payload['questions'])
+        details['questions'] = questions
+        return details
+
     @action(detail=True, methods=['get'], permission_classes=[IsAuthenticated])
     def questions(self, request, pk=None):
-        quiz = self.get_object()
-        # Verificar que el estudiante esté inscrito en el curso si no es instructor
-        if not request.user.is_instructor and not request.user.is_superuser:
-            if not quiz.course.students.filter(id=request.user.id).exists():
-                return Response(
-                    {'error': 'No tienes acceso a las preguntas de este quiz'},
-                    status=status.HTTP_403_FORBIDDEN
-                )
-        questions = quiz.questions.all().order_by('order')
-        serializer = QuestionSerializer(questions, many=True)
-        return Response(serializer.data)
+        """
+        Preguntas del quiz desde el payload cacheado. Los estudiantes las
+        reciben sin `is_correct` y, si el quiz es aleatorio, en el orden de
+        su intento en curso.
+        """
+        user = request.user
+        payload = question_payload(pk) if str(pk).isdigit() else None
+        if payload is None:
+            raise Http404
+        quiz = payload['quiz']
+        # Mismo alcance que get_queryset: los docentes ven sus quizzes y el
+        # resto los publicados de cursos activos en los que están inscritos
+        if user.is_instructor:
+            visible = quiz['created_by'] == user.id
+        else:
+            visible = quiz['is_published'] and is_enrolled(quiz['course'], user.id)
+        if not visible:
+            raise Http404
+
+        if user.is_instructor or user.is_superuser:
+            return Response(payload['questions'])
+        questions = payload['student_questions']
+        if quiz['randomize_questions']:
+            state = exam_sessions.load_state(quiz['id'], user)
+            if state is not None and state.get('seed') is not None:
+                questions = shuffle_questions(questions, state['seed'])
+        return Response(questions)
 
     @action(detail=True, methods=['patch'], permission_classes=[IsAuthenticated, IsInstructorOrAdmin])
     def update_question_order(self, request, pk=None):
@@ -131,101 +176,102 @@ class QuizViewSet(viewsets.ModelViewSet):
 
     @action(detail=True, methods=['post'], permission_classes=[IsAuthenticated])
     def start_attempt(self, request, pk=None):
-        quiz = self.get_object()
+        # Preguntas y clave de respuestas salen del payload cacheado: sin prefetch
+        quiz = self._session_quiz(pk)
         user = request.user
 
         # Check if user is enrolled in the course
-        if not quiz.course.students.filter(id=user.id).exists():
+        if not is_enrolled(quiz.course_id, user.id):
             return Response(
                 {'error': 'No estás inscrito en este curso'},
                 status=status.HTTP_403_FORBIDDEN
             )
 
-        # Check max attempts
-        if quiz.max_attempts > 0:
-            attempt_count = QuizAttempt.objects.filter(user=user, quiz=quiz).count()
-            if attempt_count >= quiz.max_attempts:
-                return Response(
-                    {'error': 'Has alcanzado el máximo número de intentos permitidos'},
-                    status=status.HTTP_400_BAD_REQUEST
-                )
+        # Reintentos del cliente con el mismo identificador devuelven el mismo intento
+        client_request_id = request.data.get('client_request_id') or request.headers.get('Idempotency-Key')
+        if client_request_id is not None and (
+            not isinstance(client_request_id, str) or len(client_request_id) > CLIENT_REQUEST_ID_MAX_LENGTH
+        ):
+            return Response(
+                {'error': f'client_request_id debe ser un texto de hasta {CLIENT_REQUEST_ID_MAX_LENGTH} caracteres'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
 
-        # Create new attempt
-        attempt = QuizAttempt.objects.create(
-            user=user,
-            quiz=quiz,
-            attempt_number=QuizAttempt.objects.filter(user=user, quiz=quiz).count() + 1
-        )
+        try:
+            attempt, _ = exam_sessions.start_session(quiz, user, client_request_id)
+        except AttemptError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
 
-        serializer = QuizAttemptSerializer(attempt)
+        serializer = QuizAttemptPayloadSerializer(
+            attempt, context={'quiz_payload': self._attempt_quiz_details(quiz, attempt, user)}
+        )
         return Response(serializer.data)
 
-    @action(detail=True, methods=['post'], permission_classes=[IsAuthenticated])
-    def submit(self, request, pk=None):
-        quiz = self.get_object()
-        user = request.user
+    def _session_quiz(self, pk):
+        # Sin el prefetch de preguntas de get_queryset: el autoguardado no lo necesita
+        return get_object_or_404(self.get_queryset().prefetch_related(None), pk=pk)
 
-        # Get the latest attempt
-        attempt = QuizAttempt.objects.filter(user=user, quiz=quiz, completed_at__isnull=True).first()
-        if not attempt:
+    @action(detail=True, methods=['get'], permission_classes=[IsAuthenticated])
+    def session(self, request, pk=None):
+        """Intento en curso: plazo, segundos restantes y respuestas guardadas"""
+        quiz = self._session_quiz(pk)
+        state = exam_sessions.load_state(quiz.pk, request.user)
+        if state is None:
             return Response(
                 {'error': 'No hay un intento activo para este quiz'},
-                status=status.HTTP_400_BAD_REQUEST
+                status=status.HTTP_404_NOT_FOUND
             )
+        return Response(exam_sessions.session_data(state))
 
+    @action(detail=True, methods=['post'], permission_classes=[IsAuthenticated])
+    def autosave(self, request, pk=None):
+        """Guarda respuestas parciales del intento en curso (mismo formato que submit)"""
+        quiz = self._session_quiz(pk)
         serializer = QuizSubmissionSerializer(data=request.data)
         if not serializer.is_valid():
             return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
-        answers_data = serializer.validated_data['answers']
-        total_score = 0
-        max_score = 0
+        try:
+            state = exam_sessions.save_answers(quiz, request.user, serializer.validated_data['answers'])
+        except exam_sessions.AttemptExpired as e:
+            return Response({'error': str(e)}, status=status.HTTP_409_CONFLICT)
+        except AttemptError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        data = exam_sessions.session_data(state)
+        data['saved'] = len(serializer.validated_data['answers'])
+        return Response(data)
 
-        # Process each answer
-        for answer_data in answers_data:
-            question = get_object_or_404(Question, id=answer_data['question_id'])
-            max_score += question.points
+    @action(detail=True, methods=['post'], permission_classes=[IsAuthenticated])
+    def submit(self, request, pk=None):
+        """
+        Finaliza el intento en curso calificando las respuestas autoguardadas
+        más las del request. Pasado el plazo solo cuenta lo guardado.
+        """
+        quiz = self._session_quiz(pk)
+        user = request.user
 
-            user_answer = UserAnswer.objects.create(
-                attempt=attempt,
-                question=question,
-                text_answer=answer_data.get('text_answer', '')
-            )
+        serializer = QuizSubmissionSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        answers = serializer.validated_data['answers']
+        try:
+            exam_sessions.validate_answers(quiz, exam_sessions.compact_answers(answers))
+        except AttemptError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        with transaction.atomic():
+            # Bloqueado: un envío repetido espera y luego ya no encuentra el intento abierto
+            attempt = open_attempt(quiz, user, lock=True)
+            if not attempt:
+                return Response(
+                    {'error': 'No hay un intento activo para este quiz'},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+            exam_sessions.finalize(attempt, answers)
 
-            # Handle selected options for multiple choice questions
-            if 'selected_options' in answer_data:
-                selected_options = Option.objects.filter(id__in=answer_data['selected_options'])
-                user_answer.selected_options.set(selected_options)
-
-            # Calculate if answer is correct
-            if question.question_type in ['multiple_choice', 'true_false']:
-                correct_options = question.options.filter(is_correct=True)
-                selected_correct = user_answer.selected_options.filter(is_correct=True).count()
-                total_correct = correct_options.count()
-                
-                if selected_correct == total_correct and user_answer.selected_options.count() == total_correct:
-                    user_answer.is_correct = True
-                    user_answer.points_earned = question.points
-                    total_score += question.points
-                else:
-                    user_answer.points_earned = 0
-            else:
-                # For essay/short answer, manual grading needed
-                user_answer.points_earned = 0
-
-            user_answer.save()
-
-        # Update attempt
-        attempt.score = total_score
-        attempt.max_score = max_score
-        attempt.percentage = (total_score / max_score * 100) if max_score > 0 else 0
-        attempt.is_passed = attempt.percentage >= quiz.passing_score
-        attempt.completed_at = timezone.now()
-        if attempt.completed_at:
-            attempt.time_taken_seconds = int((attempt.completed_at - attempt.started_at).total_seconds())
-        attempt.save()
-
-        serializer = QuizAttemptSerializer(attempt)
+        serializer = QuizAttemptPayloadSerializer(
+            attempt, context={'quiz_payload': self._attempt_quiz_details(quiz, attempt, user)}
+        )
         return Response(serializer.data)
 
     @action(detail=False, methods=['get'], permission_classes=[IsAuthenticated])
@@ -255,6 +301,61 @@ class QuizViewSet(viewsets.ModelViewSet):
         serializer = QuizAttemptSerializer(attempts, many=True)
         return Response(serializer.data)
 
+    @action(detail=True, methods=['get'], permission_classes=[IsAuthenticated, IsInstructorOrAdmin])
+    def analytics(self, request, pk=None):
+        """
+        Analítica precalculada del quiz: resumen de intentos, histograma de
+        puntuaciones y análisis de ítems por pregunta (dificultad,
+        discriminación y distribución de opciones elegidas).
+        """
+        quiz = self.get_object()
+        if quiz.created_by != request.user and not request.user.is_superuser:
+            return Response(
+                {'error': 'No tienes permisos para ver la analítica de este quiz'},
+                status=status.HTTP_403_FORBIDDEN
+            )
+
+        stats = QuizStats.objects.filter(quiz=quiz).first() or QuizStats(quiz=quiz)
+        histogram = stats.score_histogram or [0] * QuizStats.HISTOGRAM_BUCKETS
+
+        questions = Question.objects.filter(quiz=quiz).select_related('stats').prefetch_related('options__stats')
+        items = []
+        for question in questions:
+            question_stats = getattr(question, 'stats', None) or QuestionStats(question=question)
+            answered = question_stats.answers_count
+            options = []
+            for option in question.options.all():
+                selected = option.stats.selected_count if hasattr(option, 'stats') else 0
+                options.append({
+                    'option_id': option.id,
+                    'option_text': option.option_text,
+                    'is_correct': option.is_correct,
+                    'selected_count': selected,
+                    'selected_rate': round(selected / answered * 100, 2) if answered else 0,
+                })
+            discrimination = question_stats.discrimination
+            items.append({
+                'question_id': question.id,
+                'question_text': question.question_text,
+                'answers_count': answered,
+                'correct_count': question_stats.correct_count,
+                'difficulty': round(question_stats.difficulty, 2),
+                'discrimination': round(discrimination, 3) if discrimination is not None else None,
+                'options': options,
+            })
+
+        return Response({
+            'quiz_id': quiz.id,
+            'started_attempts': stats.started_count,
+            'completed_attempts': stats.completed_count,
+            'passed_attempts': stats.passed_count,
+            'pass_rate': round(stats.pass_rate, 2),
+            'average_score': round(stats.average_percentage, 2),
+            'average_time_seconds': round(stats.average_time_seconds, 2),
+            'score_histogram': dict(zip(histogram_labels(), histogram)),
+            'questions': items,
+        })
+
     @action(detail=True, methods=['post'], permission_classes=[IsAuthenticated, IsInstructorOrAdmin])
     def save_as_template(self, request, pk=None):
         quiz = self.get_object()
@@ -504,37 +605,40 @@ class QuizAttemptViewSet(viewsets.ReadOnlyModelViewSet):
         serializer = UserAnswerSerializer(answers, many=True)
         return Response(serializer.data)
 
-class StatsViewSet(viewsets.ViewSet):
+class StatsViewSet(ReplicaReadMixin, viewsets.ViewSet):
     permission_classes = [IsAuthenticated]
 
     @action(detail=False, methods=['get'], permission_classes=[IsAdminUser])
     def overall(self, request):
-        # Overall statistics for admin
+        # Overall statistics for admin, leídas de los rollups por quiz
         total_quizzes = Quiz.objects.count()
         total_questions = Question.objects.count()
-        total_attempts = QuizAttempt.objects.count()
-        avg_score = QuizAttempt.objects.aggregate(avg=Avg('percentage'))['avg'] or 0
-        
+        totals = QuizStats.objects.aggregate(
+            started=Sum('started_count'),
+            completed=Sum('completed_count'),
+            percentage=Sum('percentage_sum'),
+        )
+        completed = totals['completed'] or 0
+        avg_score = (totals['percentage'] or 0) / completed if completed else 0
+
         return Response({
             'total_quizzes': total_quizzes,
             'total_questions': total_questions,
-            'total_attempts': total_attempts,
+            'total_attempts': totals['started'] or 0,
             'average_score': round(avg_score, 2)
         })
 
     @action(detail=False, methods=['get'], permission_classes=[IsAuthenticated])
     def user_stats(self, request):
-        user = request.user
-        attempts = QuizAttempt.objects.filter(user=user)
-        
-        total_attempts = attempts.count()
-        passed_attempts = attempts.filter(is_passed=True).count()
-        avg_score = attempts.aggregate(avg=Avg('percentage'))['avg'] or 0
-        
+        stats = UserQuizStats.objects.filter(user=request.user).first() or UserQuizStats(user=request.user)
+
+        total_attempts = stats.completed_count
+        passed_attempts = stats.passed_count
+
         return Response({
             'total_attempts': total_attempts,
             'passed_attempts': passed_attempts,
-            'average_score': round(avg_score, 2),
+            'average_score': round(stats.average_percentage, 2),
             'success_rate': round((passed_attempts / total_attempts * 100) if total_attempts > 0 else 0, 2)
         })
 
@@ -0,0 +1,17 @@
+# Generated by Django 4.2.7 on 2026-10-19 14:32
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='taskassignment',
+            index=models.Index(fields=['student', 'status', '-assigned_date'], name='task_assignment_student_idx'),
+        ),
+    ]
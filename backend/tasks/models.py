@@ -128,6 +128,9 @@ class TaskAssignment(models.Model):
         verbose_name_plural = 'Asignaciones de Tareas'
         unique_together = ['task', 'student']
         ordering = ['-assigned_date']
+        indexes = [
+            models.Index(fields=['student', 'status', '-assigned_date'], name='task_assignment_student_idx'),
+        ]
 
     def __str__(self):
         return f"{self.task.title} - {self.student.get_full_name()}"
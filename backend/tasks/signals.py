@@ -0,0 +1,7 @@
+from ifap_backend.pagination import register_count_invalidation
+from .models import Task, TaskAssignment, TaskSubmission
+
+
+# Los estudiantes ven las tareas a través de sus asignaciones
+register_count_invalidation(Task, TaskAssignment)
+register_count_invalidation(TaskSubmission)
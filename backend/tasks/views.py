@@ -18,6 +18,7 @@ from .serializers import (
     TaskCreateSerializer, TaskSubmissionCreateSerializer
 )
 from users.permissions import IsInstructorOrAdmin, IsOwnerOrInstructorOrAdmin
+from ifap_backend.pagination import TaskKeysetPagination, TaskPagination
 
 class TaskCategoryViewSet(viewsets.ModelViewSet):
     queryset = TaskCategory.objects.filter(is_active=True)
@@ -31,6 +32,7 @@ class TaskCategoryViewSet(viewsets.ModelViewSet):
 class TaskViewSet(viewsets.ModelViewSet):
     serializer_class = TaskSerializer
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class = TaskKeysetPagination
 
     def get_queryset(self):
         user = self.request.user
@@ -214,6 +216,7 @@ class TaskAssignmentViewSet(viewsets.ModelViewSet):
 class TaskSubmissionViewSet(viewsets.ModelViewSet):
     serializer_class = TaskSubmissionSerializer
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class = TaskPagination
     parser_classes = [MultiPartParser, FormParser]
 
     def get_queryset(self):
@@ -0,0 +1,189 @@
+"""
+Servicio de métricas para el dashboard administrativo.
+
+- Los conteos de usuarios por rol salen de un único aggregate condicional.
+- El resto de totales se leen de `MetricCounter`, que se mantiene con
+  señales post_save/post_delete y se puede reconstruir bajo demanda.
+- El snapshot completo se sirve desde cache mientras no supere
+  `DASHBOARD_STATS_MAX_AGE` segundos.
+"""
+import logging
+import time
+
+from django.apps import apps
+from django.conf import settings
+from django.db.models import Count, F, Q
+from django.db.models.signals import pre_save, post_save, post_delete
+from django.utils import timezone
+
+from ifap_backend.cache_service import cache_service
+from .models import User, MetricCounter
+
+logger = logging.getLogger('users')
+
+SNAPSHOT_CACHE_KEY = 'dashboard_stats_snapshot'
+
+# nombre del contador -> (modelo, filtro que deben cumplir las filas contadas)
+COUNTER_SOURCES = {
+    'courses.total': ('courses.Course', None),
+    'courses.active': ('courses.Course', {'is_active': True}),
+    'lessons.total': ('lessons.Lesson', None),
+    'quizzes.total': ('quizzes.Quiz', None),
+    'forum.topics': ('forum.ForumTopic', None),
+    'library.files': ('library.LibraryFile', None),
+}
+
+
+def _matches(instance, conditions):
+    if not conditions:
+        return True
+    return all(getattr(instance, field) == value for field, value in conditions.items())
+
+
+def _counters_for(model):
+    label = model._meta.label
+    return [
+        (name, conditions) for name, (source, conditions) in COUNTER_SOURCES.items()
+        if source == label
+    ]
+
+
+def adjust_counter(name, delta):
+    """Suma `delta` al contador de forma atómica (para operaciones masivas)"""
+    if delta:
+        MetricCounter.objects.filter(name=name).update(value=F('value') + delta)
+
+
+def rebuild_counters():
+    """Recalcula todos los contadores desde las tablas de origen"""
+    values = {}
+    for name, (source, conditions) in COUNTER_SOURCES.items():
+        queryset = apps.get_model(source).objects.all()
+        if conditions:
+            queryset = queryset.filter(**conditions)
+        values[name] = queryset.count()
+        MetricCounter.objects.update_or_create(name=name, defaults={'value': values[name]})
+    logger.info(f"Contadores del dashboard reconstruidos: {values}")
+    return values
+
+
+def get_counters():
+    counters = dict(MetricCounter.objects.values_list('name', 'value'))
+    if set(COUNTER_SOURCES) - set(counters):
+        counters = rebuild_counters()
+    return counters
+
+
+def get_user_role_counts():
+    """Conteos de usuarios por rol en una sola consulta"""
+    return User.objects.aggregate(
+        total=Count('id'),
+        active=Count('id', filter=Q(is_active=True)),
+        students=Count('id', filter=Q(is_student=True)),
+        instructors=Count('id', filter=Q(is_instructor=True)),
+        admins=Count('id', filter=Q(is_superuser=True)),
+        without_role=Count('id', filter=Q(is_student=False, is_instructor=False, is_superuser=False)),
+    )
+
+
+def build_snapshot():
+    users = get_user_role_counts()
+    counters = get_counters()
+    return {
+        'users': {
+            'total': users['total'],
+            'active': users['active'],
+            'students': users['students'],
+            'instructors': users['instructors'],
+            'admins': users['admins'],
+            'without_role': users['without_role'],
+        },
+        'courses': {
+            'total': counters['courses.total'],
+            'active': counters['courses.active'],
+        },
+        'lessons': {
+            'total': counters['lessons.total'],
+        },
+        'quizzes': {
+            'total': counters['quizzes.total'],
+        },
+        'forum': {
+            'topics': counters['forum.topics'],
+        },
+        'library': {
+            'files': counters['library.files'],
+        },
+        'generated_at': timezone.now().isoformat(),
+    }
+
+
+def get_dashboard_snapshot(max_age=None, refresh=False):
+    """
+    Devuelve el snapshot cacheado si tiene menos de `max_age` segundos
+    (por defecto `DASHBOARD_STATS_MAX_AGE`); si no, lo regenera.
+    """
+    budget = settings.DASHBOARD_STATS_MAX_AGE
+    max_age = budget if max_age is None else max(0, min(max_age, budget))
+
+    if not refresh:
+        cached = cache_service.get(SNAPSHOT_CACHE_KEY, cache_alias='api')
+        if cached and time.time() - cached['timestamp'] <= max_age:
+            return cached['data']
+
+    snapshot = build_snapshot()
+    cache_service.set(
+        SNAPSHOT_CACHE_KEY,
+        {'timestamp': time.time(), 'data': snapshot},
+        max(budget, 1),
+        cache_alias='api'
+    )
+    return snapshot
+
+
+def refresh_dashboard_snapshot():
+    """Reconstruye contadores y snapshot (endpoint de refresco explícito)"""
+    rebuild_counters()
+    return get_dashboard_snapshot(refresh=True)
+
+
+# --- Mantenimiento de contadores por señales ---
+
+def _track_previous_state(sender, instance, update_fields=None, **kwargs):
+    conditional = [conditions for _, conditions in _counters_for(sender) if conditions]
+    if not conditional or instance._state.adding or instance.pk is None:
+        return
+    fields = sorted({field for conditions in conditional for field in conditions})
+    if update_fields is not None and not set(fields) & set(update_fields):
+        return
+    instance._metric_previous = sender.objects.filter(pk=instance.pk).values(*fields).first()
+
+
+def _update_on_save(sender, instance, created, **kwargs):
+    for name, conditions in _counters_for(sender):
+        if created:
+            if _matches(instance, conditions):
+                adjust_counter(name, 1)
+        elif conditions:
+            previous = instance.__dict__.pop('_metric_previous', None)
+            if previous is None:
+                continue
+            was = all(previous[field] == value for field, value in conditions.items())
+            now = _matches(instance, conditions)
+            if was != now:
+                adjust_counter(name, 1 if now else -1)
+
+
+def _update_on_delete(sender, instance, **kwargs):
+    for name, conditions in _counters_for(sender):
+        if _matches(instance, conditions):
+            adjust_counter(name, -1)
+
+
+def connect_counter_signals():
+    for source in {source for source, _ in COUNTER_SOURCES.values()}:
+        model = apps.get_model(source)
+        uid = f'metric_counters:{source}'
+        pre_save.connect(_track_previous_state, sender=model, dispatch_uid=f'{uid}:pre_save')
+        post_save.connect(_update_on_save, sender=model, dispatch_uid=f'{uid}:post_save')
+        post_delete.connect(_update_on_delete, sender=model, dispatch_uid=f'{uid}:post_delete')
@@ -162,3 +162,22 @@ class User(AbstractUser):
             return cls.objects.filter(is_superuser=True)
         else:
             return cls.objects.none()
+
+
+class MetricCounter(models.Model):
+    """
+    Contador agregado mantenido por señales (ver users/dashboard_service.py).
+
+    Evita ejecutar un COUNT por tabla cada vez que se carga el dashboard
+    administrativo. Se puede reconstruir desde las tablas de origen.
+    """
+    name = models.CharField(max_length=100, primary_key=True)
+    value = models.BigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = 'Contador de métricas'
+        verbose_name_plural = 'Contadores de métricas'
+
+    def __str__(self):
+        return f'{self.name}: {self.value}'
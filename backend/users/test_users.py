@@ -4,11 +4,16 @@ Tests para el modelo User y funcionalidades relacionadas
 from django.test import TestCase
 from django.contrib.auth import get_user_model
 from django.core.exceptions import ValidationError
+from django.core.cache import caches
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from rest_framework.test import APITestCase
 from rest_framework import status
 from rest_framework_simplejwt.tokens import RefreshToken
 from users.models import User
 from users.serializers import UserSerializer, UserRegistrationSerializer
+from users.dashboard_service import get_counters
+from courses.models import Course
 
 User = get_user_model()
 
@@ -270,4 +275,79 @@ class UserAPITest(APITestCase):
         data['confirm_password'] = 'DifferentPassword123!'
         
         response = self.client.post(url, data, format='json')
-        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
\ No newline at end of file
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+class DashboardStatsTest(APITestCase):
+    """Tests para el snapshot de estadísticas del dashboard"""
+
+    def setUp(self):
+        """Configuración inicial: un admin y un instructor con un curso"""
+        caches['api'].clear()
+        self.admin = User.objects.create_user(
+            username='dashboard_admin',
+            email='dashboard_admin@ifap.edu.pe',
+            password='TestPassword123!'
+        )
+        self.admin.set_role('admin')
+        self.admin.save()
+        self.instructor = User.objects.create_user(
+            username='dashboard_instructor',
+            email='dashboard_instructor@ifap.edu.pe',
+            password='TestPassword123!'
+        )
+        self.instructor.set_role('instructor')
+        self.instructor.save()
+        self.course = Course.objects.create(
+            title='Curso dashboard',
+            description='Descripción',
+            instructor=self.instructor
+        )
+        self.client.force_authenticate(user=self.admin)
+
+    def test_counters_follow_writes(self):
+        """Los contadores se actualizan con altas, cambios y bajas"""
+        counters = get_counters()
+        self.assertEqual(counters['courses.total'], 1)
+        self.assertEqual(counters['courses.active'], 1)
+
+        self.course.is_active = False
+        self.course.save()
+        self.assertEqual(get_counters()['courses.active'], 0)
+
+        self.course.delete()
+        counters = get_counters()
+        self.assertEqual(counters['courses.total'], 0)
+        self.assertEqual(counters['courses.active'], 0)
+
+    def test_dashboard_stats_served_from_snapshot(self):
+        """La segunda petición se sirve desde cache sin consultas de conteo"""
+        response = self.client.get('/api/users/dashboard_stats/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['users']['admins'], 1)
+        self.assertEqual(response.data['courses']['total'], 1)
+
+        with CaptureQueriesContext(connection) as context:
+            self.client.get('/api/users/dashboard_stats/')
+        self.assertFalse(any('COUNT(' in q['sql'].upper() for q in context.captured_queries))
+
+    def test_refresh_rebuilds_snapshot(self):
+        """El endpoint de refresco ignora el snapshot cacheado"""
+        self.client.get('/api/users/dashboard_stats/')
+        Course.objects.create(
+            title='Otro curso',
+            description='Descripción',
+            instructor=self.instructor
+        )
+
+        cached = self.client.get('/api/users/dashboard_stats/')
+        self.assertEqual(cached.data['courses']['total'], 1)
+
+        response = self.client.post('/api/users/dashboard_stats/refresh/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['courses']['total'], 2)
+
+    def test_refresh_requires_admin(self):
+        """Solo los administradores pueden refrescar"""
+        self.client.force_authenticate(user=self.instructor)
+        response = self.client.post('/api/users/dashboard_stats/refresh/')
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
@@ -40,15 +40,12 @@ from rest_framework.views import APIView
 from rest_framework.generics import CreateAPIView
 from ifap_backend.pagination import StandardResultsPagination
 from ifap_backend.query_optimizations import OptimizedQueryMixin, UserQueryOptimizer
+from ifap_backend.db_routers import read_from_replica
 from drf_yasg.utils import swagger_auto_schema
 from drf_yasg import openapi
 
 # Imports para estadísticas del dashboard
-from courses.models import Course
-from lessons.models import Lesson
-from quizzes.models import Quiz
-from forum.models import ForumTopic
-from library.models import LibraryFile
+from .dashboard_service import get_dashboard_snapshot, refresh_dashboard_snapshot
 
 audit_logger = logging.getLogger('audit')
 
@@ -100,7 +97,7 @@ class UserViewSet(OptimizedQueryMixin, viewsets.ModelViewSet):
             return [CanManageUsers()]
         elif self.action == 'retrieve':
             return [IsOwnerOrInstructorOrAdmin()]
-        elif self.action == 'update_role':
+        elif self.action in ['update_role', 'dashboard_stats', 'refresh_dashboard_stats']:
             return [IsAdminUser()]
         elif self.action in ['me', 'logout', 'change_password']:
             return [IsAuthenticated()]
@@ -293,16 +290,13 @@ class UserViewSet(OptimizedQueryMixin, viewsets.ModelViewSet):
                 'error': 'Solo los administradores pueden ver el resumen de roles.'
             }, status=status.HTTP_403_FORBIDDEN)
         
+        users = get_dashboard_snapshot()['users']
         summary = {
-            'total_users': User.objects.count(),
-            'students': User.get_users_by_role('student').count(),
-            'instructors': User.get_users_by_role('instructor').count(),
-            'admins': User.get_users_by_role('admin').count(),
-            'users_without_role': User.objects.filter(
-                is_student=False, 
-                is_instructor=False, 
-                is_superuser=False
-            ).count()
+            'total_users': users['total'],
+            'students': users['students'],
+            'instructors': users['instructors'],
+            'admins': users['admins'],
+            'users_without_role': users['without_role']
         }
         
         return Response(summary)
@@ -344,57 +338,17 @@ class UserViewSet(OptimizedQueryMixin, viewsets.ModelViewSet):
         }
     )
     @action(detail=False, methods=['get'], permission_classes=[IsAdminUser])
+    @read_from_replica
     def dashboard_stats(self, request):
         """Obtener estadísticas completas para el dashboard administrativo"""
         try:
-            # Estadísticas de usuarios
-            total_users = User.objects.count()
-            active_users = User.objects.filter(is_active=True).count()
-            students = User.objects.filter(is_student=True).count()
-            instructors = User.objects.filter(is_instructor=True).count()
-            admins = User.objects.filter(is_superuser=True).count()
-            
-            # Estadísticas de cursos
-            total_courses = Course.objects.count()
-            active_courses = Course.objects.filter(is_active=True).count()
-            
-            # Estadísticas de lecciones
-            total_lessons = Lesson.objects.count()
-            
-            # Estadísticas de quizzes
-            total_quizzes = Quiz.objects.count()
-            
-            # Estadísticas del foro
-            total_topics = ForumTopic.objects.count()
-            
-            # Estadísticas de la biblioteca
-            total_files = LibraryFile.objects.count()
+            # ?max_age=<segundos> permite pedir un snapshot más reciente que el presupuesto por defecto
+            try:
+                max_age = int(request.query_params['max_age'])
+            except (KeyError, ValueError):
+                max_age = None
             
-            stats = {
-                'users': {
-                    'total': total_users,
-                    'active': active_users,
-                    'students': students,
-                    'instructors': instructors,
-                    'admins': admins
-                },
-                'courses': {
-                    'total': total_courses,
-                    'active': active_courses
-                },
-                'lessons': {
-                    'total': total_lessons
-                },
-                'quizzes': {
-                    'total': total_quizzes
-                },
-                'forum': {
-                    'topics': total_topics
-                },
-                'library': {
-                    'files': total_files
-                }
-            }
+            stats = get_dashboard_snapshot(max_age=max_age)
             
             audit_logger.info(
                 f"Dashboard stats requested by admin user {request.user.id} ({request.user.username})"
@@ -410,6 +364,23 @@ class UserViewSet(OptimizedQueryMixin, viewsets.ModelViewSet):
                 'error': 'Error al obtener estadísticas del dashboard'
             }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
+    @action(detail=False, methods=['post'], permission_classes=[IsAdminUser], url_path='dashboard_stats/refresh')
+    def refresh_dashboard_stats(self, request):
+        """Reconstruir contadores y snapshot del dashboard administrativo"""
+        try:
+            stats = refresh_dashboard_snapshot()
+            audit_logger.info(
+                f"Dashboard stats refreshed by admin user {request.user.id} ({request.user.username})"
+            )
+            return Response(stats)
+        except Exception as e:
+            audit_logger.error(
+                f"Error refreshing dashboard stats for user {request.user.id}: {str(e)}"
+            )
+            return Response({
+                'error': 'Error al refrescar estadísticas del dashboard'
+            }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
     @action(detail=False, methods=['post'], permission_classes=[IsAuthenticated])
     def logout(self, request):
         try: